@@ -0,0 +1,257 @@
+# -*-coding: utf-8 -
+'''
+    @author:  MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import sys
+sys.path.append('../')
+
+import argparse
+import os
+import json
+import time
+import platform
+import tempfile
+import subprocess
+import cv2
+import numpy as np
+
+from coreLib.config import config
+from coreLib.utils import sampleRandom,LOG_INFO
+from coreLib.atlas import useAtlas,createAtlases
+from coreLib import profiling
+from fixture import createFixture
+#--------------------
+# pipelines
+#--------------------
+# a pipeline is setup(data_dir) -> run(i) returning the arrays of page i to encode
+# (the library stages are timed by coreLib.profiling: word,line,page,background,colorize,linetext,totaltext,head,table,bottom)
+def sceneImage(data_dir):
+    '''
+        createSceneImage + createImageData + lineText + TotalText (synthetic.py)
+    '''
+    from coreLib import render
+    from coreLib.dataset import DataSet
+    from coreLib.format import lineText,TotalText
+    from coreLib.craft import gaussian_heatmap
+    ds=DataSet(data_dir)
+    dim=(config.back_dim,config.back_dim)
+    pool=render.backgroundPool(ds,dim=dim)
+    gmap=gaussian_heatmap(size=512,distanceRatio=config.heatmap_ratio)
+    def run(i):
+        rng=sampleRandom("bench",i)
+        back=render.randomBackground(pool,dim,sampleRandom("bench",i,"back"))
+        page,labels=render.createSceneImage(ds,rng=rng)
+        back=render.createImageData(back,page,labels,rng=rng)
+        heat_mask,link_mask=lineText(page,labels,gmap)
+        char_mask,word_mask,_=TotalText(page,labels)
+        return [back,heat_mask,link_mask,char_mask,word_mask]
+    return run
+
+def sceneMaps(data_dir,noisy=False):
+    '''
+        createSceneMaps (craftsynth.py) / createNoisyMaps (craftnoise.py)
+    '''
+    from coreLib import render,rendermaps
+    from coreLib.dataset import DataSet
+    from coreLib.craft import gaussian_heatmap
+    ds=DataSet(data_dir)
+    dim=(config.back_dim,config.back_dim)
+    pool=None if noisy else render.backgroundPool(ds,dim=dim)
+    gmap=gaussian_heatmap(size=512,distanceRatio=config.heatmap_ratio)
+    def run(i):
+        rng=sampleRandom("bench",i)
+        if noisy:
+            with profiling.timer("maps"):
+                return list(rendermaps.createNoisyMaps(ds,gmap,rng=rng))
+        back=render.randomBackground(pool,dim,sampleRandom("bench",i,"back"))
+        with profiling.timer("maps"):
+            return list(rendermaps.createSceneMaps(ds,gmap,back,rng=rng))
+    return run
+
+def noisyMaps(data_dir):
+    return sceneMaps(data_dir,noisy=True)
+
+def memoData(data_dir):
+    '''
+        create_memo_data (memo.py)
+    '''
+    from memoLib import joiner
+    from memoLib.dataset import DataSet
+    ds=DataSet(data_dir)
+    def run(i):
+        rng=sampleRandom("bench",i)
+        lang=rng.choice(["bangla","english"])
+        return list(joiner.create_memo_data(ds,lang,img_height=1024,rng=rng))
+    return run
+
+# word (comp_dim) and memo font sizes
+ATLAS_SIZES=[config.comp_dim,80,96,112,128]
+
+PIPELINES={"scene":sceneImage,
+           "scenemaps":sceneMaps,
+           "noisymaps":noisyMaps,
+           "memo":memoData}
+
+#--------------------
+# runner
+#--------------------
+def pageError(i,error,warmup=False):
+    '''
+        json record of a page that failed
+    '''
+    return {"page":i,"warmup":warmup,"type":type(error).__name__,"message":str(error)}
+
+def benchPipeline(setup,data_dir,save_dir,num_pages,warmup=2):
+    '''
+        runs a pipeline for warmup+num_pages pages and times its stages (see coreLib.profiling)
+        args:
+            setup       :   the pipeline (see PIPELINES)
+            data_dir    :   base data folder
+            save_dir    :   folder the encoded pages are written to
+            num_pages   :   number of timed pages
+            warmup      :   number of untimed pages (caches, lazy imports)
+        returns:
+            pipeline results
+    '''
+    try:
+        run=setup(data_dir)
+    except ImportError as e:
+        # a missing optional dependency
+        return {"skipped":f"{type(e).__name__}:{e}"}
+    errors=[]
+    profiling.enable()
+    try:
+        for i in range(warmup):
+            try:
+                run(num_pages+i)
+            except Exception as e:
+                errors.append(pageError(num_pages+i,e,warmup=True))
+        profiling.reset()
+        failed=0
+        start=time.perf_counter()
+        for i in range(num_pages):
+            try:
+                arrays=run(i)
+            except Exception as e:
+                errors.append(pageError(i,e))
+                failed+=1
+                continue
+            for k,arr in enumerate(arrays):
+                with profiling.timer("encode"):
+                    buf=cv2.imencode(".png",arr)[1]
+                with profiling.timer("write"):
+                    buf.tofile(os.path.join(save_dir,f"{i}_{k}.png"))
+        total=time.perf_counter()-start
+        res=profiling.summary()
+    finally:
+        profiling.disable()
+    # per page cost of every stage (failed pages included)
+    for val in res["stages"].values():
+        val["ms_per_page"]=val["total_ms"]/max(num_pages,1)
+    done=num_pages-failed
+    return {"pages":done,
+            "failed":failed,
+            "errors":errors,
+            "seconds":total,
+            "pages_per_sec":done/total if total>0 else 0.0,
+            "ms_per_page":1000*total/max(done,1),
+            "stages":res["stages"],
+            "counts":res["counts"]}
+
+def gitCommit():
+    try:
+        out=subprocess.run(["git","rev-parse","--short","HEAD"],cwd=os.path.dirname(os.path.abspath(__file__)),
+                           capture_output=True,text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def compareResults(results,base):
+    '''
+        logs the speed of every pipeline/stage relative to a previous result file
+    '''
+    for name,res in results["pipelines"].items():
+        old=base["pipelines"].get(name)
+        if "skipped" in res or old is None or "skipped" in old:
+            continue
+        LOG_INFO(f"{name}: {old['pages_per_sec']:.2f} -> {res['pages_per_sec']:.2f} pages/sec (x{res['pages_per_sec']/max(old['pages_per_sec'],1e-9):.2f})")
+        for stage,val in res["stages"].items():
+            if stage in old["stages"]:
+                prev=old["stages"][stage]["ms_per_page"]
+                LOG_INFO(f"    {stage:<12}{prev:9.2f} -> {val['ms_per_page']:9.2f} ms/page")
+
+#--------------------
+# main
+#--------------------
+def main(args):
+    num_pages=int(args.pages)
+    names=args.pipelines
+    for name in names:
+        assert name in PIPELINES,f"unknown pipeline:{name}"
+    # single threaded opencv: stable numbers
+    if not args.cv_threads:
+        cv2.setNumThreads(1)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir=args.data_dir
+        if data_dir is None:
+            data_dir=createFixture(os.path.join(tmp_dir,"data"),seed=int(args.fixture_seed))
+        save_dir=os.path.join(tmp_dir,"out")
+        os.makedirs(save_dir)
+        if args.atlas:
+            from coreLib.dataset import DataSet
+            atlas_dir=os.path.join(tmp_dir,"atlas")
+            os.makedirs(atlas_dir)
+            createAtlases(DataSet(data_dir),atlas_dir,ATLAS_SIZES)
+            useAtlas(atlas_dir)
+        results={"meta":{"commit":gitCommit(),
+                         "time":time.strftime("%Y-%m-%dT%H:%M:%S"),
+                         "python":platform.python_version(),
+                         "opencv":cv2.__version__,
+                         "numpy":np.__version__,
+                         "machine":platform.machine(),
+                         "pages":num_pages,
+                         "warmup":int(args.warmup),
+                         "data_dir":args.data_dir,
+                         "atlas":args.atlas,
+                         "fixture_seed":None if args.data_dir else int(args.fixture_seed)},
+                 "pipelines":{}}
+        for name in names:
+            LOG_INFO(f"Benchmarking:{name}")
+            res=benchPipeline(PIPELINES[name],data_dir,save_dir,num_pages,int(args.warmup))
+            results["pipelines"][name]=res
+            if "skipped" in res:
+                LOG_INFO(f"{name} skipped:{res['skipped']}",mcolor="red")
+                continue
+            LOG_INFO(f"{name}: {res['pages_per_sec']:.2f} pages/sec ({res['ms_per_page']:.1f} ms/page, failed:{res['failed']})")
+            for error in res["errors"]:
+                LOG_INFO(f"    page {error['page']}{' (warmup)' if error['warmup'] else ''} failed:{error['type']}:{error['message']}",mcolor="red")
+            for stage,val in res["stages"].items():
+                LOG_INFO(f"    {stage:<12}{val['ms_per_page']:9.2f} ms/page {val['calls']:6d} calls {val['mean_ms']:8.3f} ms/call")
+    with open(args.out,"w") as f:
+        json.dump(results,f,indent=2)
+    LOG_INFO(f"Results:{args.out}")
+    if args.compare is not None:
+        with open(args.compare,"r") as f:
+            compareResults(results,json.load(f))
+
+#-----------------------------------------------------------------------------------
+
+if __name__=="__main__":
+    '''
+        parsing and execution
+    '''
+    parser = argparse.ArgumentParser("Synthetic Page Pipeline Benchmark Script")
+    parser.add_argument("--data_dir",required=False,default=None,help ="base data folder to benchmark with : default=None (a fixture is created in a temporary folder)")
+    parser.add_argument("--pages",required=False,default=20,help ="number of timed pages per pipeline : default=20")
+    parser.add_argument("--warmup",required=False,default=2,help ="number of untimed pages per pipeline : default=2")
+    parser.add_argument("--pipelines",nargs='+',required=False,default=list(PIPELINES.keys()),help =f"pipelines to run. Available:{','.join(PIPELINES.keys())} : default=all")
+    parser.add_argument("--fixture_seed",required=False,default=0,help ="seed of the fixture data : default=0")
+    parser.add_argument("--atlas",action="store_true",help ="build the printed component atlases of the data first and draw printed words from them")
+    parser.add_argument("--cv_threads",action="store_true",help ="let opencv use its thread pool (default: single threaded)")
+    parser.add_argument("--out",required=False,default="results.json",help ="json file to save the results in : default=results.json")
+    parser.add_argument("--compare",required=False,default=None,help ="json results of a previous run to compare with : default=None")
+    args = parser.parse_args()
+    main(args)
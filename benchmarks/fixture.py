@@ -0,0 +1,128 @@
+# -*-coding: utf-8 -
+'''
+    @author:  MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import sys
+sys.path.append('../')
+
+import argparse
+import os
+import shutil
+import random
+import cv2
+import numpy as np
+import pandas as pd
+
+from coreLib.utils import LOG_INFO
+#--------------------
+# globals
+#--------------------
+# a few components of each set (labels only: the bitmaps are synthetic strokes)
+BANGLA_GRAPHEMES    =   ['ক','খা','গি','ম','র্ক','ই','ু','ং','ন্ত']
+BANGLA_NUMBERS      =   ['০','১','২','৩','৪','৫','৬','৭','৮','৯']
+ENGLISH_GRAPHEMES   =   list("abcdefghij")
+ENGLISH_NUMBERS     =   [str(i) for i in range(10)]
+SYMBOLS             =   ['.',',','-','/','(',')']
+#--------------------
+# helpers
+#--------------------
+def freeFonts():
+    '''
+        returns the paths of the DejaVu fonts shipped with matplotlib (a requirement of memoLib)
+    '''
+    import matplotlib
+    font_dir=os.path.join(matplotlib.get_data_path(),"fonts","ttf")
+    return [os.path.join(font_dir,"DejaVuSans.ttf"),os.path.join(font_dir,"DejaVuSerif.ttf")]
+
+def createBitmaps(save_dir,labels,rs,per_label=3):
+    '''
+        creates stroke bitmaps (black on white) for every label and the csv of the set
+        args:
+            save_dir    :   folder of the set (the csv is saved as save_dir.csv)
+            labels      :   labels of the set
+            rs          :   numpy RandomState
+            per_label   :   number of bitmaps per label
+    '''
+    os.makedirs(save_dir,exist_ok=True)
+    rows=[]
+    for label in labels:
+        for _ in range(per_label):
+            h,w=rs.randint(40,90),rs.randint(30,90)
+            img=np.full((h,w),255,np.uint8)
+            cv2.ellipse(img,(w//2,h//2),(max(w//3,2),max(h//3,2)),0,0,360,0,3)
+            cv2.line(img,(2,rs.randint(0,h)),(w-3,rs.randint(0,h)),0,2)
+            filename=f"f{len(rows)}"
+            cv2.imwrite(os.path.join(save_dir,f"{filename}.bmp"),img)
+            rows.append((filename,label))
+    pd.DataFrame(rows,columns=["filename","label"]).to_csv(f"{save_dir}.csv",index=False)
+
+def createDictionary(save_path,graphemes,rng,num_words=20):
+    '''
+        creates a dictionary csv of random grapheme words
+    '''
+    words=[]
+    for _ in range(num_words):
+        comps=[rng.choice(graphemes) for _ in range(rng.randint(1,6))]
+        words.append(("".join(comps),str(comps)))
+    pd.DataFrame(words,columns=["word","graphemes"]).to_csv(save_path,index=False)
+
+#--------------------
+# fixture
+#--------------------
+def createFixture(data_dir,seed=0,fonts=None,num_backgrounds=5):
+    '''
+        creates a tiny base data folder with the layout DataSet expects (coreLib and memoLib)
+        args:
+            data_dir        :   folder to create the data in (replaced if it exists)
+            seed            :   the fixture is the same for the same seed
+            fonts           :   ttf paths to use for every language (None: matplotlib DejaVu)
+            num_backgrounds :   number of background images
+        returns:
+            data_dir
+    '''
+    if os.path.exists(data_dir):
+        shutil.rmtree(data_dir)
+    rs =np.random.RandomState(seed)
+    rng=random.Random(seed)
+    fonts=fonts if fonts is not None else freeFonts()
+    # languages
+    for lang,graphemes,numbers in [("bangla",BANGLA_GRAPHEMES,BANGLA_NUMBERS),
+                                   ("english",ENGLISH_GRAPHEMES,ENGLISH_NUMBERS)]:
+        createBitmaps(os.path.join(data_dir,lang,"graphemes"),graphemes,rs)
+        createBitmaps(os.path.join(data_dir,lang,"numbers"),numbers,rs)
+        createDictionary(os.path.join(data_dir,lang,"dictionary.csv"),graphemes,rng)
+        font_dir=os.path.join(data_dir,lang,"fonts")
+        os.makedirs(font_dir)
+        for font_path in fonts:
+            shutil.copy(font_path,os.path.join(font_dir,os.path.basename(font_path)))
+    # common
+    createBitmaps(os.path.join(data_dir,"common","symbols"),SYMBOLS,rs)
+    for noise in ["random","signature"]:
+        noise_dir=os.path.join(data_dir,"common","noise",noise)
+        os.makedirs(noise_dir)
+        for i in range(3):
+            img=np.full((60,120),255,np.uint8)
+            cv2.line(img,(5,50),(110,rs.randint(5,20)),0,3)
+            cv2.imwrite(os.path.join(noise_dir,f"{i}.bmp"),img)
+    back_dir=os.path.join(data_dir,"common","background")
+    os.makedirs(back_dir)
+    for i in range(num_backgrounds):
+        img=rs.randint(120,255,(300+20*i,400,3)).astype(np.uint8)
+        cv2.imwrite(os.path.join(back_dir,f"{i}.jpg"),img)
+    return data_dir
+
+#-----------------------------------------------------------------------------------
+
+if __name__=="__main__":
+    '''
+        parsing and execution
+    '''
+    parser = argparse.ArgumentParser("Benchmark Fixture Creation Script")
+    parser.add_argument("data_dir", help="Path of the folder to create the fixture base data in (replaced if it exists)")
+    parser.add_argument("--seed",required=False,default=0,help ="fixture seed : default=0")
+    parser.add_argument("--fonts",nargs='+',required=False,default=None,help ="ttf fonts to use : default=None (matplotlib DejaVu)")
+    args = parser.parse_args()
+    LOG_INFO(f"Fixture:{createFixture(args.data_dir,seed=int(args.seed),fonts=args.fonts)}")
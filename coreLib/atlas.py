@@ -0,0 +1,303 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import json
+import unicodedata
+import string
+import numpy as np
+import PIL.Image,PIL.ImageDraw
+from tqdm import tqdm
+from .utils import LOG_INFO,stripPads,GraphemeParser
+from .fonts import listFonts,getFont,textMetrics,markPrintedComps
+from .shards import fileHash
+from . import profiling
+#--------------------
+# components
+#--------------------
+# components that join/ reorder with their neighbours are always shaped live
+JOINERS =   ['\u200d','\u200c']
+HASANT  =   '্'
+
+def atlasable(comp):
+    '''
+        a component can be drawn alone and placed by advance if it does not
+        interact with its neighbours:
+            * it does not end with a hasant (conjunct with the next component)
+            * it does not start with a combining mark (attaches to the previous component)
+            * it does not contain a zero width joiner/ non-joiner
+    '''
+    if len(comp)==0 or comp.isspace():
+        return False
+    if comp.endswith(HASANT):
+        return False
+    if unicodedata.category(comp[0]) in ["Mn","Mc"]:
+        return False
+    return not any(j in comp for j in JOINERS)
+
+_font_hashes={}
+
+def fontHash(font_path):
+    '''
+        sha256 of a font file (hashed once per process)
+    '''
+    font_hash=_font_hashes.get(font_path)
+    if font_hash is None:
+        font_hash=fileHash(font_path)
+        _font_hashes[font_path]=font_hash
+    return font_hash
+
+def atlasName(font_path,size):
+    '''
+        file name (without extension) of the atlas of a font at a size
+        (the content hash keeps different fonts with the same file name apart, i.e- bangla/fonts and english/fonts)
+    '''
+    return f"{os.path.splitext(os.path.basename(font_path))[0]}_{fontHash(font_path)[:12]}_{size}"
+
+def renderCell(font,comp):
+    '''
+        draws a component alone
+        returns:
+            uint8 cell (1 for ink) and the x of the pen origin in the cell
+    '''
+    left,_,right,bottom=textMetrics(font,comp).bbox
+    ox=max(0,-left)
+    image = PIL.Image.new(mode='L', size=(right+ox,bottom))
+    draw = PIL.ImageDraw.Draw(image)
+    draw.text(xy=(ox, 0), text=comp, fill=1, font=font)
+    return np.array(image),ox
+#--------------------
+# atlas
+#--------------------
+def buildAtlas(font_path,size,comps,save_dir):
+    '''
+        renders every (atlasable) component of a font at a size once and saves them packed
+            {name}.npy  :   uint8 buffer of the flattened cells placed one after another
+            {name}.json :   {"font","sha256","size","cells":{comp:[offset,height,width,origin x]}}
+        args:
+            font_path   :   path of the font file
+            size        :   font size
+            comps       :   the components to render
+            save_dir    :   folder to save the atlas in
+        returns:
+            path of the json index
+    '''
+    font=getFont(font_path,size)
+    cells={}
+    buffers=[]
+    offset=0
+    for comp in comps:
+        if comp in cells or not atlasable(comp):
+            continue
+        cell,ox=renderCell(font,comp)
+        h,w=cell.shape
+        cells[comp]=[offset,h,w,ox]
+        buffers.append(cell.ravel())
+        offset+=cell.size
+    buffer=np.concatenate(buffers) if len(buffers)>0 else np.zeros(0,dtype=np.uint8)
+    name=atlasName(font_path,size)
+    np.save(os.path.join(save_dir,f"{name}.npy"),buffer)
+    index_path=os.path.join(save_dir,f"{name}.json")
+    with open(index_path,"w") as f:
+        json.dump({"font":os.path.basename(font_path),"sha256":fontHash(font_path),"size":size,"cells":cells},f,ensure_ascii=False)
+    return index_path
+
+class GlyphAtlas(object):
+    def __init__(self,index_path,font_path=None,size=None):
+        '''
+            the cells of a saved atlas (see buildAtlas)
+            args:
+                index_path  :   path of the json index (the buffer is memory mapped from the .npy next to it)
+                font_path   :   the font the atlas is loaded for (None: not checked)
+                size        :   the font size the atlas is loaded for (None: not checked)
+
+            * the returned cells are read-only views of the buffer
+        '''
+        with open(index_path,"r") as f:
+            index=json.load(f)
+        if font_path is not None and index.get("sha256")!=fontHash(font_path):
+            raise ValueError(f"atlas {index_path} is built for {index['font']} not {font_path}")
+        if size is not None and index["size"]!=size:
+            raise ValueError(f"atlas {index_path} is built for size {index['size']} not {size}")
+        self.font =index["font"]
+        self.sha256=index.get("sha256")
+        self.size =index["size"]
+        self.cells=index["cells"]
+        self.buffer=np.load(f"{os.path.splitext(index_path)[0]}.npy",mmap_mode="r")
+        # (component,next component) -> the pair is composed like the live drawing (see composesLive)
+        self.pairs ={}
+
+    def get(self,comp):
+        '''
+            returns the cell of a component and the x of its pen origin or None if it is not in the atlas
+        '''
+        entry=self.cells.get(comp)
+        if entry is None:
+            return None
+        offset,h,w,ox=entry
+        return self.buffer[offset:offset+h*w].reshape(h,w),ox
+
+    def __len__(self):
+        return len(self.cells)
+#--------------------
+# registry
+#--------------------
+class state:
+    # folder of the atlases (None: everything is drawn live)
+    atlas_dir   =   None
+    # (font path,size) -> GlyphAtlas (False: no atlas for the font)
+    atlases     =   {}
+
+def useAtlas(atlas_dir):
+    '''
+        draws printed words from the atlases of a folder (built by scripts/atlas.py)
+        args:
+            atlas_dir   :   the folder (None: disable)
+    '''
+    state.atlas_dir=atlas_dir
+    state.atlases={}
+    if atlas_dir is not None:
+        LOG_INFO(f"Using atlases:{atlas_dir}")
+
+def getAtlas(font):
+    '''
+        returns the atlas of a loaded font (None if atlases are not used or the font has none)
+    '''
+    if state.atlas_dir is None:
+        return None
+    key=(font.path,font.size)
+    atlas=state.atlases.get(key)
+    if atlas is None:
+        index_path=os.path.join(state.atlas_dir,f"{atlasName(font.path,font.size)}.json")
+        atlas=GlyphAtlas(index_path,font.path,font.size) if os.path.exists(index_path) else False
+        state.atlases[key]=atlas
+    return atlas if atlas else None
+#--------------------
+# composition
+#--------------------
+def blitComps(atlas,font,comps,size):
+    '''
+        composes a text from atlas cells, every component is placed at the advance of the text before it
+        (the advance of the prefix keeps the kerning of the live drawn text)
+        args:
+            atlas   :   the GlyphAtlas of the font
+            font    :   the font of the atlas
+            comps   :   components of the text (whitespace components only advance)
+            size    :   (width,height) of the canvas
+        returns:
+            marked image where the ink of comps[i] is i+1 or None if a component has to be drawn live
+
+        * a pixel inked by overlapping cells belongs to the first of them (as in markPrintedComps)
+    '''
+    cells=[]
+    for comp in comps:
+        if comp.isspace():
+            cells.append(None)
+            continue
+        cell=atlas.get(comp)
+        if cell is None:
+            profiling.count("atlas_miss")
+            return None
+        cells.append(cell)
+    profiling.count("atlas_hit")
+    width,height=size
+    img=np.zeros((height,width),dtype=np.int64)
+    prefix=''
+    for idx,(comp,cell) in enumerate(zip(comps,cells)):
+        if cell is not None:
+            cell,ox=cell
+            x=int(round(textMetrics(font,prefix).advance))-ox
+            h,w=cell.shape
+            h=min(h,height)
+            x0,x1=max(x,0),min(x+w,width)
+            if x1>x0:
+                region=img[:h,x0:x1]
+                region[(cell[:h,x0-x:x1-x]>0)&(region==0)]=idx+1
+        prefix+=comp
+    return img
+
+def composesLive(atlas,font,comps):
+    '''
+        checks that the atlas marks a text exactly like the live drawing (see markPrintedComps),
+        the verdicts of the adjacent component pairs are cached in the atlas
+        args:
+            atlas   :   the GlyphAtlas of the font
+            font    :   the font of the atlas
+            comps   :   components of the text
+    '''
+    pairs=list(zip(comps[:-1],comps[1:])) if len(comps)>1 else [tuple(comps)]
+    for pair in pairs:
+        verdict=atlas.pairs.get(pair)
+        if verdict is None:
+            _,_,width,height=textMetrics(font,"".join(pair)).bbox
+            img=blitComps(atlas,font,list(pair),(width,height))
+            verdict=img is not None and np.array_equal(stripPads(img,0),markPrintedComps(list(pair),font))
+            atlas.pairs[pair]=verdict
+        if not verdict:
+            profiling.count("atlas_mismatch")
+            return False
+    return True
+
+def markComps(comps,font):
+    '''
+        marks the components of a printed word (see markPrintedComps) from the atlas of the font,
+        the word is drawn live if the font has no atlas, a component is not in it or
+        a pair of components is not composed like the live drawing (see composesLive)
+    '''
+    atlas=getAtlas(font)
+    if atlas is not None:
+        _,_,width,height=textMetrics(font,"".join(comps)).bbox
+        img=blitComps(atlas,font,comps,(width,height))
+        if img is not None and composesLive(atlas,font,comps):
+            return stripPads(img,0)
+    return markPrintedComps(comps,font)
+
+def buildVocabulary(comp_sets,words=()):
+    '''
+        the components an atlas is built for
+        args:
+            comp_sets   :   lists of components (i.e- CompSet labels, dictionary graphemes)
+            words       :   lists of components of words (the modifier merged components of createPrintedWords are added)
+    '''
+    mods=['ঁ', 'ং', 'ঃ']
+    vocab=set()
+    for comps in comp_sets:
+        vocab.update(str(comp) for comp in comps)
+    for comps in words:
+        comps=[str(comp) for comp in comps]
+        for idx,comp in enumerate(comps[:-1]):
+            if comps[idx+1] in mods:
+                vocab.add(comp+comps[idx+1])
+    return sorted(comp for comp in vocab if atlasable(comp))
+
+def createAtlases(ds,save_dir,sizes):
+    '''
+        builds the atlas of every font of a dataset at every size
+        args:
+            ds          :   the dataset object
+            save_dir    :   folder to save the atlases in
+            sizes       :   font sizes to render
+        returns:
+            save_dir
+    '''
+    GP=GraphemeParser()
+    # components: the component sets, the dictionaries (as words and graphemes of the words) and printable ascii
+    comp_sets=[ds.bangla.graphemes.comps.labels,ds.bangla.numbers.comps.labels,
+               ds.english.graphemes.comps.labels,ds.english.numbers.comps.labels,
+               ds.common.symbols.comps.labels,
+               [c for c in string.printable if not c.isspace()]]
+    words=[]
+    for dict_df in [ds.bangla.dictionary,ds.english.dictionary]:
+        words+=list(dict_df.graphemes)
+        comp_sets+=[GP.word2grapheme(str(word)) for word in dict_df.word]
+    comps=buildVocabulary(comp_sets+words,words)
+    font_paths=listFonts(ds.bangla.fonts,exclude=("ANSI",))+listFonts(ds.english.fonts)
+    LOG_INFO(f"Building atlases: {len(comps)} components x {len(font_paths)} fonts x {len(sizes)} sizes")
+    for font_path in tqdm(font_paths):
+        for size in sizes:
+            buildAtlas(font_path,size,comps,save_dir)
+    return save_dir
@@ -28,6 +28,10 @@ class config:
 
     back_dim        =   1024
     
+    # marked page dtypes: identifiers / heat and link maps
+    label_dtype     =  "uint16"
+    map_dtype       =  "uint8"
+
     heatmap_ratio   =  2
     max_warp_perc   =  20
 
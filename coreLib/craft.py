@@ -9,6 +9,7 @@ from __future__ import print_function
 import numpy as np
 import cv2
 import matplotlib.pyplot as plt
+from .utils import labelBoxes
 #---------------------------------------------------------------
 def gaussian_heatmap(size=512, distanceRatio=2):
     '''
@@ -80,6 +81,47 @@ def visualize_heatmap_boxes(img,heat_map,link_map):
     plt.imshow(img)
     plt.show()
 #----------------------------------------------------------------------------
+def warpGaussian(gaussian_heatmap,M,target):
+    '''
+        warps the gaussian heatmap with M (INTER_NEAREST) and adds it to target
+        args:
+            gaussian_heatmap : the original heatmap to fit
+            M                : perspective transform (heatmap -> target)
+            target           : the map to accumulate into (modified in place)
+
+        * only the region that can receive values is warped: the bounding rectangle of the 
+          heatmap (1px expanded) mapped with M. The inverse map (as cv2 computes it) is shifted 
+          to the region, so the values are the same as warping into the whole target.
+        * singular transforms and vanishing lines that cross the target are warped in full
+    '''
+    h,w=target.shape
+    gh,gw=gaussian_heatmap.shape
+    ok,M_inv=cv2.invert(M,flags=cv2.DECOMP_LU)
+    roi=ok!=0
+    if roi and (M_inv[2,0]!=0 or M_inv[2,1]!=0):
+        # the vanishing line must not cross the target
+        denom=M_inv[2,0]*np.array([-1,w,w,-1])+M_inv[2,1]*np.array([-1,-1,h,h])+M_inv[2,2]
+        roi=np.all(denom>0) or np.all(denom<0)
+    if roi:
+        corners=M@np.array([[-1,gw,gw,-1],[-1,-1,gh,gh],[1,1,1,1]],dtype=np.float64)
+        roi=np.all(corners[2]>0) or np.all(corners[2]<0)
+    if not roi:
+        target+=cv2.warpPerspective(gaussian_heatmap,M, dsize=(w,h),flags=cv2.INTER_NEAREST).astype('float32')
+        return target
+    xs=corners[0]/corners[2]
+    ys=corners[1]/corners[2]
+    x_min,y_min=max(int(np.floor(xs.min()))-2,0),max(int(np.floor(ys.min()))-2,0)
+    x_max,y_max=min(int(np.ceil(xs.max()))+3,w),min(int(np.ceil(ys.max()))+3,h)
+    if x_max<=x_min or y_max<=y_min:
+        return target
+    # shift the inverse map to the region
+    M_roi=M_inv.copy()
+    M_roi[:,2]=M_inv[:,0]*x_min+M_inv[:,1]*y_min+M_inv[:,2]
+    target[y_min:y_max,x_min:x_max]+=cv2.warpPerspective(gaussian_heatmap,M_roi, 
+                                                         dsize=(x_max-x_min,y_max-y_min),
+                                                         flags=cv2.INTER_NEAREST|cv2.WARP_INVERSE_MAP).astype('float32')
+    return target
+#----------------------------------------------------------------------------
 def get_maps(cbox,gaussian_heatmap,heat_map,link_map,prev,idx):
     '''
         creates heat_map and link_map:
@@ -109,7 +151,7 @@ def get_maps(cbox,gaussian_heatmap,heat_map,link_map,prev,idx):
                             [cx3,cy3], 
                             [cx4,cy4]]).astype('float32')
     M_heat = cv2.getPerspectiveTransform(src=src,dst=heat_points)
-    heat_map+=cv2.warpPerspective(gaussian_heatmap,M_heat, dsize=(heat_map.shape[1],heat_map.shape[0]),flags=cv2.INTER_NEAREST).astype('float32')
+    heat_map=warpGaussian(gaussian_heatmap,M_heat,heat_map)
 
     #-------------------------------
     # link map
@@ -125,7 +167,7 @@ def get_maps(cbox,gaussian_heatmap,heat_map,link_map,prev,idx):
             lx1,lx4,ly1,ly4=prev[idx-1]
             link_points = np.array([[lx1,ly1], [lx2,ly2], [lx3,ly3], [lx4,ly4]]).astype('float32')
             M_link = cv2.getPerspectiveTransform(src=src,dst=link_points)
-            link_map+=cv2.warpPerspective(gaussian_heatmap,M_link, dsize=(link_map.shape[1],link_map.shape[0]),flags=cv2.INTER_NEAREST).astype('float32')
+            link_map=warpGaussian(gaussian_heatmap,M_link,link_map)
 
     return heat_map,link_map,prev
 
@@ -144,19 +186,17 @@ def get_maps_from_masked_images(img,gmap):
     # heat mask
     hmap=np.zeros(img.shape)
 
-    vals=[v for v in np.unique(img) if v>0]
-    num_char=len(vals)
+    boxes=labelBoxes(img)
+    num_char=len(boxes)
     # maps
     if num_char>1:
         prev=[[] for _ in range(num_char)]
     else:
         prev=None
     
-    for cidx,v in enumerate(vals):
-        if v>0:
-            idx = np.where(img==v)
-            y_min,y_max,x_min,x_max = np.min(idx[0]), np.max(idx[0]), np.min(idx[1]), np.max(idx[1])
-            hmap,lmap,prev=get_maps([x_min,y_min,x_max,y_max],gmap,hmap,lmap,prev,cidx)
+    for cidx,v in enumerate(sorted(boxes.keys())):
+        y_min,y_max,x_min,x_max = boxes[v]
+        hmap,lmap,prev=get_maps([x_min,y_min,x_max,y_max],gmap,hmap,lmap,prev,cidx)
                         
     lmap=lmap.astype("uint8")
     hmap=hmap.astype("uint8")
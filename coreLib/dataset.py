@@ -6,19 +6,58 @@
 # imports
 #--------------------
 import os
+import random
 import pandas as pd 
 from glob import glob
 from tqdm import tqdm
 from ast import literal_eval
 from .utils import LOG_INFO
+from .config import config
+from .glyphs import GlyphStore
 tqdm.pandas()
 #--------------------
+# component sets
+#--------------------
+class CompSet(object):
+    def __init__(self,dfs):
+        '''
+            a read-only union of component dataframes, materialized once so that 
+            sampling a component is an index draw instead of a dataframe copy
+            args:
+                dfs     :   dataframes with label and img_path columns (joined in the given order)
+            attributes:
+                labels      :   label of each row
+                paths       :   image path of each row 
+                label_paths :   {label:array of image paths} (paths are kept in row order)
+        '''
+        df=pd.concat(dfs,ignore_index=True)
+        self.labels=df.label.values.copy()
+        self.paths =df.img_path.values.copy()
+        self.label_paths={label:self.paths[idxs] for label,idxs in df.groupby("label",sort=False).indices.items()}
+        # read-only views
+        self.labels.flags.writeable=False
+        self.paths.flags.writeable=False
+        for paths in self.label_paths.values():
+            paths.flags.writeable=False
+
+    def __len__(self):
+        return len(self.labels)
+
+    def sample(self,rng=random):
+        '''
+            returns the label of a random row
+        '''
+        idx=rng.randint(0,len(self.labels)-1)
+        return self.labels[idx]
+#--------------------
 # class info
 #--------------------
 class DataSet(object):
-    def __init__(self,data_dir):
+    def __init__(self,data_dir,preload_glyphs=False,glyph_cache_size=4096):
         '''
-            data_dir : the location of the data folder
+            data_dir          : the location of the data folder
+            preload_glyphs    : decode all grapheme/number/symbol bitmaps at load time
+            glyph_cache_size  : max number of glyphs to cache when not preloading
         '''
         self.data_dir=data_dir
         
@@ -69,6 +108,15 @@ class DataSet(object):
         self.english.dictionary  =self.__getDataFrame(self.english.dict_csv,is_dict=True)
         
         self.common.symbols.df   =self.__getDataFrame(self.common.symbols)
+        # component sets
+        self.bangla.graphemes.comps =CompSet([self.bangla.graphemes.df])
+        self.bangla.numbers.comps   =CompSet([self.bangla.numbers.df])
+        self.english.graphemes.comps=CompSet([self.english.graphemes.df])
+        self.english.numbers.comps  =CompSet([self.english.numbers.df])
+        self.common.symbols.comps   =CompSet([self.common.symbols.df])
+        # the "mixed" component type uses graphemes+numbers+symbols
+        self.bangla.mixed           =CompSet([self.bangla.graphemes.df,self.bangla.numbers.df,self.common.symbols.df])
+        self.english.mixed          =CompSet([self.english.graphemes.df,self.english.numbers.df,self.common.symbols.df])
         # data validity
         self.__checkDataValidity(self.bangla.graphemes,"bangla.graphemes")
         self.__checkDataValidity(self.bangla.numbers,"bangla.numbers")
@@ -82,6 +130,17 @@ class DataSet(object):
         self.__checkDataValidity(self.common.noise.random,"common.noise.random",check_dir_only=True)
         self.__checkDataValidity(self.common.noise.sign,"common.noise.sign",check_dir_only=True)
         
+        # glyphs: binarized and normalized to the component height
+        img_paths=[]
+        for obj in [self.bangla.graphemes,self.bangla.numbers,
+                    self.english.graphemes,self.english.numbers,
+                    self.common.symbols]:
+            img_paths+=list(obj.df.img_path)
+        self.glyphs=GlyphStore(img_paths,
+                               height=config.comp_dim,
+                               preload=preload_glyphs,
+                               cache_size=glyph_cache_size)
+        
         
         
         
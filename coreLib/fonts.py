@@ -0,0 +1,142 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+from glob import glob
+from collections import namedtuple
+import numpy as np
+import PIL.Image,PIL.ImageDraw,PIL.ImageFont
+from .utils import LRUCache,stripPads
+from . import profiling
+#--------------------
+# font registry
+#--------------------
+FONT_CACHE_SIZE=64
+
+_font_dirs={}
+_fonts=LRUCache(FONT_CACHE_SIZE)
+
+def listFonts(font_dir,exclude=()):
+    '''
+        lists the font paths of a directory (scanned once per process)
+        args:
+            font_dir    :   the directory that holds the fonts
+            exclude     :   font paths that contain any of these are skipped (i.e- "ANSI","Lohit")
+        returns:
+            list of font paths in glob order
+    '''
+    key=(font_dir,tuple(exclude))
+    font_paths=_font_dirs.get(key)
+    if font_paths is None:
+        font_paths=[font_path for font_path in glob(os.path.join(font_dir,"*.*"))
+                    if not any(ex in font_path for ex in exclude)]
+        _font_dirs[key]=font_paths
+    return font_paths
+
+def getFont(font_path,size):
+    '''
+        returns a loaded truetype font, fonts are cached by (path,size) under a bounded LRU
+        args:
+            font_path   :   path of the font file
+            size        :   font size
+    '''
+    key=(font_path,size)
+    font=_fonts.get(key)
+    if font is None:
+        font=PIL.ImageFont.truetype(font_path, size=size)
+        _fonts.put(key,font)
+    return font
+
+#--------------------
+# text metrics
+#--------------------
+METRICS_CACHE_SIZE=65536
+
+# bbox    :   (left,top,right,bottom) of the drawn text (font.getbbox)
+# size    :   (width,height) of the canvas the text is drawn on (the ink left of the origin widens it)
+# advance :   horizontal advance of the text (font.getlength)
+# offset  :   (x,y) offset of the ink from the drawing origin
+TextMetrics=namedtuple("TextMetrics",["bbox","size","advance","offset"])
+
+_metrics=LRUCache(METRICS_CACHE_SIZE)
+
+def textMetrics(font,text):
+    '''
+        returns the TextMetrics of a text drawn with a font, cached by (font path,size,text) under a bounded LRU
+        (the same words and prefixes are measured over and over while building words and lines)
+        args:
+            font    :   a truetype font (see getFont)
+            text    :   the string to measure
+    '''
+    key=(font.path,font.size,text)
+    metrics=_metrics.get(key)
+    if metrics is not None:
+        profiling.count("metrics_cache_hit")
+        return metrics
+    profiling.count("metrics_cache_miss")
+    bbox=font.getbbox(text)
+    left,_,right,bottom=bbox
+    size=(right-min(0,left),bottom)
+    metrics=TextMetrics(bbox,size,font.getlength(text),bbox[:2])
+    _metrics.put(key,metrics)
+    return metrics
+
+INK_CACHE_SIZE=1024
+
+_inks=LRUCache(INK_CACHE_SIZE)
+
+def textInk(font,text):
+    '''
+        returns the uint8 ink (1 for ink) of a text drawn at the origin on a (right,bottom) canvas of its bbox,
+        cached by (font path,size,text) under a bounded LRU (the prefixes of the words repeat)
+        args:
+            font    :   a truetype font (see getFont)
+            text    :   the string to draw
+    '''
+    key=(font.path,font.size,text)
+    ink=_inks.get(key)
+    if ink is not None:
+        profiling.count("ink_cache_hit")
+        return ink
+    profiling.count("ink_cache_miss")
+    _,_,width,height=textMetrics(font,text).bbox
+    image = PIL.Image.new(mode='L', size=(width,height))
+    draw = PIL.ImageDraw.Draw(image)
+    draw.text(xy=(0, 0), text=text, fill=1, font=font)
+    ink=np.array(image)
+    ink.flags.writeable=False
+    _inks.put(key,ink)
+    return ink
+
+def markPrintedComps(comps,font):
+    '''
+        rasterizes the prefixes of a printed word and marks its components
+        args:
+            comps   :   list of components of the word
+            font    :   the font to draw with
+        returns:
+            marked image (pads stripped) where the pixels of comps[i] are i+1
+
+        * a pixel of the word belongs to the first prefix that inks it (overhangs and kerned
+          glyphs keep their own component), the prefix inks are cached (see textInk)
+    '''
+    prefixes=[]
+    prefix=''
+    for comp in comps:
+        prefix+=comp
+        prefixes.append(prefix)
+    ink=textInk(font,prefixes[-1])
+    height,width=ink.shape
+    img=np.zeros((height,width),dtype=np.int64)
+    # last to first: the first prefix that inks a pixel labels it
+    for idx in range(len(comps)-2,-1,-1):
+        prefix=textInk(font,prefixes[idx])
+        h,w=min(prefix.shape[0],height),min(prefix.shape[1],width)
+        img[:h,:w][prefix[:h,:w]>0]=idx+1
+    img[(ink>0)&(img==0)]=len(comps)
+    img[ink==0]=0
+    return stripPads(img,0)
@@ -8,10 +8,13 @@
 import cv2
 import numpy as np
 from .craft import get_maps
+from .utils import labelBoxes
+from .profiling import timed
 #--------------------
 # format
 #--------------------
 
+@timed("totaltext")
 def TotalText(page,labels):
     '''
         **_label_mask:polygon
@@ -37,6 +40,10 @@ def TotalText(page,labels):
     word_mask=np.zeros(page.shape)
     # char mask
     char_mask=np.zeros(page.shape)
+    chars=[k for line_labels in labels for label in line_labels for k,v in label.items() if v!=' ']
+    char_mask[np.isin(page,chars)]=255
+    # char boxes
+    boxes=labelBoxes(page)
     
     for line_labels in labels:
         for label in line_labels:
@@ -50,12 +57,8 @@ def TotalText(page,labels):
             
             for k,v in label.items():
                 if v!=' ':
-
-                    char_mask[page==k]=255
                     transcriptions+=v
-                    idx = np.where(page==k)
-                    
-                    y_min,y_max,x_min,x_max = np.min(idx[0]), np.max(idx[0]), np.min(idx[1]), np.max(idx[1])
+                    y_min,y_max,x_min,x_max = boxes[k]
                     _ymins.append(y_min)
                     _ymaxs.append(y_max)
                     _xmins.append(x_min)
@@ -97,6 +100,7 @@ def TotalText(page,labels):
 #--------------------
 # linetext-format
 #--------------------
+@timed("linetext")
 def lineText(page,labels,heatmap):
     '''
         @author
@@ -112,6 +116,8 @@ def lineText(page,labels,heatmap):
     link_mask=np.zeros(page.shape)
     # heat mask
     heat_mask=np.zeros(page.shape)
+    # char boxes
+    boxes=labelBoxes(page)
     for line_labels in labels:
         for label in line_labels:
             num_char=len(label.keys())
@@ -121,8 +127,7 @@ def lineText(page,labels,heatmap):
                 prev=None
             for cidx,(k,v) in enumerate(label.items()):
                 if v!=' ':
-                    idx = np.where(page==k)
-                    y_min,y_max,x_min,x_max = np.min(idx[0]), np.max(idx[0]), np.min(idx[1]), np.max(idx[1])
+                    y_min,y_max,x_min,x_max = boxes[k]
                     heat_mask,link_mask,prev=get_maps(  [x_min,y_min,x_max,y_max],
                                                         heatmap,
                                                         heat_mask,
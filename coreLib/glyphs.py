@@ -0,0 +1,100 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import cv2
+import numpy as np
+from tqdm import tqdm
+from .utils import LOG_INFO,LRUCache
+from .profiling import count
+#--------------------
+# glyphs
+#--------------------
+def readGlyph(img_path,height=None):
+    '''
+        reads a component bitmap as a binary glyph
+        args:
+            img_path    :   path of the component bitmap
+            height      :   height to normalize the glyph to (None keeps the bitmap size)
+        returns:
+            uint8 glyph with 1 for ink and 0 for background
+    '''
+    img=cv2.imread(img_path,0)
+    if height is not None:
+        h,w=img.shape 
+        width= int(height* w/h) 
+        img=cv2.resize(img,(width,height),fx=0,fy=0, interpolation = cv2.INTER_NEAREST)
+    glyph=np.zeros(img.shape,dtype=np.uint8)
+    glyph[img<255]=1
+    return glyph
+
+
+class GlyphStore(object):
+    def __init__(self,img_paths,height=None,preload=False,cache_size=4096):
+        '''
+            keeps decoded component glyphs in memory so that a bitmap is read from disk once
+            args:
+                img_paths   :   the component bitmap paths that the store serves
+                height      :   height to normalize the glyphs to (None keeps the bitmap size)
+                preload     :   decode all the glyphs at load time into a single packed buffer
+                cache_size  :   max number of glyphs to keep when not preloaded (LRU)
+
+            * the returned glyphs are read-only, copy them before modifying
+        '''
+        self.height=height
+        self.preload=preload
+        if preload:
+            self.__pack(img_paths)
+        else:
+            self.cache=LRUCache(cache_size)
+
+    def __pack(self,img_paths):
+        '''
+            decodes all the glyphs into one uint8 buffer
+                buffer  :   flattened glyphs placed one after another
+                offsets :   start of each glyph in the buffer
+                shapes  :   (height,width) of each glyph
+                index   :   {img_path:glyph number}
+        '''
+        LOG_INFO(f"Preloading {len(img_paths)} glyphs")
+        self.index={}
+        shapes=[]
+        glyphs=[]
+        for img_path in tqdm(img_paths):
+            if img_path in self.index:
+                continue
+            glyph=readGlyph(img_path,self.height)
+            self.index[img_path]=len(glyphs)
+            shapes.append(glyph.shape)
+            glyphs.append(glyph.ravel())
+        self.shapes =np.array(shapes,dtype=np.int32).reshape(-1,2)
+        self.offsets=np.zeros(len(glyphs)+1,dtype=np.int64)
+        self.offsets[1:]=np.cumsum(self.shapes[:,0]*self.shapes[:,1])
+        self.buffer =np.concatenate(glyphs) if len(glyphs)>0 else np.zeros(0,dtype=np.uint8)
+        self.buffer.flags.writeable=False
+        LOG_INFO(f"Glyph buffer size:{self.buffer.nbytes/(1024*1024):.2f} MB")
+
+    def get(self,img_path):
+        '''
+            returns the binary glyph of a component bitmap
+        '''
+        if self.preload:
+            idx=self.index.get(img_path)
+            if idx is not None:
+                h,w=self.shapes[idx]
+                start=self.offsets[idx]
+                return self.buffer[start:start+h*w].reshape(h,w)
+            # not a packed path
+            return readGlyph(img_path,self.height)
+        glyph=self.cache.get(img_path)
+        if glyph is None:
+            count("glyph_cache_miss")
+            glyph=readGlyph(img_path,self.height)
+            glyph.flags.writeable=False
+            self.cache.put(img_path,glyph)
+        else:
+            count("glyph_cache_hit")
+        return glyph
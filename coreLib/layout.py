@@ -0,0 +1,134 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import random
+import numpy as np
+from .config import config
+from .profiling import timed
+#--------------------
+# helpers
+#--------------------
+def nearestIndex(src,dst):
+    '''
+        source index of every destination pixel of a cv2.INTER_NEAREST resize along an axis
+        args:
+            src :   source length
+            dst :   destination length
+    '''
+    scale=1./(dst/src)
+    return np.minimum(np.floor(np.arange(dst)*scale).astype(np.int64),src-1)
+
+#--------------------
+# layout
+#--------------------
+class PageLayout(object):
+    def __init__(self,dim=None,rng=random):
+        '''
+            places the words of a page and renders them on a single canvas
+            args:
+                dim :   the page dimension (default:config.back_dim)
+                rng :   the random generator
+
+            * the placement is the same as concatenating the words/lines, padding and resizing them:
+                * words of a line are scaled to the max height of the line
+                * a line wider than the page is shrunk and then padded left/right
+                * lines are stacked with a random vertical space
+                * a page taller than dim is shrunk and then padded left/right, otherwise padded top/bottom
+            * the random draws happen in the same order as well
+        '''
+        self.dim=dim if dim is not None else config.back_dim
+        self.rng=rng
+        self.lines=[]
+
+    @timed("line")
+    def addLine(self,words):
+        '''
+            places a line
+            args:
+                words   :   list of words where a word is a tuple of equally shaped layers
+                            i.e- (img,) or (img,hmap,lmap)
+        '''
+        # reform: words are scaled to the max height
+        max_h=max(word[0].shape[0] for word in words)
+        parts=[]
+        x=0
+        for word in words:
+            h,w=word[0].shape
+            width= int(max_h* w/h)
+            parts.append((word,x,nearestIndex(h,max_h),nearestIndex(w,width)))
+            x+=width
+        h,w=max_h,x
+        # fix the line width
+        if w>self.dim:
+            width=self.dim-self.rng.randint(0,300)
+            height= int(width* h/w)
+            rows,cols=nearestIndex(h,height),nearestIndex(w,width)
+            h,w=height,width
+        else:
+            rows,cols=np.arange(h),np.arange(w)
+        left=self.rng.randint(0,(self.dim-w))
+        self.lines.append((parts,rows,cols,left))
+
+    @timed("page")
+    def render(self):
+        '''
+            renders the placed lines
+            returns:
+                list of canvases (dim x dim), one for each layer of the words
+        '''
+        dim=self.dim
+        # vertical spaces
+        tops=[]
+        y=0
+        for _,rows,_,_ in self.lines:
+            tops.append(y)
+            y+=len(rows)+self.rng.randint(config.vert_min_space,config.vert_max_space)
+        h=y
+        # page rows/cols (-1:pad)
+        page_rows=np.full(dim,-1,dtype=np.int64)
+        page_cols=np.full(dim,-1,dtype=np.int64)
+        if h>dim:
+            width= int(dim* dim/h)
+            left=self.rng.randint(0,(dim-width))
+            page_rows[:]=nearestIndex(h,dim)
+            page_cols[left:left+width]=nearestIndex(dim,width)
+        else:
+            _type=self.rng.choice(["top","bottom","middle"])
+            if _type=="top":
+                top=0
+            elif _type=="bottom":
+                top=dim-h
+            else:
+                top=(dim-h)//2
+            page_rows[top:top+h]=np.arange(h)
+            page_cols[:]=np.arange(dim)
+        # canvas
+        num_layers=len(self.lines[0][0][0][0])
+        canvases=[]
+        for k in range(num_layers):
+            dtype=np.result_type(*[word[k] for parts,_,_,_ in self.lines for word,_,_,_ in parts])
+            canvases.append(np.zeros((dim,dim),dtype=dtype))
+        # blit
+        for (parts,rows,cols,left),top in zip(self.lines,tops):
+            # canvas rows of the line
+            crows=np.nonzero((page_rows>=top)&(page_rows<top+len(rows)))[0]
+            if len(crows)==0:
+                continue
+            line_rows=rows[page_rows[crows]-top]
+            # canvas cols of the line
+            pos=page_cols-left
+            ccols=np.nonzero((page_cols>=0)&(pos>=0)&(pos<len(cols)))[0]
+            line_cols=cols[pos[ccols]]
+            for word,x,wrows,wcols in parts:
+                sel=(line_cols>=x)&(line_cols<x+len(wcols))
+                if not sel.any():
+                    continue
+                wccols=ccols[sel]
+                src=np.ix_(wrows[line_rows],wcols[line_cols[sel]-x])
+                for canvas,layer in zip(canvases,word):
+                    canvas[crows[0]:crows[-1]+1,wccols[0]:wccols[-1]+1]=layer[src]
+        return canvases
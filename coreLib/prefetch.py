@@ -0,0 +1,92 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import queue
+import threading
+#--------------------
+# prefetch
+#--------------------
+class Prefetcher(object):
+    def __init__(self,iterable,depth=4):
+        '''
+            iterates over an iterable in a daemon thread and keeps a bounded queue of ready items
+            args:
+                iterable    :   the source (i.e- backgroundGenerator)
+                depth       :   max number of ready items to keep
+            attributes:
+                hits        :   number of items that were ready when asked for
+                misses      :   number of times the consumer had to wait
+
+            * an exception raised by the source is raised again by next() in the consumer
+            * the source runs in another thread: if it uses the global random module
+              its draws interleave with the consumer's draws
+        '''
+        self.depth   =   depth
+        self.hits    =   0
+        self.misses  =   0
+        self.queue   =   queue.Queue(maxsize=depth)
+        self.__done  =   None
+        self.__stop  =   threading.Event()
+        self.thread  =   threading.Thread(target=self.__fill,args=(iter(iterable),),daemon=True)
+        self.thread.start()
+
+    def __put(self,item):
+        '''
+            puts an item in the queue unless the prefetcher is closed
+        '''
+        while not self.__stop.is_set():
+            try:
+                self.queue.put(item,timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __fill(self,iterator):
+        try:
+            for item in iterator:
+                if not self.__put(("item",item)):
+                    return
+            self.__put(("end",None))
+        except Exception as e:
+            self.__put(("error",e))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.__done is not None:
+            kind,item=self.__done
+        else:
+            try:
+                kind,item=self.queue.get_nowait()
+                self.hits+=1
+            except queue.Empty:
+                self.misses+=1
+                kind,item=self.queue.get()
+        if kind=="item":
+            return item
+        self.__done=(kind,item)
+        if kind=="error":
+            raise item
+        raise StopIteration
+
+    def close(self):
+        '''
+            stops the prefetch thread
+        '''
+        self.__stop.set()
+
+    def stats(self):
+        '''
+            returns the hit/miss counters
+        '''
+        total=self.hits+self.misses
+        return {"depth":self.depth,
+                "hits":self.hits,
+                "misses":self.misses,
+                "hit_rate":self.hits/total if total>0 else 0.0}
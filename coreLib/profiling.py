@@ -0,0 +1,189 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import json
+import time
+import threading
+import functools
+import numpy as np
+
+from .utils import LOG_INFO
+#--------------------
+# state
+#--------------------
+class state:
+    # nothing is recorded unless enabled
+    enabled =   False
+    # stage name -> list of durations (seconds)
+    times   =   {}
+    # counter name -> value
+    counts  =   {}
+    # chrome trace events (None: not tracing)
+    events  =   None
+
+#--------------------
+# recording
+#--------------------
+class _Null(object):
+    '''
+        the timer of a disabled profiler
+    '''
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        return False
+
+_NULL=_Null()
+_lock=threading.Lock()
+
+class _Timer(object):
+    def __init__(self,name):
+        self.name=name
+
+    def __enter__(self):
+        self.start=time.perf_counter()
+        return self
+
+    def __exit__(self,*exc):
+        end=time.perf_counter()
+        record(self.name,self.start,end)
+        return False
+
+def record(name,start,end):
+    '''
+        records a stage that ran from start to end (perf_counter seconds)
+    '''
+    # list.append/dict.setdefault are atomic: safe from the writer threads
+    state.times.setdefault(name,[]).append(end-start)
+    if state.events is not None:
+        state.events.append({"name":name,
+                             "ph":"X",
+                             "ts":start*1e6,
+                             "dur":(end-start)*1e6,
+                             "pid":os.getpid(),
+                             "tid":threading.get_ident()})
+
+def timer(name):
+    '''
+        context manager that times a stage
+        i.e- with timer("imwrite"): cv2.imwrite(path,img)
+    '''
+    if not state.enabled:
+        return _NULL
+    return _Timer(name)
+
+def timed(name):
+    '''
+        decorator that times every call of a function as a stage
+        (disabled: a single flag check per call)
+    '''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args,**kwargs):
+            if not state.enabled:
+                return func(*args,**kwargs)
+            start=time.perf_counter()
+            try:
+                return func(*args,**kwargs)
+            finally:
+                record(name,start,time.perf_counter())
+        return wrapper
+    return decorator
+
+def count(name,value=1):
+    '''
+        increments a counter
+    '''
+    if state.enabled:
+        with _lock:
+            state.counts[name]=state.counts.get(name,0)+value
+
+#--------------------
+# control
+#--------------------
+def enable(trace=False):
+    '''
+        starts recording (clears what was recorded)
+        args:
+            trace   :   keep every timed call as a chrome trace event (see dumpTrace)
+    '''
+    reset()
+    state.events=[] if trace else None
+    state.enabled=True
+
+def disable():
+    state.enabled=False
+
+def reset():
+    state.times ={}
+    state.counts={}
+    if state.events is not None:
+        state.events=[]
+
+def collect():
+    '''
+        returns what was recorded since the last collect() and clears it
+        (picklable: worker processes return it to be merged by the main process)
+    '''
+    snap={"times":state.times,"counts":state.counts,"events":state.events}
+    reset()
+    return snap
+
+def merge(snap):
+    '''
+        adds a collect() result (i.e- of a worker process) to the records
+    '''
+    if snap is None:
+        return
+    for name,times in snap["times"].items():
+        state.times.setdefault(name,[]).extend(times)
+    for name,value in snap["counts"].items():
+        state.counts[name]=state.counts.get(name,0)+value
+    if state.events is not None and snap["events"]:
+        state.events.extend(snap["events"])
+
+#--------------------
+# report
+#--------------------
+def summary():
+    '''
+        per stage calls, p50/p95/mean/total ms and the counters
+    '''
+    stages={}
+    for name,times in state.times.items():
+        ms=np.array(times)*1000
+        stages[name]={"calls":len(ms),
+                      "p50_ms":float(np.percentile(ms,50)),
+                      "p95_ms":float(np.percentile(ms,95)),
+                      "mean_ms":float(ms.mean()),
+                      "total_ms":float(ms.sum())}
+    return {"stages":stages,"counts":dict(state.counts)}
+
+def report():
+    '''
+        logs the summary (stages sorted by total time)
+    '''
+    res=summary()
+    LOG_INFO(f"{'stage':<16}{'calls':>8}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+    for name,val in sorted(res["stages"].items(),key=lambda x:-x[1]["total_ms"]):
+        LOG_INFO(f"{name:<16}{val['calls']:>8}{val['p50_ms']:>10.2f}{val['p95_ms']:>10.2f}{val['total_ms']/1000:>10.2f}")
+    for name,value in sorted(res["counts"].items()):
+        LOG_INFO(f"{name:<16}{value:>8}")
+    return res
+
+def dumpTrace(path):
+    '''
+        saves the summary and the trace events as json
+        (chrome trace format: open in chrome://tracing or https://ui.perfetto.dev)
+    '''
+    with open(path,"w") as f:
+        json.dump({"traceEvents":state.events if state.events is not None else [],
+                   "displayTimeUnit":"ms",
+                   "summary":summary()},f)
+    return path
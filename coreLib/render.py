@@ -7,6 +7,8 @@
 #--------------------
 import random
 import os
+import tempfile
+import hashlib
 import cv2
 import numpy as np
 
@@ -14,185 +16,196 @@ from glob import glob
 from tqdm import tqdm
 from .config import config
 from .word import create_word
-from .utils import randColor
+from .layout import PageLayout
+from .prefetch import Prefetcher
+from .utils import randColor,sampleRandom,LOG_INFO
+from .profiling import timed
 
-#--------------------
-# helpers
-#--------------------
-def padPage(img):
-    '''
-        pads a page image to proper dimensions
-    '''
-    h,w=img.shape 
-    if h>config.back_dim:
-        # resize height
-        height=config.back_dim
-        width= int(height* w/h) 
-        img=cv2.resize(img,(width,height),fx=0,fy=0, interpolation = cv2.INTER_NEAREST)
-        # pad width
-        # mandatory check
-        h,w=img.shape 
-        # pad widths
-        left_pad_width =random.randint(0,(config.back_dim-w))
-        right_pad_width=config.back_dim-w-left_pad_width
-        # pads
-        left_pad =np.zeros((h,left_pad_width))
-        right_pad=np.zeros((h,right_pad_width))
-        # pad
-        img =np.concatenate([left_pad,img,right_pad],axis=1)
-    else:
-        _type=random.choice(["top","bottom","middle"])
-        if _type in ["top","bottom"]:
-            pad_height=config.back_dim-h
-            pad     =np.zeros((pad_height,config.back_dim))
-            if _type=="top":
-                img=np.concatenate([img,pad],axis=0)
-            else:
-                img=np.concatenate([pad,img],axis=0)
-        else:
-            # pad heights
-            top_pad_height =(config.back_dim-h)//2
-            bot_pad_height=config.back_dim-h-top_pad_height
-            # pads
-            top_pad =np.zeros((top_pad_height,w))
-            bot_pad=np.zeros((bot_pad_height,w))
-            # pad
-            img =np.concatenate([top_pad,img,bot_pad],axis=0)
-    # for error avoidance
-    img=cv2.resize(img,(config.back_dim,config.back_dim),fx=0,fy=0, interpolation = cv2.INTER_NEAREST)
-    return img
+#------------------------
+# background
+#------------------------
+
+def cacheDirs(ds):
+    '''
+        the folders a background cache is looked for in (in order):
+            common/background_cache of the data
+            the user cache ($XDG_CACHE_HOME or ~/.cache)/synthdata/backgrounds/{hash of the background folder}
+            the temporary folder/synthdata/backgrounds/{hash of the background folder}
+    '''
+    key=hashlib.md5(os.path.abspath(ds.common.background).encode("utf-8")).hexdigest()[:16]
+    user_cache=os.environ.get("XDG_CACHE_HOME",os.path.join(os.path.expanduser("~"),".cache"))
+    return [os.path.join(os.path.dirname(os.path.normpath(ds.common.background)),"background_cache"),
+            os.path.join(user_cache,"synthdata","backgrounds",key),
+            os.path.join(tempfile.gettempdir(),"synthdata","backgrounds",key)]
 
+def writableDir(path):
+    '''
+        creates a folder if needed and returns whether files can be written in it
+    '''
+    try:
+        os.makedirs(path,exist_ok=True)
+    except OSError:
+        return False
+    return os.access(path,os.W_OK)
 
-def processLine(img):
+def backgroundPool(ds,dim=(1024,1024),cache_dir=None):
     '''
-        fixes a line image 
+        decodes and resizes every background once and caches them on disk
         args:
-            img        :  concatenated line images
-    '''
-    h,w=img.shape 
-    if w>config.back_dim:
-        width=config.back_dim-random.randint(0,300)
-        # resize
-        height= int(width* h/w) 
-        img=cv2.resize(img,(width,height),fx=0,fy=0, interpolation = cv2.INTER_NEAREST)
-    # mandatory check
-    h,w=img.shape 
-    # pad widths
-    left_pad_width =random.randint(0,(config.back_dim-w))
-    right_pad_width=config.back_dim-w-left_pad_width
-    # pads
-    left_pad =np.zeros((h,left_pad_width),dtype=np.int64)
-    right_pad=np.zeros((h,right_pad_width),dtype=np.int64)
-    # pad
-    img =np.concatenate([left_pad,img,right_pad],axis=1)
-    return img 
+            ds        : dataset object
+            dim       : the dimension for background
+            cache_dir : the folder to keep the cache in
+                        (default: common/background_cache, a user/temporary cache folder if the data is not writable)
+        returns:
+            read-only memory mapped uint8 array of shape (num_backgrounds,h,w,3) (glob order)
 
+        * the cache is keyed by the modification time of the background folder and dim,
+          the stale caches of the same dim are deleted when a new one is built
+    '''
+    # collect image paths
+    _paths=[img_path for img_path in glob(os.path.join(ds.common.background,"*.*"))]
+    w,h=dim
+    mtime=os.stat(ds.common.background).st_mtime_ns
+    cache_name=f"backgrounds_{w}x{h}_{len(_paths)}_{mtime}.npy"
+    if cache_dir is None:
+        dirs=cacheDirs(ds)
+        # an existing cache is used even from a read-only folder
+        for _dir in dirs:
+            if os.path.exists(os.path.join(_dir,cache_name)):
+                return np.load(os.path.join(_dir,cache_name),mmap_mode="r")
+        cache_dir=next((_dir for _dir in dirs if writableDir(_dir)),None)
+        if cache_dir is None:
+            raise OSError(f"No writable background cache folder:{dirs}")
+    else:
+        os.makedirs(cache_dir,exist_ok=True)
+    cache_path=os.path.join(cache_dir,cache_name)
+    if not os.path.exists(cache_path):
+        LOG_INFO(f"Caching backgrounds:{cache_path}")
+        # write to a temporary file and move it in place (concurrent builders are safe)
+        tmp_path=f"{cache_path}.{os.getpid()}.tmp"
+        pool=np.lib.format.open_memmap(tmp_path,mode="w+",dtype=np.uint8,shape=(len(_paths),h,w,3))
+        for idx,img_path in enumerate(tqdm(_paths)):
+            img=cv2.imread(img_path)
+            pool[idx]=cv2.resize(img,dim)
+        pool.flush()
+        del pool
+        os.replace(tmp_path,cache_path)
+        # stale caches (other background counts/ modification times)
+        for stale_path in glob(os.path.join(cache_dir,f"backgrounds_{w}x{h}_*.npy")):
+            if stale_path!=cache_path:
+                try:
+                    os.remove(stale_path)
+                except OSError:
+                    pass
+    return np.load(cache_path,mmap_mode="r")
 
-#------------------------
-# background
-#------------------------
-
-def backgroundGenerator(ds,dim=(1024,1024)):
+def backgroundGenerator(ds,dim=(1024,1024),cache_dir=None,prefetch=0):
     '''
         generates random background
         args:
-            ds   : dataset object
+            ds        : dataset object
+            dim       : the dimension for background
+            cache_dir : the folder to keep the decoded backgrounds in (see backgroundPool)
+            prefetch  : number of backgrounds to compose ahead in a background thread (0: disabled)
+
+        * with prefetch the background draws interleave with the page draws on the global random module:
+          use sampleBackgrounds for reproducible backgrounds
+    '''
+    pool=backgroundPool(ds,dim=dim,cache_dir=cache_dir)
+    if prefetch>0:
+        return Prefetcher(composeBackgrounds(pool,dim),depth=prefetch)
+    return composeBackgrounds(pool,dim)
+
+@timed("background")
+def randomBackground(pool,dim,rng=random):
+    '''
+        creates a random single/double/comb background from the decoded pool
+        args:
+            pool : decoded and resized backgrounds (see backgroundPool)
             dim  : the dimension for background
+            rng  : the random generator
+    '''
+    idxs=range(len(pool))
+    _type=rng.choice(["single","double","comb"])
+    if _type=="single":
+        img=np.array(pool[rng.choice(idxs)])
+    elif _type=="double":
+        imgs=[pool[idx] for idx in rng.sample(idxs, 2)]
+        # randomly concat
+        img=np.concatenate(imgs,axis=rng.choice([0,1]))
+        img=cv2.resize(img,dim)
+    else:
+        imgs=[pool[idx] for idx in rng.sample(idxs, 4)]
+        seg1=imgs[:2]
+        seg2=imgs[2:]
+        seg1=np.concatenate(seg1,axis=0)
+        seg2=np.concatenate(seg2,axis=0)
+        img=np.concatenate([seg1,seg2],axis=1)
+        img=cv2.resize(img,dim)
+    return img
+
+def composeBackgrounds(pool,dim,rng=random):
+    '''
+        yields random backgrounds from the decoded pool
+        args:
+            pool : decoded and resized backgrounds (see backgroundPool)
+            dim  : the dimension for background
+            rng  : the random generator
     '''
-    # collect image paths
-    _paths=[img_path for img_path in tqdm(glob(os.path.join(ds.common.background,"*.*")))]
     while True:
-        _type=random.choice(["single","double","comb"])
-        if _type=="single":
-            img=cv2.imread(random.choice(_paths))
-            img=cv2.resize(img,dim)
-            yield img
-        elif _type=="double":
-            imgs=[]
-            img_paths= random.sample(_paths, 2)
-            for img_path in img_paths:
-                img=cv2.imread(img_path)
-                img=cv2.resize(img,dim)
-                imgs.append(img)
-            # randomly concat
-            img=np.concatenate(imgs,axis=random.choice([0,1]))
-            img=cv2.resize(img,dim)
-            yield img
-        else:
-            imgs=[]
-            img_paths= random.sample(_paths, 4)
-            for img_path in img_paths:
-                img=cv2.imread(img_path)
-                img=cv2.resize(img,dim)
-                imgs.append(img)
-            seg1=imgs[:2]
-            seg2=imgs[2:]
-            seg1=np.concatenate(seg1,axis=0)
-            seg2=np.concatenate(seg2,axis=0)
-            img=np.concatenate([seg1,seg2],axis=1)
-            img=cv2.resize(img,dim)
-            yield img
+        yield randomBackground(pool,dim,rng)
+
+def sampleBackgrounds(pool,dim,seed,idxs):
+    '''
+        yields the background of every sample index, drawn from sampleRandom(seed,idx,"back")
+        (the background of a sample does not depend on the other samples or their order)
+        args:
+            pool : decoded and resized backgrounds (see backgroundPool)
+            dim  : the dimension for background
+            seed : base seed of the run
+            idxs : sample indices
+    '''
+    for idx in idxs:
+        yield randomBackground(pool,dim,sampleRandom(seed,idx,"back"))
 
 #--------------------
 # page
 #--------------------
-def createSceneImage(ds,iden=3):
+def createSceneImage(ds,iden=3,rng=random):
     '''
         creates a scene image
         args:
             ds  :  the dataset object
             iden:  starting iden for marking
+            rng :  the random generator
     '''
     iden=iden
     labels=[]
-    page_parts=[]
+    layout=PageLayout(rng=rng)
     # select number of lines in an image
-    num_lines=random.randint(config.min_num_lines,config.max_num_lines)
+    num_lines=rng.randint(config.min_num_lines,config.max_num_lines)
     for _ in range(num_lines):
         line_parts=[]
         line_labels=[]
         # select number of words
-        num_words=random.randint(config.min_num_words,config.max_num_words)
+        num_words=rng.randint(config.min_num_words,config.max_num_words)
         for _ in range(num_words):
             img,label,iden=create_word( iden=iden,
                                         ds=ds,
-                                        source_type=random.choice(config.data.sources),
-                                        data_type=random.choice(config.data.formats),
-                                        comp_type=random.choice(config.data.components), 
-                                        use_dict=random.choice([True,False]))
+                                        source_type=rng.choice(config.data.sources),
+                                        data_type=rng.choice(config.data.formats),
+                                        comp_type=rng.choice(config.data.components), 
+                                        use_dict=rng.choice([True,False]),
+                                        rng=rng)
             line_labels.append(label)
             line_parts.append(img)
         
-        reformed=[]
-        max_h=0
-        # find max height
-        for line_part in line_parts:
-            max_h=max(max_h,line_part.shape[0])
-        # reform
-        for limg in line_parts:
-            h,w=limg.shape 
-            width= int(max_h* w/h) 
-            limg=cv2.resize(limg,(width,max_h),fx=0,fy=0, interpolation = cv2.INTER_NEAREST)
-            reformed.append(limg)
-
-        # create the line image
-        line_img=np.concatenate(reformed,axis=1)
-        line_img=processLine(line_img)
-        # the page lines
-        page_parts.append(line_img)
+        # place the line
+        layout.addLine([(img,) for img in line_parts])
         labels.append(line_labels)
     
-    paded_parts=[]
-    for lidx,line_img in enumerate(page_parts):
-        # pad lines 
-        pad_height=random.randint(config.vert_min_space,config.vert_max_space)
-        pad     =np.zeros((pad_height,config.back_dim))
-        line_img=np.concatenate([line_img,pad],axis=0)
-        paded_parts.append(line_img)
-
     # page img
-    page=np.concatenate(paded_parts,axis=0)
-    page=padPage(page)
+    page,=layout.render()
     
     return page,labels
 
@@ -200,31 +213,40 @@ def createSceneImage(ds,iden=3):
 #--------------------
 # data
 #--------------------
-def createImageData(backgen,page,labels):
+@timed("colorize")
+def createImageData(backgen,page,labels,rng=random):
     '''
         creates a proper image to save 
         args:
-            backgen :   background generator
+            backgen :   background generator or the background (uint8 array) of the sample
             page    :   the page image
             labels  :   the labels of the page
+            rng     :   the random generator
     '''
-    back=next(backgen)
-
+    back=backgen if isinstance(backgen,np.ndarray) else next(backgen)
+    # label to color lookup table 
+    max_iden=max([int(page.max())]+[k for line_label in labels for label in line_label for k in label.keys()])
+    lut  =np.zeros((max_iden+1,3),dtype=back.dtype)
+    paint=np.zeros(max_iden+1,dtype=bool)
     for line_label in labels:
         # random choice for color distribution
-        _colType=random.choice(["inline","different"])
+        _colType=rng.choice(["inline","different"])
         if _colType=="inline":
-            line_col=randColor()
+            line_col=randColor(rng=rng)
         else:
             line_col=None
         for label in line_label:
             # format color space
             if line_col is None:
-                col=randColor()
+                col=randColor(rng=rng)
             else:
                 col=line_col
             # place colors
             for k,v in label.items():
                 if v!=' ':
-                    back[page==k]=col
+                    lut[k]=col
+                    paint[k]=True
+    # paint
+    mask=paint[page]
+    back[mask]=lut[page[mask]]
     return back
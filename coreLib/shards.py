@@ -0,0 +1,219 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import json
+import hashlib
+import cv2
+import numpy as np
+from .profiling import timed
+#--------------------
+# globals
+#--------------------
+SHARD_FORMATS   =   ["npz","raw","tfrecord"]
+MANIFEST_NAME   =   "manifest.json"
+#--------------------
+# helpers
+#--------------------
+def fileHash(path,block_size=1<<20):
+    '''
+        sha256 of a file
+    '''
+    h=hashlib.sha256()
+    with open(path,"rb") as f:
+        for block in iter(lambda:f.read(block_size),b""):
+            h.update(block)
+    return h.hexdigest()
+
+def importTF():
+    '''
+        imports tensorflow only when a tfrecord is written
+    '''
+    try:
+        import tensorflow as tf
+    except ImportError:
+        raise ImportError("tfrecord shards need tensorflow: use --output npz/raw or install tensorflow")
+    return tf
+
+#--------------------
+# shard formats
+#--------------------
+def writeNPZ(path,samples,keys):
+    '''
+        uncompressed npz: one stacked array per key and the idens
+        (images of a key must have the same shape)
+    '''
+    arrays={"iden":np.array([iden for iden,_ in samples])}
+    for key in keys:
+        values=[data[key] for _,data in samples]
+        if isinstance(values[0],str):
+            arrays[key]=np.array(values)
+        else:
+            arrays[key]=np.stack(values)
+    with open(path,"wb") as f:
+        np.savez(f,**arrays)
+
+def writeRaw(path,samples,keys):
+    '''
+        raw bytes of the samples one after another, returns the index
+    '''
+    index=[]
+    offset=0
+    with open(path,"wb") as f:
+        for iden,data in samples:
+            entries={}
+            for key in keys:
+                value=data[key]
+                if isinstance(value,str):
+                    buf=value.encode("utf-8")
+                    entries[key]={"offset":offset,"size":len(buf),"dtype":"str"}
+                else:
+                    value=np.ascontiguousarray(value)
+                    buf=value.tobytes()
+                    entries[key]={"offset":offset,"size":len(buf),"dtype":value.dtype.str,"shape":list(value.shape)}
+                f.write(buf)
+                offset+=len(buf)
+            index.append({"iden":int(iden),"entries":entries})
+    return index
+
+def writeTFRecord(path,samples,keys):
+    '''
+        tfrecord with png encoded images (same features as scripts/store.py)
+    '''
+    tf=importTF()
+    def _bytes_feature(value):
+        return tf.train.Feature(bytes_list=tf.train.BytesList(value=[value]))
+    with tf.io.TFRecordWriter(path) as writer:
+        for _,data in samples:
+            feature={}
+            for key in keys:
+                value=data[key]
+                if isinstance(value,str):
+                    feature[key]=_bytes_feature(value.encode("utf-8"))
+                else:
+                    feature[key]=_bytes_feature(cv2.imencode(".png",value)[1].tobytes())
+            example=tf.train.Example(features=tf.train.Features(feature=feature))
+            writer.write(example.SerializeToString())
+
+#--------------------
+# shards
+#--------------------
+@timed("shard")
+def _writeShard(save_dir,name,samples,fmt="npz"):
+    '''
+        writes a shard of samples
+        args:
+            save_dir    :   folder to save the shard in
+            name        :   name of the shard (without extension)
+            samples     :   list of (iden,data) where data is {key:uint8 image or text}
+                            i.e- {"image":img,"heatmap":hmap,"linkmap":lmap}
+            fmt         :   npz/raw/tfrecord
+        returns:
+            shard info for the manifest
+
+        * files are written under a temporary name and moved in place
+    '''
+    assert fmt in SHARD_FORMATS,f"unknown shard format:{fmt}"
+    assert len(samples)>0,"empty shard"
+    keys=list(samples[0][1].keys())
+    ext={"npz":"npz","raw":"bin","tfrecord":"tfrecord"}[fmt]
+    path=os.path.join(save_dir,f"{name}.{ext}")
+    tmp_path=f"{path}.{os.getpid()}.tmp"
+    files=[path]
+    if fmt=="npz":
+        writeNPZ(tmp_path,samples,keys)
+    elif fmt=="tfrecord":
+        writeTFRecord(tmp_path,samples,keys)
+    else:
+        index=writeRaw(tmp_path,samples,keys)
+        index_path=os.path.join(save_dir,f"{name}.index.json")
+        with open(index_path,"w") as f:
+            json.dump({"keys":keys,"samples":index},f)
+        files.append(index_path)
+    os.replace(tmp_path,path)
+    return {"name":name,
+            "num_samples":len(samples),
+            "idens":[int(iden) for iden,_ in samples],
+            "files":{os.path.basename(_file):fileHash(_file) for _file in files}}
+
+def _writeManifest(save_dir,shards,fmt,**meta):
+    '''
+        writes the manifest of a sharded dataset
+        args:
+            save_dir    :   folder of the shards
+            shards      :   list of shard infos (see _writeShard)
+            fmt         :   npz/raw/tfrecord
+            meta        :   anything else to record (i.e- image dimension)
+    '''
+    shards=sorted([shard for shard in shards if shard is not None],key=lambda x:x["name"])
+    manifest={"format":fmt,
+              "num_samples":sum(shard["num_samples"] for shard in shards),
+              "num_shards":len(shards),
+              "meta":meta,
+              "shards":shards}
+    path=os.path.join(save_dir,MANIFEST_NAME)
+    with open(path,"w") as f:
+        json.dump(manifest,f,indent=2)
+    return path
+
+class ShardWriter(object):
+    def __init__(self,save_dir,fmt="npz",shard_size=128,start=0):
+        '''
+            collects samples and writes a shard every shard_size samples
+            args:
+                save_dir    :   folder to save the shards in
+                fmt         :   npz/raw/tfrecord
+                shard_size  :   number of samples per shard
+                start       :   number of the first shard (shards are named {number:05d})
+
+            * writers of worker processes write their own shards (with their own start),
+              the main process merges their shard infos and writes the manifest (see merge/close)
+        '''
+        assert fmt in SHARD_FORMATS,f"unknown shard format:{fmt}"
+        if fmt=="tfrecord":
+            importTF()
+        self.save_dir   =   save_dir
+        self.fmt        =   fmt
+        self.shard_size =   int(shard_size)
+        self.start      =   int(start)
+        self.samples    =   []
+        self.shards     =   []
+
+    def add(self,iden,data):
+        '''
+            adds a sample
+            args:
+                iden    :   identifier of the sample
+                data    :   {key:uint8 image or text} i.e- {"image":img,"heatmap":hmap,"linkmap":lmap}
+        '''
+        self.samples.append((iden,data))
+        if len(self.samples)>=self.shard_size:
+            self.flush()
+
+    def flush(self):
+        '''
+            writes the collected samples as a shard
+        '''
+        if self.samples:
+            name=f"{self.start+len(self.shards):05d}"
+            self.shards.append(_writeShard(self.save_dir,name,self.samples,self.fmt))
+            self.samples=[]
+
+    def merge(self,shards):
+        '''
+            adds shard infos written by other writers (i.e- of worker processes) to the manifest
+        '''
+        self.shards+=[shard for shard in shards if shard is not None]
+
+    def close(self,**meta):
+        '''
+            writes the last shard and the manifest (shards sorted by name)
+            args:
+                meta    :   anything else to record (i.e- image dimension)
+        '''
+        self.flush()
+        return _writeManifest(self.save_dir,self.shards,self.fmt,**meta)
@@ -0,0 +1,217 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+import random
+import itertools
+import cv2
+
+from .config import config
+from .dataset import DataSet
+from .craft import gaussian_heatmap
+from .render import backgroundPool,randomBackground
+from .rendermaps import createSceneMaps,createNoisyMaps
+from .prefetch import Prefetcher
+from .utils import sampleRandom
+#--------------------
+# helpers
+#--------------------
+def workerInfo():
+    '''
+        returns (worker_id,num_workers) of the torch DataLoader worker the code runs in
+        (0,1) outside a DataLoader worker or without torch
+
+        * torch is only looked at if it is already imported
+    '''
+    if "torch" not in sys.modules:
+        return 0,1
+    from torch.utils.data import get_worker_info
+    info=get_worker_info()
+    if info is None:
+        return 0,1
+    return info.id,info.num_workers
+
+#--------------------
+# stream
+#--------------------
+class SceneMapStream(object):
+    def __init__(self,
+                 data_dir,
+                 mode="scene",
+                 seed=None,
+                 img_dim=None,
+                 num_samples=None,
+                 buffer_size=8,
+                 preload_glyphs=False,
+                 glyph_cache_size=4096,
+                 background_cache=None,
+                 max_retries=10):
+        '''
+            iterates over (image,heatmap,linkmap) uint8 arrays generated on the fly (nothing is saved)
+            args:
+                data_dir        :   the source data folder
+                mode            :   scene (createSceneMaps) / noisy (createNoisyMaps)
+                seed            :   base random seed, sample i of epoch e is drawn from sampleRandom(f"{seed}:{e}",i)
+                                    (None: a fresh os entropy seed every iteration)
+                img_dim         :   size of the yielded arrays (None: config.back_dim)
+                num_samples     :   number of samples of an iteration split between the workers (None: infinite)
+                buffer_size     :   number of samples to generate ahead in a thread (0: no buffering)
+                preload_glyphs  :   see DataSet
+                glyph_cache_size:   see DataSet
+                background_cache:   folder to cache the decoded backgrounds in (see backgroundPool)
+                max_retries     :   number of times a failed sample is retried before the error is raised
+            attributes:
+                epoch           :   the epoch of the next iteration (see setEpoch)
+                failed_attempts :   number of attempts that raised (retried ones included, no sample is skipped)
+
+            * the resources are loaded when the first iteration starts, once per process that iterates
+              (i.e- every torch DataLoader worker loads its own and persistent workers keep them between epochs)
+            * worker w of n generates the sample indices w,w+n,w+2n.. : with a seed the samples of an epoch
+              do not depend on the number of workers
+            * a failed sample is retried with sampleRandom(f"{seed}:{e}",i,f"retry{k}") k=1..max_retries,
+              then the error is raised
+            * use torchDataset() to get a torch IterableDataset
+        '''
+        assert mode in ["scene","noisy"],"Wrong stream mode"
+        self.data_dir           =   data_dir
+        self.mode               =   mode
+        self.seed               =   seed
+        self.img_dim            =   img_dim
+        self.num_samples        =   num_samples
+        self.buffer_size        =   buffer_size
+        self.preload_glyphs     =   preload_glyphs
+        self.glyph_cache_size   =   glyph_cache_size
+        self.background_cache   =   background_cache
+        self.max_retries        =   max_retries
+        self.epoch              =   0
+        self.failed_attempts    =   0
+        # (pid,(ds,gmap,pool)) of the process that loaded them
+        self.__resources        =   None
+
+    def __getstate__(self):
+        # the resources are not sent to spawned workers: they load their own
+        state=self.__dict__.copy()
+        state["_SceneMapStream__resources"]=None
+        return state
+
+    def setEpoch(self,epoch):
+        '''
+            sets the epoch of the next iteration (a seeded stream yields the same samples for the same epoch)
+            (with a torch DataLoader call it before iterating: persistent workers keep their copy)
+        '''
+        self.epoch=int(epoch)
+
+    def __sample(self,ds,gmap,pool,key,idx):
+        '''
+            generates sample idx (a failure is retried up to max_retries times)
+        '''
+        dim=(config.back_dim,config.back_dim)
+        for attempt in range(self.max_retries+1):
+            stream=None if attempt==0 else f"retry{attempt}"
+            rng=sampleRandom(key,idx,stream)
+            try:
+                if self.mode=="scene":
+                    back=randomBackground(pool,dim,sampleRandom(key,idx,"back" if stream is None else f"back:{stream}"))
+                    return createSceneMaps(ds,gmap,back,rng=rng)
+                return createNoisyMaps(ds,gmap,rng=rng)
+            except Exception as e:
+                self.failed_attempts+=1
+                error=e
+        raise RuntimeError(f"sample {idx} failed {self.max_retries+1} times:{type(error).__name__}:{error}") from error
+
+    def __loadResources(self):
+        '''
+            returns (ds,gmap,pool), loaded once per process
+        '''
+        if self.__resources is None or self.__resources[0]!=os.getpid():
+            ds=DataSet(self.data_dir,preload_glyphs=self.preload_glyphs,glyph_cache_size=int(self.glyph_cache_size))
+            gmap=gaussian_heatmap(size=512,distanceRatio=config.heatmap_ratio)
+            pool=None
+            if self.mode=="scene":
+                pool=backgroundPool(ds,dim=(config.back_dim,config.back_dim),cache_dir=self.background_cache)
+            self.__resources=(os.getpid(),(ds,gmap,pool))
+        return self.__resources[1]
+
+    def __generate(self,ds,gmap,pool,key,idxs):
+        '''
+            yields the samples of idxs
+        '''
+        dim=self.img_dim if self.img_dim is not None else config.back_dim
+        for idx in idxs:
+            img,hmap,lmap=self.__sample(ds,gmap,pool,key,idx)
+            if img.shape[0]!=dim or img.shape[1]!=dim:
+                img =cv2.resize(img,(dim,dim))
+                hmap=cv2.resize(hmap,(dim,dim),fx=0,fy=0,interpolation=cv2.INTER_NEAREST)
+                lmap=cv2.resize(lmap,(dim,dim),fx=0,fy=0,interpolation=cv2.INTER_NEAREST)
+            yield img,hmap,lmap
+
+    def __iter__(self):
+        worker_id,num_workers=workerInfo()
+        # forked workers share the parent random state: an unseeded stream draws its own seed
+        if self.seed is None:
+            key=random.SystemRandom().randrange(2**32)
+        else:
+            key=f"{self.seed}:{self.epoch}"
+        # the sample indices of an iteration are split between the workers
+        if self.num_samples is None:
+            idxs=itertools.count(worker_id,num_workers)
+        else:
+            idxs=range(worker_id,int(self.num_samples),num_workers)
+        ds,gmap,pool=self.__loadResources()
+        samples=self.__generate(ds,gmap,pool,key,idxs)
+        if self.buffer_size<=0:
+            yield from samples
+            return
+        # the prefetch thread is stopped when the iteration ends, is closed or is garbage collected
+        samples=Prefetcher(samples,depth=self.buffer_size)
+        try:
+            yield from samples
+        finally:
+            samples.close()
+
+#--------------------
+# torch
+#--------------------
+def torchClass():
+    '''
+        creates the torch IterableDataset class of SceneMapStream (imports torch)
+    '''
+    module=sys.modules[__name__]
+    if "SceneMapDataset" not in module.__dict__:
+        from torch.utils.data import IterableDataset
+
+        class SceneMapDataset(IterableDataset):
+            def __init__(self,*args,**kwargs):
+                '''
+                    torch IterableDataset of a SceneMapStream (same args)
+                '''
+                super().__init__()
+                self.stream=SceneMapStream(*args,**kwargs)
+
+            def setEpoch(self,epoch):
+                self.stream.setEpoch(epoch)
+
+            def __iter__(self):
+                return iter(self.stream)
+
+        SceneMapDataset.__module__=__name__
+        module.SceneMapDataset=SceneMapDataset
+    return module.SceneMapDataset
+
+def torchDataset(*args,**kwargs):
+    '''
+        creates a torch IterableDataset with the args of SceneMapStream
+        i.e- torch.utils.data.DataLoader(torchDataset(data_dir,seed=42),batch_size=8,num_workers=4)
+    '''
+    return torchClass()(*args,**kwargs)
+
+def __getattr__(name):
+    # the torch class is created on first use (needed to unpickle it in spawned DataLoader workers)
+    if name=="SceneMapDataset":
+        return torchClass()
+    raise AttributeError(f"module {__name__} has no attribute {name}")
@@ -11,7 +11,9 @@ import os
 import numpy as np
 import random
 import cv2
+import scipy.ndimage as sni
 import matplotlib.pyplot as plt
+from collections import OrderedDict
 #---------------------------------------------------------------
 def LOG_INFO(msg,mcolor='blue'):
     '''
@@ -33,9 +35,52 @@ def create_dir(base,ext):
     if not os.path.exists(_path):
         os.mkdir(_path)
     return _path
+#---------------------------------------------------------------
+class LRUCache(object):
+    '''
+        a bounded least recently used cache
+    '''
+    def __init__(self,max_size):
+        '''
+            max_size    =   max number of items to keep
+        '''
+        self.max_size=max_size
+        self.data=OrderedDict()
+    
+    def get(self,key):
+        '''
+            returns the cached value of a key or None if it is not cached
+        '''
+        value=self.data.get(key)
+        if value is not None:
+            self.data.move_to_end(key)
+        return value
+
+    def put(self,key,value):
+        '''
+            caches a value and evicts the least recently used one if full
+        '''
+        self.data[key]=value
+        self.data.move_to_end(key)
+        if len(self.data)>self.max_size:
+            self.data.popitem(last=False)
 
-def random_exec(poplutation=[0,1],weights=[0.7,0.3],match=0):
-    return random.choices(population=poplutation,weights=weights,k=1)[0]==match
+    def __len__(self):
+        return len(self.data)
+#---------------------------------------------------------------
+def sampleRandom(seed,idx,stream=None):
+    '''
+        the random generator of a sample: the same (seed,idx,stream) always gives the same draws
+        args:
+            seed    =   base seed of the run
+            idx     =   index of the sample
+            stream  =   name of a separate sequence of the sample (i.e- "back" for the background)
+    '''
+    key=f"{seed}:{idx}" if stream is None else f"{seed}:{idx}:{stream}"
+    return random.Random(key)
+#---------------------------------------------------------------
+def random_exec(poplutation=[0,1],weights=[0.7,0.3],match=0,rng=random):
+    return rng.choices(population=poplutation,weights=weights,k=1)[0]==match
 #---------------------------------------------------------------
 def stripPads(arr,val):
   '''
@@ -44,14 +89,29 @@ def stripPads(arr,val):
   arr=arr[~np.all(arr == val, axis=1)]
   arr=arr[:, ~np.all(arr == val, axis=0)]
   return arr
-
+#---------------------------------------------------------------
+def labelBoxes(img):
+    '''
+        finds the bounding boxes of all the labels of a marked image in a single pass
+        args:
+            img     :   marked image (integer valued labels, 0 is background)
+        returns:
+            dictionary of {label:(y_min,y_max,x_min,x_max)} (inclusive) for the labels found in the image
+    '''
+    slices=sni.find_objects(np.asarray(img).astype(np.int64))
+    boxes={}
+    for idx,box in enumerate(slices):
+        if box is not None:
+            ys,xs=box
+            boxes[idx+1]=(ys.start,ys.stop-1,xs.start,xs.stop-1)
+    return boxes
 #---------------------------------------------------------------
 
-def randColor():
+def randColor(rng=random):
     '''
         generates random color
     '''
-    return (random.randint(0,255),random.randint(0,255),random.randint(0,255))
+    return (rng.randint(0,255),rng.randint(0,255),rng.randint(0,255))
 #---------------------------------------------------------------------------------------------------------------------
 def padDetectionImage(img,gray=False,pad_value=255):
     cfg={}
@@ -92,12 +152,33 @@ def padDetectionImage(img,gray=False,pad_value=255):
         img=img.astype("uint8")
     return img,cfg
 
-def rotate_image(mat, angle):
+def stackMaps(*layers):
+    '''
+        stacks equally shaped 2D layers (i.e- img,hmap,lmap) into a single H x W x C array
+        so that a geometric transform is a single opencv call (nearest neighbour keeps the values)
+        args:
+            layers  :   the layers (their common dtype must be supported by opencv)
+        returns:
+            stack,dtypes (see splitMaps)
+    '''
+    dtypes=[layer.dtype for layer in layers]
+    stack=np.empty(layers[0].shape[:2]+(len(layers),),dtype=np.result_type(*dtypes))
+    for idx,layer in enumerate(layers):
+        stack[...,idx]=layer
+    return stack,dtypes
+
+def splitMaps(stack,dtypes):
+    '''
+        splits a stack of stackMaps back to its layers (with their original dtypes)
+    '''
+    # opencv drops the channel axis of single channel results
+    stack=stack.reshape(stack.shape[0],stack.shape[1],-1)
+    return [stack[...,idx].astype(dtype) for idx,dtype in enumerate(dtypes)]
+
+def rotationMatrix(width,height,angle):
     """
-        Rotates an image (angle in degrees) and expands image to avoid cropping
+        returns the affine matrix (2x3) and the expanded (bound_w,bound_h) of rotate_image
     """
-
-    height, width = mat.shape[:2] # image shape has 3 dimensions
     image_center = (width/2, height/2) # getRotationMatrix2D needs coordinates in reverse order (width, height) compared to shape
 
     rotation_mat = cv2.getRotationMatrix2D(image_center, angle, 1.)
@@ -113,6 +194,15 @@ def rotate_image(mat, angle):
     # subtract old image center (bringing image back to origo) and adding the new image center coordinates
     rotation_mat[0, 2] += bound_w/2 - image_center[0]
     rotation_mat[1, 2] += bound_h/2 - image_center[1]
+    return rotation_mat,(bound_w,bound_h)
+
+def rotate_image(mat, angle):
+    """
+        Rotates an image (angle in degrees) and expands image to avoid cropping
+    """
+
+    height, width = mat.shape[:2] # image shape has 3 dimensions
+    rotation_mat,(bound_w,bound_h)=rotationMatrix(width,height,angle)
 
     # rotate image with the new bounds and translated rotation matrix
     rotated_mat = cv2.warpAffine(mat, rotation_mat, (bound_w, bound_h),flags=cv2.INTER_NEAREST)
@@ -188,7 +278,7 @@ class GraphemeParser():
 # noise
 #----------------------------------
     
-def draw_random_noise(back,page):
+def draw_random_noise(back,page,rng=random):
     '''
         draws random poly
     '''
@@ -196,35 +286,35 @@ def draw_random_noise(back,page):
     h,w,d=back.shape
     min_dim=min(h,w)
     
-    for _ in range(random.randint(1,5)):
-        ntype=random.choice([0,1])
+    for _ in range(rng.randint(1,5)):
+        ntype=rng.choice([0,1])
         
-        num_points=random.randint(min_dim//100,min_dim//5)
-        rand_idx1 = random.choice(y_idx)   #randomly choose any element in the x_idx list
+        num_points=rng.randint(min_dim//100,min_dim//5)
+        rand_idx1 = rng.choice(y_idx)   #randomly choose any element in the x_idx list
         x1 = x_idx[rand_idx1]
         y1 = y_idx[rand_idx1] 
         if ntype==0:
             for i in range(0,num_points):
                 
-                x2 = x1+random.randint(-10,10)
-                y2 = y1+random.randint(2,5)
+                x2 = x1+rng.randint(-10,10)
+                y2 = y1+rng.randint(2,5)
                 if x2>w:
                     x2=w
                 if y2>h:
                     y2=h
-                cv2.line(back,(x1,y1),(x2,y2),(0,0,0),random.randint(2,10))
+                cv2.line(back,(x1,y1),(x2,y2),(0,0,0),rng.randint(2,10))
                 x1=x2
                 y1=y2 
         else:
             for i in range(0,num_points):
                 
-                x2 = x1+random.randint(2,5)
-                y2 = y1+random.randint(-10,10)
+                x2 = x1+rng.randint(2,5)
+                y2 = y1+rng.randint(-10,10)
                 if x2>w:
                     x2=w
                 if y2>h:
                     y2=h
-                cv2.line(back,(x1,y1),(x2,y2),(0,0,0),random.randint(2,10))
+                cv2.line(back,(x1,y1),(x2,y2),(0,0,0),rng.randint(2,10))
                 x1=x2
                 y1=y2
 
@@ -5,52 +5,48 @@
 #--------------------
 # imports
 #--------------------
-import os
-import pandas as pd
 import random
 import cv2
 import numpy as np
-import PIL
-import PIL.Image , PIL.ImageDraw , PIL.ImageFont 
-
-from tqdm import tqdm
-from glob import glob
-
-from coreLib.utils import rotate_image
 
 from .config import config
-from .utils import stripPads
-tqdm.pandas()
+from .fonts import listFonts,getFont
+from .atlas import markComps
+from .profiling import timed
 #--------------------
 # word functions 
 #--------------------
-def addSpace(img,iden):
+def addSpace(img,iden,rng=random):
     '''
         adds a space at the end of the word
     '''
+    if iden>np.iinfo(config.label_dtype).max:
+        raise ValueError(f"identifier {iden} out of {config.label_dtype} range")
     h,_=img.shape
-    width=random.randint(config.word_min_space,config.word_max_space)
-    space=np.ones((h,width))*iden
+    width=rng.randint(config.word_min_space,config.word_max_space)
+    space=np.full((h,width),iden,dtype=config.label_dtype)
     return np.concatenate([img,space],axis=1)
 
 
 def createHandwritenWords(iden,
-                         df,
-                         comps):
+                         label_paths,
+                         comps,
+                         glyphs,
+                         rng=random):
     '''
         creates handwriten word image
         args:
             iden    :       identifier marking value starting
-            df      :       the dataframe that holds the file name and label
+            label_paths:    the {label:image paths} index of the components
+            glyphs  :       the glyph store of the dataset
             comps   :       the list of components 
+            rng     :       the random generator
         returns:
             img     :       marked word image
             label   :       dictionary of label {iden:label}
             iden    :       the final identifier
     '''
     comps=[str(comp) for comp in comps]
-    # select a height
-    height=config.comp_dim
     # reconfigure comps
     mods=['ঁ', 'ং', 'ঃ']
     while comps[0] in mods:
@@ -59,40 +55,37 @@ def createHandwritenWords(iden,
     label={}
     imgs=[]
     for comp in comps:
-        c_df=df.loc[df.label==comp]
+        c_paths=label_paths[comp]
         # select a image file
-        idx=random.randint(0,len(c_df)-1)
-        img_path=c_df.iloc[idx,2] 
-        # read image
-        img=cv2.imread(img_path,0)
-        # resize
-        h,w=img.shape 
-        width= int(height* w/h) 
-        img=cv2.resize(img,(width,height),fx=0,fy=0, interpolation = cv2.INTER_NEAREST)
+        idx=rng.randint(0,len(c_paths)-1)
+        img_path=c_paths[idx] 
+        # binary glyph (already resized to the component height)
+        glyph=glyphs.get(img_path)
         # mark image
-        img=255-img
-        data=np.zeros(img.shape)
-        data[img>0]      =   iden
+        data=np.zeros(glyph.shape,dtype=config.label_dtype)
+        data[glyph>0]    =   iden
         imgs.append(data)
         # label
         label[iden] = comp 
         iden+=1
     img=np.concatenate(imgs,axis=1)
     # add space
-    img=addSpace(img,iden)
+    img=addSpace(img,iden,rng=rng)
     label[iden]=' '
     iden+=1
     return img,label,iden
 
 def createPrintedWords(iden,
                        comps,
-                       fonts):
+                       fonts,
+                       rng=random):
     '''
         creates printed word image
         args:
             iden    :       identifier marking value starting
             comps   :       the list of components
             fonts   :       available font paths 
+            rng     :       the random generator
         returns:
             img     :       marked word image
             label   :       dictionary of label {iden:label}
@@ -102,9 +95,6 @@ def createPrintedWords(iden,
     comps=[str(comp) for comp in comps]
     # select a font size
     font_size=config.comp_dim
-    # max dim
-    min_offset=100
-    max_dim=len(comps)*font_size+min_offset
     # reconfigure comps
     mods=['ঁ', 'ং', 'ঃ']
     for idx,comp in enumerate(comps):
@@ -114,46 +104,21 @@ def createPrintedWords(iden,
             
     comps=[comp for comp in comps if comp is not None]
     # font path
-    font_path=random.choice(fonts)
-    font=PIL.ImageFont.truetype(font_path, size=font_size)
-    # sizes of comps
-    # comp_sizes = [font.font.getsize(comp) for comp in comps] 
+    font_path=rng.choice(fonts)
+    font=getFont(font_path,font_size)
     # construct labels
     label={}
-    imgs=[]
-    comp_str=''
+    start=iden
     for comp in comps:
-        comp_str+=comp
-        # # calculate increment
-        # (comp_width,_),(offset,_)=comp_size
-        # dx = comp_width+offset 
-        # draw
-        image = PIL.Image.new(mode='L', size=(max_dim,max_dim))
-        draw = PIL.ImageDraw.Draw(image)
-        #draw.text(xy=(x, y), text=comp, fill=iden, font=font)
-        draw.text(xy=(0, 0), text=comp_str, fill=1, font=font)
-        
-        imgs.append(np.array(image))
-        # x+=dx
-        # label
         label[iden] = comp 
         iden+=1
-        
-        
-    # add images
-    img=sum(imgs)
-    img=stripPads(img,0)
-    # offset
-    vals=list(np.unique(img))
-    vals=sorted(vals,reverse=True)
-    vals=vals[:-1]
-    
-    _img=np.zeros(img.shape)
-    for v,l in zip(vals,label.keys()):
-        _img[img==v]=l
+    # marked word: comps[i] -> i+1
+    img=markComps(comps,font)
+    _img=np.zeros(img.shape,dtype=config.label_dtype)
+    _img[img>0]=img[img>0]+start-1
     
     # add space
-    _img=addSpace(_img,iden)
+    _img=addSpace(_img,iden,rng=rng)
     label[iden]=' '
     iden+=1
     # resize
@@ -168,12 +133,14 @@ def createPrintedWords(iden,
 #-----------------------------------
 # wrapper
 #----------------------------------
+@timed("word")
 def create_word(iden,
                 source_type,
                 data_type,
                 comp_type,
                 ds,
-                use_dict=True):
+                use_dict=True,
+                rng=random):
     '''
         creates a marked word image
         args:
@@ -183,6 +150,7 @@ def create_word(iden,
             comp_type               :       grapheme/number/mixed
             ds                      :       the dataset object
             use_dict                :       use a dictionary word (if not used then random data is generated)
+            rng                     :       the random generator
     '''
         
     
@@ -190,58 +158,54 @@ def create_word(iden,
     if source_type=="bangla":
         dict_df  =ds.bangla.dictionary 
         
-        g_df     =ds.bangla.graphemes.df 
+        g_comps  =ds.bangla.graphemes.comps
+        n_comps  =ds.bangla.numbers.comps
+        m_comps  =ds.bangla.mixed
         
-        n_df     =ds.bangla.numbers.df 
-        
-        fonts    =[font_path for font_path in glob(os.path.join(ds.bangla.fonts,"*.*")) if "ANSI" not in font_path]
+        fonts    =listFonts(ds.bangla.fonts,exclude=("ANSI",))
     elif source_type=="english":
         dict_df  =ds.english.dictionary 
         
-        g_df     =ds.english.graphemes.df 
-        
-        n_df     =ds.english.numbers.df 
+        g_comps  =ds.english.graphemes.comps
+        n_comps  =ds.english.numbers.comps
+        m_comps  =ds.english.mixed
         
-        fonts    =[font_path for font_path in glob(os.path.join(ds.english.fonts,"*.*"))]
+        fonts    =listFonts(ds.english.fonts)
 
     # component selection 
     if comp_type=="grapheme":
         # dictionary
         if use_dict:
             # select index from the dict
-            idx=random.randint(0,len(dict_df)-1)
+            idx=rng.randint(0,len(dict_df)-1)
             comps=dict_df.iloc[idx,1]
         else:
             # construct random word with grapheme
             comps=[]
-            len_word=random.randint(config.min_word_len,config.max_word_len)
+            len_word=rng.randint(config.min_word_len,config.max_word_len)
             for _ in range(len_word):
-                idx=random.randint(0,len(g_df)-1)
-                comps.append(g_df.iloc[idx,1])
-        df=g_df
+                comps.append(g_comps.sample(rng=rng))
+        label_paths=g_comps.label_paths
     elif comp_type=="number":
         comps=[]
-        len_word=random.randint(config.min_word_len,config.max_word_len)
+        len_word=rng.randint(config.min_word_len,config.max_word_len)
         for _ in range(len_word):
-            idx=random.randint(0,len(n_df)-1)
-            comps.append(n_df.iloc[idx,1])
-        df=n_df
+            comps.append(n_comps.sample(rng=rng))
+        label_paths=n_comps.label_paths
     
     else:
-        sdf         =   ds.common.symbols.df
-        df=pd.concat([g_df,n_df,sdf],ignore_index=True)
         comps=[]
-        len_word=random.randint(config.min_word_len,config.max_word_len)
+        len_word=rng.randint(config.min_word_len,config.max_word_len)
         for _ in range(len_word):
-            idx=random.randint(0,len(df)-1)
-            comps.append(df.iloc[idx,1])
+            comps.append(m_comps.sample(rng=rng))
+        label_paths=m_comps.label_paths
 
     
     # process data
     if data_type=="handwritten":
-        img,label,iden=createHandwritenWords(iden=iden,df=df,comps=comps)
+        img,label,iden=createHandwritenWords(iden=iden,label_paths=label_paths,comps=comps,glyphs=ds.glyphs,rng=rng)
     else:
-        img,label,iden=createPrintedWords(iden=iden,comps=comps,fonts=fonts)
+        img,label,iden=createPrintedWords(iden=iden,comps=comps,fonts=fonts,rng=rng)
     return img,label,iden
 
 
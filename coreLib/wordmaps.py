@@ -9,36 +9,36 @@ import os
 from numpy.lib.function_base import angle
 import pandas as pd
 import random
+import functools
 import cv2
 import numpy as np
 import PIL
 import PIL.Image , PIL.ImageDraw , PIL.ImageFont 
-from wand.image import Image as WImage
 from tqdm import tqdm
 from glob import glob
 
-from coreLib.utils import rotate_image
-
 from .config import config
-from .utils import stripPads,random_exec
+from .fonts import listFonts,getFont
+from .atlas import markComps
+from .utils import random_exec,stackMaps,splitMaps,rotationMatrix
 from .craft import get_maps_from_masked_images
+from .profiling import timed
 tqdm.pandas()
 
 #--------------------
 # processing functions 
 #--------------------
-def get_warped_maps(img,hmap,lmap,warp_vec,coord):
+def get_warp_matrix(width,height,warp_vec,coord,rng=random):
     '''
-        returns warped image and new coords
+        returns the perspective matrix of a warp and new coords
         args:
-            img      : image to warp
-            hmap     : heat map of the image
-            lmap     : link map of the image
+            width    : width of the image to warp
+            height   : height of the image to warp
             warp_vec : which vector to warp
             coord    : list of current coords
+            rng      : the random generator
               
     '''
-    height,width=img.shape
  
     # construct dict warp
     x1,y1=coord[0]
@@ -46,8 +46,8 @@ def get_warped_maps(img,hmap,lmap,warp_vec,coord):
     x3,y3=coord[2]
     x4,y4=coord[3]
     # warping calculation
-    xwarp=random.randint(0,config.max_warp_perc)/100
-    ywarp=random.randint(0,config.max_warp_perc)/100
+    xwarp=rng.randint(0,config.max_warp_perc)/100
+    ywarp=rng.randint(0,config.max_warp_perc)/100
     # construct destination
     dx=int(width*xwarp)
     dy=int(height*ywarp)
@@ -61,20 +61,19 @@ def get_warped_maps(img,hmap,lmap,warp_vec,coord):
     else:
         dst= [[x1,y1],[x2,y2],[x3,y3],[dx,y4-dy]]
     M   = cv2.getPerspectiveTransform(np.float32(coord),np.float32(dst))
-    img = cv2.warpPerspective(img, M, (width,height),flags=cv2.INTER_NEAREST)
-    hmap= cv2.warpPerspective(hmap, M, (width,height),flags=cv2.INTER_NEAREST)
-    lmap= cv2.warpPerspective(lmap, M, (width,height),flags=cv2.INTER_NEAREST)
-    return img,hmap,lmap,dst
+    return M,dst
 
-def warp_map_wrapper(img,hmap,lmap):
+def warp_matrix_wrapper(width,height,rng=random):
     '''
-    args:
-        img      : image to warp
-        hmap     : heat map of the image
-        lmap     : link map of the image
+        returns the composed (3x3) matrix of the random warps (None: no warp)
+        the warped image keeps the shape
+        args:
+            width    : width of the image to warp
+            height   : height of the image to warp
+            rng      : the random generator
     '''
     warp_types=["p1","p2","p3","p4"]
-    height,width=img.shape
+    M=None
 
     coord=[[0,0], 
         [width-1,0], 
@@ -87,46 +86,92 @@ def warp_map_wrapper(img,hmap,lmap):
             idxs=[0,2]
         else:
             idxs=[1,3]
-        if random_exec():    
-            idx=random.choice(idxs)
-            img,hmap,lmap,coord=get_warped_maps(img,hmap,lmap,warp_types[idx],coord)
-    return img,hmap,lmap
+        if random_exec(rng=rng):    
+            idx=rng.choice(idxs)
+            W,coord=get_warp_matrix(width,height,warp_types[idx],coord,rng=rng)
+            M=W if M is None else W@M
+    return M
 
+def warp_maps(maps,M,dsize):
+    '''
+        applies a 3x3 matrix to a stack of maps (see stackMaps) in a single pass
+    '''
+    if M[2,0]==0 and M[2,1]==0 and M[2,2]==1:
+        return cv2.warpAffine(maps,M[:2],dsize,flags=cv2.INTER_NEAREST)
+    return cv2.warpPerspective(maps,M,dsize,flags=cv2.INTER_NEAREST)
 
-def curve_data(img,angle,cangle):
-    with WImage.from_array(img) as wimg:
-        wimg.virtual_pixel = 'black'
-        wimg.distort('arc',(angle,cangle))
-        wimg=np.array(wimg)
-    return wimg
 
+def magickRound(x):
+    '''
+        rounds half away from zero (MagickRound)
+    '''
+    return np.where(x<0,np.ceil(x-0.5),np.floor(x+0.5))
 
-def curve_maps(img,hmap,lmap):
+@functools.lru_cache(maxsize=64)
+def arcMaps(rows,cols,angle,cangle):
     '''
-    args:
-        img      : image to warp
-        hmap     : heat map of the image
-        lmap     : link map of the image
+        cv2.remap grid of ImageMagick's arc distortion (-distort arc "angle,cangle") with its bestfit viewport
+        args:
+            rows    :   height of the source
+            cols    :   width of the source
+            angle   :   arc angle in degrees
+            cangle  :   rotation of the arc in degrees
+        returns:
+            map_x,map_y (read-only float32 arrays of the distorted shape)
     '''
-    angle=random.randint(30,180)
-    cangle=random.choice([0,180])
-    img=curve_data(img,angle,cangle)
-    hmap=curve_data(hmap,angle,cangle)
-    lmap=curve_data(lmap,angle,cangle)
-    return img,hmap,lmap
+    # coefficients (distort.c: ArcDistortion)
+    c0=-np.pi/2+np.deg2rad(cangle)
+    c0=float(c0/(2*np.pi)-magickRound(c0/(2*np.pi)))*2*np.pi
+    c1=np.deg2rad(angle)
+    c3=rows-1.0
+    c2=cols/c1+c3/2.0
+    c4=(cols-1.0)/2.0
+    # bestfit: forward mapped corners and the orthogonal points along the top of the arc
+    pts=[]
+    for a in [c0-c1/2,c0+c1/2]:
+        pts+=[(c2*np.cos(a),c2*np.sin(a)),((c2-c3)*np.cos(a),(c2-c3)*np.sin(a))]
+    a=np.ceil((c0-c1/2)/(np.pi/2))*(np.pi/2)
+    while a<c0+c1/2:
+        pts.append((c2*np.cos(a),c2*np.sin(a)))
+        a+=np.pi/2
+    pts=np.array(pts)
+    x=int(np.floor(pts[:,0].min()-0.5))
+    y=int(np.floor(pts[:,1].min()-0.5))
+    width =int(np.ceil(pts[:,0].max()-x+0.5))
+    height=int(np.ceil(pts[:,1].max()-y+0.5))
+    # inverse mapping of the pixel centers
+    dx,dy=np.meshgrid(np.arange(width)+x+0.5,np.arange(height)+y+0.5)
+    sx=(np.arctan2(dy,dx)-c0)/(2*np.pi)
+    sx-=magickRound(sx)
+    # source coordinates (pixel centers are at +0.5 for ImageMagick and at 0 for opencv)
+    map_x=(sx*(2*np.pi*cols/c1)+c4).astype(np.float32)
+    map_y=((c2-np.hypot(dx,dy))*(rows/c3)-0.5).astype(np.float32)
+    map_x.flags.writeable=False
+    map_y.flags.writeable=False
+    return map_x,map_y
+
+def curve_data(img,angle,cangle):
+    '''
+        arc distortion with the geometry of ImageMagick (-virtual-pixel black -distort arc "angle,cangle")
+        (nearest neighbour sampling like the other word warps)
+    '''
+    map_x,map_y=arcMaps(img.shape[0],img.shape[1],angle,cangle)
+    return cv2.remap(img,map_x,map_y,cv2.INTER_NEAREST,borderMode=cv2.BORDER_CONSTANT,borderValue=0)
 
 
 #--------------------
 # word functions 
 #--------------------
 
-def createHandwritenWords(df,comps,gmap):
+def createHandwritenWords(label_paths,comps,gmap,glyphs,rng=random):
     '''
         creates handwriten word image
         args:
-            df      :       the dataframe that holds the file name and label
+            label_paths:    the {label:image paths} index of the components
+            glyphs  :       the glyph store of the dataset
             comps   :       the list of components
             gmap    :       gaussian heatmap
+            rng     :       the random generator
         returns:
             img     :       word image
             hmap    :       heat map of the image
@@ -134,8 +179,6 @@ def createHandwritenWords(df,comps,gmap):
     '''
     iden=2
     comps=[str(comp) for comp in comps]
-    # select a height
-    height=config.comp_dim
     # reconfigure comps
     mods=['ঁ', 'ং', 'ঃ']
     while comps[0] in mods:
@@ -143,20 +186,15 @@ def createHandwritenWords(df,comps,gmap):
     # construct labels
     imgs=[]
     for comp in comps:
-        c_df=df.loc[df.label==comp]
+        c_paths=label_paths[comp]
         # select a image file
-        idx=random.randint(0,len(c_df)-1)
-        img_path=c_df.iloc[idx,2] 
-        # read image
-        img=cv2.imread(img_path,0)
-        # resize
-        h,w=img.shape 
-        width= int(height* w/h) 
-        img=cv2.resize(img,(width,height),fx=0,fy=0, interpolation = cv2.INTER_NEAREST)
+        idx=rng.randint(0,len(c_paths)-1)
+        img_path=c_paths[idx] 
+        # binary glyph (already resized to the component height)
+        glyph=glyphs.get(img_path)
         # mark image
-        img=255-img
-        data=np.zeros(img.shape)
-        data[img>0]      =   iden
+        data=np.zeros(glyph.shape)
+        data[glyph>0]    =   iden
         imgs.append(data)
         iden+=1
 
@@ -164,13 +202,14 @@ def createHandwritenWords(df,comps,gmap):
     img=np.concatenate(imgs,axis=1)
     return get_maps_from_masked_images(img,gmap)
 
-def createPrintedWords(gmap,comps,fonts):
+def createPrintedWords(gmap,comps,fonts,rng=random):
     '''
         creates printed word image
         args:
             gmap    :       gaussian heatmap
             comps   :       the list of components
             fonts   :       available font paths 
+            rng     :       the random generator
         returns:
             img     :       word image
             hmap    :       heat map of the image
@@ -189,34 +228,13 @@ def createPrintedWords(gmap,comps,fonts):
             
     comps=[comp for comp in comps if comp is not None]
     # font path
-    font_path=random.choice(fonts)
-    font=PIL.ImageFont.truetype(font_path, size=font_size)
-    
-    # construct labels
-    imgs=[]
-    comp_str=''
-    for comp in comps:
-        comp_str+=comp
-        # draw
-        image = PIL.Image.new(mode='L', size=font.getsize("".join(comps)))
-        draw = PIL.ImageDraw.Draw(image)
-        draw.text(xy=(0, 0), text=comp_str, fill=1, font=font)
-        imgs.append(np.array(image))
-        
-        
-    # add images
-    img=sum(imgs)
-    img=stripPads(img,0)
-    # offset
-    vals=list(np.unique(img))
-    vals=sorted(vals,reverse=True)
-    vals=vals[:-1]
+    font_path=rng.choice(fonts)
+    font=getFont(font_path,font_size)
     
+    # marked word: comps[i] -> i+1
+    img=markComps(comps,font)
     _img=np.zeros(img.shape)
-    iden=2
-    for v in vals:
-        _img[img==v]=iden
-        iden+=1
+    _img[img>0]=img[img>0]+1
     
     # resize
     h,w=_img.shape 
@@ -229,13 +247,15 @@ def createPrintedWords(gmap,comps,fonts):
 #-----------------------------------
 # wrapper
 #----------------------------------
+@timed("word")
 def create_word(gmap,
                 word_iden,
                 source_type,
                 data_type,
                 comp_type,
                 ds,
-                use_dict=True):
+                use_dict=True,
+                rng=random):
     '''
         creates a marked word image
         args:
@@ -246,6 +266,7 @@ def create_word(gmap,
             comp_type               :       grapheme/number/mixed
             ds                      :       the dataset object
             use_dict                :       use a dictionary word (if not used then random data is generated)
+            rng                     :       the random generator
     '''
         
     
@@ -253,75 +274,87 @@ def create_word(gmap,
     if source_type=="bangla":
         dict_df  =ds.bangla.dictionary 
         
-        g_df     =ds.bangla.graphemes.df 
+        g_comps  =ds.bangla.graphemes.comps
+        n_comps  =ds.bangla.numbers.comps
+        m_comps  =ds.bangla.mixed
         
-        n_df     =ds.bangla.numbers.df 
-        
-        fonts    =[font_path for font_path in glob(os.path.join(ds.bangla.fonts,"*.*")) if "ANSI" not in font_path]
+        fonts    =listFonts(ds.bangla.fonts,exclude=("ANSI",))
     elif source_type=="english":
         dict_df  =ds.english.dictionary 
         
-        g_df     =ds.english.graphemes.df 
-        
-        n_df     =ds.english.numbers.df 
+        g_comps  =ds.english.graphemes.comps
+        n_comps  =ds.english.numbers.comps
+        m_comps  =ds.english.mixed
         
-        fonts    =[font_path for font_path in glob(os.path.join(ds.english.fonts,"*.*"))]
+        fonts    =listFonts(ds.english.fonts)
 
     # component selection 
     if comp_type=="grapheme":
         # dictionary
         if use_dict:
             # select index from the dict
-            idx=random.randint(0,len(dict_df)-1)
+            idx=rng.randint(0,len(dict_df)-1)
             comps=dict_df.iloc[idx,1]
         else:
             # construct random word with grapheme
             comps=[]
-            len_word=random.randint(config.min_word_len,config.max_word_len)
+            len_word=rng.randint(config.min_word_len,config.max_word_len)
             for _ in range(len_word):
-                idx=random.randint(0,len(g_df)-1)
-                comps.append(g_df.iloc[idx,1])
-        df=g_df
+                comps.append(g_comps.sample(rng=rng))
+        label_paths=g_comps.label_paths
     elif comp_type=="number":
         comps=[]
-        len_word=random.randint(config.min_word_len,config.max_word_len)
+        len_word=rng.randint(config.min_word_len,config.max_word_len)
         for _ in range(len_word):
-            idx=random.randint(0,len(n_df)-1)
-            comps.append(n_df.iloc[idx,1])
-        df=n_df
+            comps.append(n_comps.sample(rng=rng))
+        label_paths=n_comps.label_paths
     
     else:
-        sdf         =   ds.common.symbols.df
-        df=pd.concat([g_df,n_df,sdf],ignore_index=True)
         comps=[]
-        len_word=random.randint(config.min_word_len,config.max_word_len)
+        len_word=rng.randint(config.min_word_len,config.max_word_len)
         for _ in range(len_word):
-            idx=random.randint(0,len(df)-1)
-            comps.append(df.iloc[idx,1])
+            comps.append(m_comps.sample(rng=rng))
+        label_paths=m_comps.label_paths
 
     
     # process data
     if data_type=="handwritten":
-        img,hmap,lmap=createHandwritenWords(df=df,comps=comps,gmap=gmap)
+        img,hmap,lmap=createHandwritenWords(label_paths=label_paths,comps=comps,gmap=gmap,glyphs=ds.glyphs,rng=rng)
     else:
-        img,hmap,lmap=createPrintedWords(gmap=gmap,comps=comps,fonts=fonts)
+        img,hmap,lmap=createPrintedWords(gmap=gmap,comps=comps,fonts=fonts,rng=rng)
     
 
+    # the marks are integers: a single uint16 stack is warped 
+    maps,dtypes=stackMaps(img.astype(config.label_dtype),hmap,lmap)
+    height,width=maps.shape[:2]
+    # the warps and the rotation are composed and resampled once
+    M=None
+    dsize=(width,height)
+    curve=None
     # warp
-    if random_exec(weights=[0.3,0.7]):
-        img,hmap,lmap=warp_map_wrapper(img,hmap,lmap)
+    if random_exec(weights=[0.3,0.7],rng=rng):
+        M=warp_matrix_wrapper(width,height,rng=rng)
     # rotate/curve
-    if random_exec(weights=[0.5,0.5]):
-        if random_exec(weights=[0.5,0.5]):
-            angle=random.randint(-90,90)
-            img=rotate_image(img,angle)
-            hmap=rotate_image(hmap,angle)
-            lmap=rotate_image(lmap,angle)
+    if random_exec(weights=[0.5,0.5],rng=rng):
+        if random_exec(weights=[0.5,0.5],rng=rng):
+            angle=rng.randint(-90,90)
+            R,dsize=rotationMatrix(width,height,angle)
+            R=np.vstack([R,[0,0,1]])
+            M=R if M is None else R@M
         else:
-            img,hmap,lmap=curve_maps(img,hmap,lmap)
+            curve=(rng.randint(30,180),rng.choice([0,180]))
+    if M is not None:
+        maps=warp_maps(maps,M,dsize)
+    # (composing the warps into the arc grid costs more than the extra pass)
+    if curve is not None:
+        maps=curve_data(maps,*curve)
+    img,hmap,lmap=splitMaps(maps,dtypes)
 
     img[img>0]=word_iden    
-    return np.squeeze(img),np.squeeze(hmap),np.squeeze(lmap)
+    img =np.squeeze(img).astype(config.label_dtype)
+    hmap=np.squeeze(hmap).astype(config.map_dtype)
+    lmap=np.squeeze(lmap).astype(config.map_dtype)
+    return img,hmap,lmap
 
 
     
@@ -0,0 +1,106 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import cv2
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .profiling import timer
+#--------------------
+# writer
+#--------------------
+class AsyncWriter(object):
+    def __init__(self,num_threads=2,max_pending=16,compression=None):
+        '''
+            encodes and writes images in a thread pool
+            args:
+                num_threads :   number of writer threads
+                max_pending :   max number of queued groups, write() blocks when full (backpressure)
+                compression :   png compression level [0-9] (None: opencv default)
+
+            * the arrays are written as they are when the thread gets to them: do not modify them after write()
+            * write errors are collected and raised by flush()
+        '''
+        self.params     =   [] if compression is None else [cv2.IMWRITE_PNG_COMPRESSION,int(compression)]
+        self.num_threads=   int(num_threads)
+        self.slots      =   threading.BoundedSemaphore(int(max_pending))
+        self.cond       =   threading.Condition()
+        self.pending    =   0
+        self.errors     =   []
+        self.written    =   0
+        self.executor   =   None
+
+    def __save(self,items):
+        try:
+            for path,img in items:
+                try:
+                    with timer("imwrite"):
+                        saved=cv2.imwrite(path,img,self.params)
+                    if not saved:
+                        raise IOError("cv2.imwrite returned False")
+                    with self.cond:
+                        self.written+=1
+                except Exception as e:
+                    with self.cond:
+                        self.errors.append((path,e))
+        finally:
+            self.slots.release()
+            with self.cond:
+                self.pending-=1
+                self.cond.notify_all()
+
+    def writeGroup(self,items):
+        '''
+            queues a group of images that are written by the same thread
+            args:
+                items   :   list of (path,img) i.e- the image,heatmap and linkmap of a sample
+        '''
+        # threads are started lazily (no thread runs before the first write)
+        if self.executor is None:
+            self.executor=ThreadPoolExecutor(max_workers=self.num_threads)
+        self.slots.acquire()
+        with self.cond:
+            self.pending+=1
+        self.executor.submit(self.__save,list(items))
+
+    def write(self,path,img):
+        '''
+            queues an image
+        '''
+        self.writeGroup([(path,img)])
+
+    def flush(self):
+        '''
+            waits for all the queued images and raises an IOError listing the failed writes (if any)
+            returns:
+                number of images written since the last flush
+        '''
+        with self.cond:
+            while self.pending>0:
+                self.cond.wait()
+            errors,self.errors=self.errors,[]
+            written,self.written=self.written,0
+        if errors:
+            lines="\n".join(f"{path}:{e}" for path,e in errors[:10])
+            raise IOError(f"failed to write {len(errors)} image(s):\n{lines}")
+        return written
+
+    def close(self):
+        '''
+            flushes and stops the threads
+        '''
+        try:
+            return self.flush()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+                self.executor=None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        self.close()
@@ -11,14 +11,18 @@ from glob import glob
 from tqdm.auto import tqdm
 from ast import literal_eval
 from .utils import LOG_INFO
+from coreLib.glyphs import GlyphStore
+from coreLib.dataset import CompSet
 tqdm.pandas()
 #--------------------
 # class info
 #--------------------
 class DataSet(object):
-    def __init__(self,data_dir):
+    def __init__(self,data_dir,preload_glyphs=False,glyph_cache_size=4096):
         '''
-            data_dir : the location of the data folder
+            data_dir          : the location of the data folder
+            preload_glyphs    : decode all grapheme/number/symbol bitmaps at load time
+            glyph_cache_size  : max number of glyphs to cache when not preloading
         '''
         self.data_dir=data_dir
         
@@ -93,6 +97,13 @@ class DataSet(object):
         #self.english.dictionary  =self.__getDataFrame(self.english.dict_csv,is_dict=True)
         
         self.common.symbols.df   =self.__getDataFrame(self.common.symbols)
+        # component sets: g=graphemes,n=numbers,s=symbols
+        for lang in [self.bangla,self.english]:
+            lang.graphemes.comps    =CompSet([lang.graphemes.df])
+            lang.numbers.comps      =CompSet([lang.numbers.df])
+            lang.number_symbols     =CompSet([lang.numbers.df,self.common.symbols.df])
+            lang.grapheme_symbols   =CompSet([lang.graphemes.df,self.common.symbols.df])
+            lang.all_comps          =CompSet([lang.numbers.df,lang.graphemes.df,self.common.symbols.df])
         # data validity
         self.__checkDataValidity(self.bangla.graphemes,"bangla.graphemes")
         self.__checkDataValidity(self.bangla.numbers,"bangla.numbers")
@@ -110,6 +121,16 @@ class DataSet(object):
         # graphemes
         self.bangla_graphemes=sorted(list(self.bangla.graphemes.df.label.unique()))
         
+        # glyphs: binarized (the renderers resize them per alignment)
+        img_paths=[]
+        for obj in [self.bangla.graphemes,self.bangla.numbers,
+                    self.english.graphemes,self.english.numbers,
+                    self.common.symbols]:
+            img_paths+=list(obj.df.img_path)
+        self.glyphs=GlyphStore(img_paths,
+                               preload=preload_glyphs,
+                               cache_size=glyph_cache_size)
+        
         
         
         
@@ -26,15 +26,15 @@ from .utils import padToFixedHeightWidth
 #  placement
 #-----------------------------------
 
-def create_memo_data(ds,language,img_height=1024):
+def create_memo_data(ds,language,img_height=1024,rng=random):
     '''
         joins a memo segments
     '''
     # extract images and regions
-    table_img,table_cmap,table_wmap      =   renderMemoTable(ds,language)
+    table_img,table_cmap,table_wmap      =   renderMemoTable(ds,language,rng=rng)
     _,tbm,_=table_img.shape
-    head_img,head_cmap,head_wmap         =   renderMemoHead(ds,language,tbm)
-    bottom_img,bottom_cmap,bottom_wmap   =   renderMemoBottom(ds,language,tbm)
+    head_img,head_cmap,head_wmap         =   renderMemoHead(ds,language,tbm,rng=rng)
+    bottom_img,bottom_cmap,bottom_wmap   =   renderMemoBottom(ds,language,tbm,rng=rng)
     
     # maps
     img =np.concatenate([head_img,table_img,bottom_img],axis=0)
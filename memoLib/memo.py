@@ -48,7 +48,7 @@ class LineWithExtension(LineSection):
 #--------------------
 # text-functions
 #--------------------
-def rand_word(vocab,symbol,max_len,min_len):
+def rand_word(vocab,symbol,max_len,min_len,rng=random):
     '''
         creates a random word
         args:
@@ -56,11 +56,12 @@ def rand_word(vocab,symbol,max_len,min_len):
             symbol   : symbol to add
             max_len  : maximum length of word
             min_len  : min length of word
+            rng      : the random generator
     '''
     comps=[]
-    len_word=random.randint(min_len,max_len)
+    len_word=rng.randint(min_len,max_len)
     for i in range(len_word):
-        comps.append(random.choice(vocab))
+        comps.append(rng.choice(vocab))
     if symbol is not None:
         comps.append(symbol)
     comps.append(" ")
@@ -68,16 +69,16 @@ def rand_word(vocab,symbol,max_len,min_len):
     return word
 
 
-def rand_line(section,graphemes,numbers):
+def rand_line(section,graphemes,numbers,rng=random):
     '''
         creates a random line with given properties and sections
     '''
     line=''
     sym_count=0
-    max_sym  =random.randint(0,section.max_syms)
-    num_word=random.randint(section.num_word_min,section.num_word_max)
+    max_sym  =rng.randint(0,section.max_syms)
+    num_word=rng.randint(section.num_word_min,section.num_word_max)
     for i in range(num_word):
-        _vocab=random.choices(population=section.vocabs,weights=section.vweights,k=1)[0]
+        _vocab=rng.choices(population=section.vocabs,weights=section.vweights,k=1)[0]
         if _vocab=="mixed":
             vocab=graphemes+numbers
         elif _vocab=="grapheme":
@@ -85,30 +86,30 @@ def rand_line(section,graphemes,numbers):
         else:
             vocab=numbers
 
-        if random.choices(population=[1,0],weights=[0.1, 0.9],k=1)[0]==1:
+        if rng.choices(population=[1,0],weights=[0.1, 0.9],k=1)[0]==1:
             if sym_count<=max_sym:
-                symbol=random.choice(section.symbols)
+                symbol=rng.choice(section.symbols)
             else:
                 symbol=None
         else:
             symbol=None
         
-        word=rand_word(vocab,symbol,section.word_len_max,section.word_len_min)
+        word=rand_word(vocab,symbol,section.word_len_max,section.word_len_min,rng=rng)
         line+=word
     return line 
 
 
-def rand_line_with_extension(section,graphemes,numbers,ext_type):
+def rand_line_with_extension(section,graphemes,numbers,ext_type,rng=random):
     '''
         creates a random line with given properties and sections
     '''
     # single or double
     if ext_type=="single":
-        line=rand_line(section,graphemes,numbers)
+        line=rand_line(section,graphemes,numbers,rng=rng)
         return line
     else:
-        line1=rand_line(section,graphemes,numbers)
-        line2=rand_line(section,graphemes,numbers)
+        line1=rand_line(section,graphemes,numbers,rng=rng)
+        line2=rand_line(section,graphemes,numbers,rng=rng)
         return line1,line2
 #--------------------
 # head-functions
@@ -128,7 +129,7 @@ class Head(object):
         self.double_exts         =[]   # [{words,font_size,ext,ext_len},{words,font_size,ext,ext_len}]
 
 
-def rand_head(graphemes,numbers,head,line_section,line_ext):
+def rand_head(graphemes,numbers,head,line_section,line_ext,rng=random):
     '''
         generates random head data
         args:
@@ -137,20 +138,21 @@ def rand_head(graphemes,numbers,head,line_section,line_ext):
             head        :   head class
             line_section:   line_section class
             line_ext    :   line extension class
+            rng         :   the random generator
     '''
     # add line sections
-    num_line_sections=random.randint(head.min_line_section,head.max_line_section)
+    num_line_sections=rng.randint(head.min_line_section,head.max_line_section)
     for _ in range(num_line_sections):
-        head.line_sections.append([{"line":rand_line(line_section,graphemes,numbers),
-                                    "font_size":random.choice(line_section.font_sizes_big)}])
+        head.line_sections.append([{"line":rand_line(line_section,graphemes,numbers,rng=rng),
+                                    "font_size":rng.choice(line_section.font_sizes_big)}])
     
     
     
     font_size=line_ext.font_sizes_big[-1]
     # add double ext sections
-    num_double_sections=random.randint(head.min_double_exts,head.max_double_exts)
+    num_double_sections=rng.randint(head.min_double_exts,head.max_double_exts)
     for _ in range(num_double_sections):
-        line1,line2=rand_line_with_extension(line_ext,graphemes,numbers,"double")
+        line1,line2=rand_line_with_extension(line_ext,graphemes,numbers,"double",rng=rng)
         
         data=[{"line":line1,"font_size":font_size},
               {"line":line2,"font_size":font_size}]
@@ -159,9 +161,9 @@ def rand_head(graphemes,numbers,head,line_section,line_ext):
     
 
     # add single ext sections
-    num_single_sections=random.randint(head.min_single_exts,head.max_single_exts)
+    num_single_sections=rng.randint(head.min_single_exts,head.max_single_exts)
     for _ in range(num_single_sections):
-        line=rand_line_with_extension(line_ext,graphemes,numbers,"single")
+        line=rand_line_with_extension(line_ext,graphemes,numbers,"single",rng=rng)
         data={"line":line}
         data["font_size"]=font_size
         head.single_exts.append([data])
@@ -186,19 +188,20 @@ class Table(LineSection):
         self.products         =  []
         self.column_names     =  []
         self.pad_dim          =  10
-def rand_products(graphemes,numbers,table):
+def rand_products(graphemes,numbers,table,rng=random):
     '''
         generates random head data
         args:
             graphemes   :   list of valid graphemes to use
             numbers     :   list of valid number to use
             table       :   table class
+            rng         :   the random generator
     '''
     # add line sections
-    table.font_size=random.choice(table.font_sizes_mid)
-    num_line_sections=random.randint(table.num_product_min,table.num_product_max)
+    table.font_size=rng.choice(table.font_sizes_mid)
+    num_line_sections=rng.randint(table.num_product_min,table.num_product_max)
     for _ in range(num_line_sections):
-        table.products.append([{"line":rand_line(table,graphemes,numbers),"font_size":table.font_size}])
+        table.products.append([{"line":rand_line(table,graphemes,numbers,rng=rng),"font_size":table.font_size}])
     
     return table
 
@@ -224,21 +227,22 @@ class Bottom(object):
         self.font_sizes_mid   =   [80,64]
         
 
-def rand_bottom(graphemes,numbers,bottom):
+def rand_bottom(graphemes,numbers,bottom,rng=random):
     '''
         generates random head data
         args:
             graphemes   :   list of valid graphemes to use
             numbers     :   list of valid number to use
             bottom       :   bottom class
+            rng          :   the random generator
     '''
     # add line sections
     bottom.font_size=bottom.font_sizes_mid[0]
-    bottom.sender_line.append({"line":rand_line(bottom,graphemes,numbers),"font_size":bottom.font_size})
-    bottom.reciver_line.append({"line":rand_line(bottom,graphemes,numbers),"font_size":bottom.font_size})
+    bottom.sender_line.append({"line":rand_line(bottom,graphemes,numbers,rng=rng),"font_size":bottom.font_size})
+    bottom.reciver_line.append({"line":rand_line(bottom,graphemes,numbers,rng=rng),"font_size":bottom.font_size})
     bottom.num_word_max=5
     bottom.num_word_max=3
-    bottom.middle_line.append({"line":rand_line(bottom,graphemes,numbers),"font_size":bottom.font_size})
+    bottom.middle_line.append({"line":rand_line(bottom,graphemes,numbers,rng=rng),"font_size":bottom.font_size})
     
     return bottom
 #--------------------
@@ -258,13 +262,12 @@ class Placement(object):
         self.rot_weights     = [0.3,0.7]
         self.max_noise       = 3
 
-def rand_hw_word(df,min_word_len,max_word_len):
+def rand_hw_word(comp_set,min_word_len,max_word_len,rng=random):
     '''
         comps for handwritten word
     '''
     comps=[]
-    len_word=random.randint(min_word_len,max_word_len)
+    len_word=rng.randint(min_word_len,max_word_len)
     for _ in range(len_word):
-        idx=random.randint(0,len(df)-1)
-        comps.append(df.iloc[idx,1])
+        comps.append(comp_set.sample(rng=rng))
     return comps  
\ No newline at end of file
@@ -23,6 +23,9 @@ from .memo import rand_head,rand_products,rand_word,rand_bottom,rand_hw_word
 from .word import createPrintedLine,handleExtensions,createHandwritenWords
 from .table import createTable,tableTextRegions
 
+from coreLib.fonts import listFonts,getFont
+from coreLib.utils import stackMaps,splitMaps
+from coreLib.profiling import timed
 from .utils import padToFixedHeightWidth,padAllAround,placeWordOnMask,rotate_image,draw_random_noise
 #----------------------------
 # render capacity: toolset
@@ -34,5 +37,5 @@ def renderFontMaps(LineSection,font_path):
     maps={}
     sizes=LineSection.font_sizes_big+LineSection.font_sizes_mid
     for size in sizes:
-        maps[str(size)]=PIL.ImageFont.truetype(font_path, size=size)
+        maps[str(size)]=getFont(font_path,size)
     return maps
\ No newline at end of file
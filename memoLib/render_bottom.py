@@ -10,7 +10,8 @@ from .render import *
 #----------------------------
 # render capacity: bottom 
 #----------------------------
-def renderMemoBottom(ds,language,max_width,pad_dim=10):
+@timed("bottom")
+def renderMemoBottom(ds,language,max_width,pad_dim=10,rng=random):
     """
         @function author:        
         Create image of table part of Memo
@@ -18,6 +19,7 @@ def renderMemoBottom(ds,language,max_width,pad_dim=10):
             ds         = dataset object that holds all the paths and resources
             language   = a specific language to use
             iden       = a specific identifier for marking    
+            rng        = the random generator
         
     """
     #--------------------------------------------
@@ -27,29 +29,21 @@ def renderMemoBottom(ds,language,max_width,pad_dim=10):
     if language=="bangla":
         graphemes =ds.bangla_graphemes
         numbers   =ds.bangla.number_values
-        font_paths=[font_path for font_path in glob(os.path.join(ds.bangla.fonts,"*.*")) if "ANSI" not in font_path and "Lohit" not in font_path]
-        g_df     =ds.bangla.graphemes.df 
-        n_df     =ds.bangla.numbers.df 
+        font_paths=listFonts(ds.bangla.fonts,exclude=("ANSI","Lohit"))
 
     else:
         graphemes =  list(string.ascii_lowercase)
         numbers   =  [str(i) for i in range(10)]
-        font_paths=[font_path for font_path in glob(os.path.join(ds.english.fonts,"*.*"))]
-        g_df     =ds.english.graphemes.df 
-        n_df     =ds.english.numbers.df 
+        font_paths=listFonts(ds.english.fonts)
 
-    sdf         =  ds.common.symbols.df
-    nsdf        =  pd.concat([n_df,sdf],ignore_index=True)
-    gsdf        =  pd.concat([g_df,sdf],ignore_index=True)
-    adf         =  pd.concat([n_df,g_df,sdf],ignore_index=True)
     noise_signs =  [img_path for img_path in glob(os.path.join(ds.common.noise.sign,"*.bmp"))]
     #--------------------------------------------
     # text gen section
     #--------------------------------------------
     bottom=Bottom()
-    maps=renderFontMaps(bottom,random.choice(font_paths))
+    maps=renderFontMaps(bottom,rng.choice(font_paths))
     # fill-up texts
-    bottom=rand_bottom(graphemes,numbers,bottom)
+    bottom=rand_bottom(graphemes,numbers,bottom,rng=rng)
     ## image
     h_max=0
     w_max=0
@@ -98,7 +92,7 @@ def renderMemoBottom(ds,language,max_width,pad_dim=10):
     sign_wmap=padToFixedHeightWidth(sign_wmap,height,max_width)
     
     # print_mask
-    if random.choice([0,1])==1:
+    if rng.choice([0,1])==1:
         printed=np.concatenate([sign_img,mid_img],axis=0)
         cmap=np.concatenate([sign_cmap,mid_cmap],axis=0)
         wmap=np.concatenate([sign_wmap,mid_wmap],axis=0)
@@ -120,15 +114,15 @@ def renderMemoBottom(ds,language,max_width,pad_dim=10):
     #######################
     
     # place bottom
-    noise_num=random.choice([1,2])
+    noise_num=rng.choice([1,2])
     region_values=sorted(np.unique(region))[1:]
     hw=np.zeros_like(region)
     for i in range(noise_num):
-        word=cv2.imread(random.choice(noise_signs),0)
+        word=cv2.imread(rng.choice(noise_signs),0)
         word=255-word
         word[word>0]=1
         reg_val=region_values[i]
-        hw+=placeWordOnMask(word,region,reg_val,hw,ext_reg=True,fill=False,ext=(10,30))
+        hw+=placeWordOnMask(word,region,reg_val,hw,ext_reg=True,fill=False,ext=(10,30),rng=rng)
     img+=hw
     img[img>0]=255
     h,w=img.shape
@@ -10,7 +10,8 @@ from .render import *
 #----------------------------
 # render capacity: memo head
 #----------------------------
-def renderMemoHead(ds,language,max_width):
+@timed("head")
+def renderMemoHead(ds,language,max_width,rng=random):
 
 
     """
@@ -19,6 +20,7 @@ def renderMemoHead(ds,language,max_width):
         args:
             ds         = dataset object that holds all the paths and resources
             language   = a specific language to use
+            rng        = the random generator
     """
     #--------------------------------------------
     # resources
@@ -27,21 +29,23 @@ def renderMemoHead(ds,language,max_width):
     if language=="bangla":
         graphemes =ds.bangla_graphemes
         numbers   =ds.bangla.number_values
-        font_paths=[font_path for font_path in glob(os.path.join(ds.bangla.fonts,"*.*")) if "ANSI" not in font_path and "Lohit" not in font_path]
-        g_df     =ds.bangla.graphemes.df 
-        n_df     =ds.bangla.numbers.df 
+        font_paths=listFonts(ds.bangla.fonts,exclude=("ANSI","Lohit"))
+        g_comps  =ds.bangla.graphemes.comps
+        n_comps  =ds.bangla.numbers.comps
+        ns_comps =ds.bangla.number_symbols
+        gs_comps =ds.bangla.grapheme_symbols
+        a_comps  =ds.bangla.all_comps
 
     else:
         graphemes =  list(string.ascii_lowercase)
         numbers   =  [str(i) for i in range(10)]
-        font_paths=[font_path for font_path in glob(os.path.join(ds.english.fonts,"*.*"))]
-        g_df     =ds.english.graphemes.df 
-        n_df     =ds.english.numbers.df 
+        font_paths=listFonts(ds.english.fonts)
+        g_comps  =ds.english.graphemes.comps
+        n_comps  =ds.english.numbers.comps
+        ns_comps =ds.english.number_symbols
+        gs_comps =ds.english.grapheme_symbols
+        a_comps  =ds.english.all_comps
 
-    sdf         =  ds.common.symbols.df
-    nsdf        =  pd.concat([n_df,sdf],ignore_index=True)
-    gsdf        =  pd.concat([g_df,sdf],ignore_index=True)
-    adf         =  pd.concat([n_df,g_df,sdf],ignore_index=True)
     #--------------------------------------------
     # text gen section
     #--------------------------------------------
@@ -49,9 +53,9 @@ def renderMemoHead(ds,language,max_width):
     lineSection=LineSection()
     lineWithExtension=LineWithExtension()
     place=Placement()
-    head=rand_head(graphemes,numbers,head,lineSection,lineWithExtension)
-    maps=renderFontMaps(lineSection,random.choice(font_paths))
-    ext_sym=random.choice(lineWithExtension.ext_symbols)
+    head=rand_head(graphemes,numbers,head,lineSection,lineWithExtension,rng=rng)
+    maps=renderFontMaps(lineSection,rng.choice(font_paths))
+    ext_sym=rng.choice(lineWithExtension.ext_symbols)
     #--------------------------------------------
     # image gen section
     #--------------------------------------------
@@ -188,7 +192,7 @@ def renderMemoHead(ds,language,max_width):
             ext_word=handleExtensions(ext_sym,maps[str(lineSection.font_sizes_mid[-1])],width)
             if ext_word is not None:
                 # place
-                ext_data+=placeWordOnMask(ext_word,img,v,ext_data,fill=True)
+                ext_data+=placeWordOnMask(ext_word,img,v,ext_data,fill=True,rng=rng)
                 img[img==v]=0
                 
     img=img+ext_data
@@ -204,19 +208,19 @@ def renderMemoHead(ds,language,max_width):
         max_regs=len(region_values)
         if max_regs<place.head_min:
             place.head_min=max_regs
-        len_regs=random.randint(place.head_min,max_regs)
+        len_regs=rng.randint(place.head_min,max_regs)
         
         for i in range(len_regs):
-            reg_val=random.choice(region_values)
+            reg_val=rng.choice(region_values)
             region_values.remove(reg_val)
-            df=random.choice([g_df,gsdf,adf,nsdf])
-            comps=rand_hw_word(df,place.min_word_len,place.max_word_len)
-            word,wcmap,wwmap=createHandwritenWords(df,comps,PAD,place.comp_dim)
+            comp_set=rng.choice([g_comps,gs_comps,a_comps,ns_comps])
+            comps=rand_hw_word(comp_set,place.min_word_len,place.max_word_len,rng=rng)
+            word,wcmap,wwmap=createHandwritenWords(comp_set,comps,PAD,place.comp_dim,ds.glyphs,rng=rng)
             # words
-            ext=random.randint(10,30)
-            hw+=placeWordOnMask(word,region,reg_val,hw,ext_reg=True,fill=False,ext=ext)
-            cmap+=placeWordOnMask(wcmap,region,reg_val,cmap,ext_reg=True,fill=False,ext=ext)
-            wmap+=placeWordOnMask(wwmap,region,reg_val,wmap,ext_reg=True,fill=False,ext=ext)
+            ext=rng.randint(10,30)
+            hw+=placeWordOnMask(word,region,reg_val,hw,ext_reg=True,fill=False,ext=ext,rng=rng)
+            cmap+=placeWordOnMask(wcmap,region,reg_val,cmap,ext_reg=True,fill=False,ext=ext,rng=rng)
+            wmap+=placeWordOnMask(wwmap,region,reg_val,wmap,ext_reg=True,fill=False,ext=ext,rng=rng)
         
     #-----------------------------------
     # image form
@@ -10,13 +10,15 @@ from .render import *
 #----------------------------
 # render capacity: table 
 #----------------------------
-def renderMemoTable(ds,language):
+@timed("table")
+def renderMemoTable(ds,language,rng=random):
     """
         @function author:        
         Create image of table part of Memo
         args:
             ds         = dataset object that holds all the paths and resources
             language   = a specific language to use
+            rng        = the random generator
                
     """
     #--------------------------------------------
@@ -26,28 +28,30 @@ def renderMemoTable(ds,language):
     if language=="bangla":
         graphemes =ds.bangla_graphemes
         numbers   =ds.bangla.number_values
-        font_paths=[font_path for font_path in glob(os.path.join(ds.bangla.fonts,"*.*")) if "ANSI" not in font_path and "Lohit" not in font_path]
-        g_df     =ds.bangla.graphemes.df 
-        n_df     =ds.bangla.numbers.df 
+        font_paths=listFonts(ds.bangla.fonts,exclude=("ANSI","Lohit"))
+        g_comps  =ds.bangla.graphemes.comps
+        n_comps  =ds.bangla.numbers.comps
+        ns_comps =ds.bangla.number_symbols
+        gs_comps =ds.bangla.grapheme_symbols
+        a_comps  =ds.bangla.all_comps
 
     else:
         graphemes =  list(string.ascii_lowercase)
         numbers   =  [str(i) for i in range(10)]
-        font_paths=[font_path for font_path in glob(os.path.join(ds.english.fonts,"*.*"))]
-        g_df     =ds.english.graphemes.df 
-        n_df     =ds.english.numbers.df 
+        font_paths=listFonts(ds.english.fonts)
+        g_comps  =ds.english.graphemes.comps
+        n_comps  =ds.english.numbers.comps
+        ns_comps =ds.english.number_symbols
+        gs_comps =ds.english.grapheme_symbols
+        a_comps  =ds.english.all_comps
 
-    sdf         =  ds.common.symbols.df
-    nsdf        =  pd.concat([n_df,sdf],ignore_index=True)
-    gsdf        =  pd.concat([g_df,sdf],ignore_index=True)
-    adf         =  pd.concat([n_df,g_df,sdf],ignore_index=True)
     #--------------------------------------------
     # product
     #--------------------------------------------
     table=Table()
     place=Placement()
-    maps=renderFontMaps(table,random.choice(font_paths))
-    table=rand_products(graphemes,numbers,table)
+    maps=renderFontMaps(table,rng.choice(font_paths))
+    table=rand_products(graphemes,numbers,table,rng=rng)
     #--------------------------------------------
     # fill-up products
     #--------------------------------------------
@@ -94,24 +98,24 @@ def renderMemoTable(ds,language):
     w_prod      =   prod_images[0].shape[1]
     ##serial
     if language=="bangla":
-        word=random.choice(table.serial["bn"])
+        word=rng.choice(table.serial["bn"])
     else:
-        word=random.choice(table.serial["en"])
+        word=rng.choice(table.serial["en"])
     img,cmap,wmap=createPrintedLine(word,font=maps[str(font_size)])
     header_images.append(padToFixedHeightWidth(img,cell_height,img.shape[1]+2*table.pad_dim))
     header_cmaps.append(padToFixedHeightWidth(cmap,cell_height,img.shape[1]+2*table.pad_dim))
     header_wmaps.append(padToFixedHeightWidth(wmap,cell_height,img.shape[1]+2*table.pad_dim))
     
     ##column headers
-    for i in range(random.randint(table.num_extCOL_min,table.num_extCOL_max)):
-        num_words=random.choice([1,2])
+    for i in range(rng.randint(table.num_extCOL_min,table.num_extCOL_max)):
+        num_words=rng.choice([1,2])
         _imgs=[]
         _cmaps=[]
         _wmaps=[]
         _hmax=0
         _wmax=0
         for _ in range(num_words):
-            word=rand_word(graphemes,None,table.word_len_max,table.word_len_min)
+            word=rand_word(graphemes,None,table.word_len_max,table.word_len_min,rng=rng)
             img,cmap,wmap=createPrintedLine(word,font=maps[str(font_size)])
             _imgs.append(img)
             _cmaps.append(cmap)
@@ -154,7 +158,7 @@ def renderMemoTable(ds,language):
         
 
     # fill total
-    word=rand_word(graphemes,None,table.word_len_max,table.word_len_min)
+    word=rand_word(graphemes,None,table.word_len_max,table.word_len_min,rng=rng)
     img,cmap,wmap=createPrintedLine(word[:-1],font=maps[str(font_size)])
     
     total_img=padToFixedHeightWidth(img,cell_height,img.shape[1]+2*table.pad_dim)
@@ -189,7 +193,7 @@ def renderMemoTable(ds,language):
     
     # dilate table
     table_mask=255-table_mask
-    ksize=random.randint(3,10)
+    ksize=rng.randint(3,10)
     kernel = np.ones((ksize,ksize), np.uint8)
     table_mask= cv2.dilate(table_mask, kernel, iterations=1)
     table_mask=255-table_mask
@@ -202,32 +206,32 @@ def renderMemoTable(ds,language):
     #{"serial":slt_serial, "brand":slt_brand,"total":slt_total,"others":slt_others}
     header_regions=[regions["serial"][0]]+[regions["brand"][0]]+regions["others"]
     for reg_val,word,cmap,wmap in zip(header_regions,header_images,header_cmaps,header_wmaps):
-        printed+=placeWordOnMask(word,region,reg_val,printed,fill=True)
-        printed_cmap+=placeWordOnMask(cmap,region,reg_val,printed_cmap,fill=True)
-        printed_wmap+=placeWordOnMask(wmap,region,reg_val,printed_wmap,fill=True)
+        printed+=placeWordOnMask(word,region,reg_val,printed,fill=True,rng=rng)
+        printed_cmap+=placeWordOnMask(cmap,region,reg_val,printed_cmap,fill=True,rng=rng)
+        printed_wmap+=placeWordOnMask(wmap,region,reg_val,printed_wmap,fill=True,rng=rng)
         region[region==reg_val]=0
 
     # total fillup
-    printed+=placeWordOnMask(total_img,region,regions["total"][0],printed,fill=True)
-    printed_cmap+=placeWordOnMask(total_cmap,region,regions["total"][0],printed_cmap,fill=True)
-    printed_wmap+=placeWordOnMask(total_wmap,region,regions["total"][0],printed_wmap,fill=True)
+    printed+=placeWordOnMask(total_img,region,regions["total"][0],printed,fill=True,rng=rng)
+    printed_cmap+=placeWordOnMask(total_cmap,region,regions["total"][0],printed_cmap,fill=True,rng=rng)
+    printed_wmap+=placeWordOnMask(total_wmap,region,regions["total"][0],printed_wmap,fill=True,rng=rng)
     
     region[region==regions["total"][0]]=0
     # product fillup
     product_regions=regions["brand"][1:]
     for reg_val,word,cmap,wmap in zip(product_regions,prod_images,prod_cmaps,prod_wmaps):
-        printed+=placeWordOnMask(word,region,reg_val,printed,fill=True)
-        printed_cmap+=placeWordOnMask(cmap,region,reg_val,printed_cmap,fill=True)
-        printed_wmap+=placeWordOnMask(wmap,region,reg_val,printed_wmap,fill=True)
+        printed+=placeWordOnMask(word,region,reg_val,printed,fill=True,rng=rng)
+        printed_cmap+=placeWordOnMask(cmap,region,reg_val,printed_cmap,fill=True,rng=rng)
+        printed_wmap+=placeWordOnMask(wmap,region,reg_val,printed_wmap,fill=True,rng=rng)
         
         region[region==reg_val]=0
     
     # serial fillup
     serial_regions=regions["serial"][1:]
     for reg_val,word,cmap,wmap in zip(serial_regions,serial_images,serial_cmaps,serial_wmaps):
-        printed+=placeWordOnMask(word,region,reg_val,printed,fill=True)
-        printed_cmap+=placeWordOnMask(cmap,region,reg_val,printed_cmap,fill=True)
-        printed_wmap+=placeWordOnMask(wmap,region,reg_val,printed_wmap,fill=True)
+        printed+=placeWordOnMask(word,region,reg_val,printed,fill=True,rng=rng)
+        printed_cmap+=placeWordOnMask(cmap,region,reg_val,printed_cmap,fill=True,rng=rng)
+        printed_wmap+=placeWordOnMask(wmap,region,reg_val,printed_wmap,fill=True,rng=rng)
         
         region[region==reg_val]=0
 
@@ -248,31 +252,30 @@ def renderMemoTable(ds,language):
     max_regs=len(region_values)
     if max_regs<place.table_min:
         place.table_min=max_regs
-    len_regs=random.randint(place.table_min,place.table_min*2)
+    len_regs=rng.randint(place.table_min,place.table_min*2)
     
     hw=np.zeros_like(region)
     table_cmap=np.zeros_like(region)
     table_wmap=np.zeros_like(region)
     for i in range(len_regs):
-        reg_val=random.choice(region_values)
+        reg_val=rng.choice(region_values)
         region_values.remove(reg_val)
-        df=random.choice([n_df,nsdf])
-        comps=rand_hw_word(df,place.min_num_len,place.max_num_len)
-        word,cmap,wmap=createHandwritenWords(df,comps,PAD,place.comp_dim)
+        comp_set=rng.choice([n_comps,ns_comps])
+        comps=rand_hw_word(comp_set,place.min_num_len,place.max_num_len,rng=rng)
+        word,cmap,wmap=createHandwritenWords(comp_set,comps,PAD,place.comp_dim,ds.glyphs,rng=rng)
         
-        if random.choices(population=[1,0],weights=place.rot_weights,k=1)[0]==1:
-            angle=random.randint(place.min_rot,place.max_rot)
-            angle=random.choice([angle,-1*angle])
-            word=rotate_image(word,angle)
-            wmap=rotate_image(wmap,angle)
-            cmap=rotate_image(cmap,angle)
+        if rng.choices(population=[1,0],weights=place.rot_weights,k=1)[0]==1:
+            angle=rng.randint(place.min_rot,place.max_rot)
+            angle=rng.choice([angle,-1*angle])
+            maps,dtypes=stackMaps(word,wmap,cmap)
+            word,wmap,cmap=splitMaps(rotate_image(maps,angle),dtypes)
             
-        ext=random.randint(0,30)
-        ext_reg=random.choice([True,False])
+        ext=rng.randint(0,30)
+        ext_reg=rng.choice([True,False])
         # words
-        hw+=placeWordOnMask(word,region,reg_val,hw,ext_reg=ext_reg,fill=True,ext=ext)
-        table_cmap+=placeWordOnMask(cmap,region,reg_val,table_cmap,ext_reg=ext_reg,fill=True,ext=ext)
-        table_wmap+=placeWordOnMask(wmap,region,reg_val,table_wmap,ext_reg=ext_reg,fill=True,ext=ext)
+        hw+=placeWordOnMask(word,region,reg_val,hw,ext_reg=ext_reg,fill=True,ext=ext,rng=rng)
+        table_cmap+=placeWordOnMask(cmap,region,reg_val,table_cmap,ext_reg=ext_reg,fill=True,ext=ext,rng=rng)
+        table_wmap+=placeWordOnMask(wmap,region,reg_val,table_wmap,ext_reg=ext_reg,fill=True,ext=ext,rng=rng)
     
     # returning
     img=img+hw
@@ -289,9 +292,9 @@ def renderMemoTable(ds,language):
     rgb[img==255]=(0,0,0)
     
     # add noise
-    num_noise  =  random.randint(1,5)
+    num_noise  =  rng.randint(1,5)
     for _ in range(num_noise):
-        reg_val=random.choice(region_values)
-        rgb=draw_random_noise(region,reg_val,rgb)
+        reg_val=rng.choice(region_values)
+        rgb=draw_random_noise(region,reg_val,rgb,rng=rng)
 
     return rgb,cmap,wmap
@@ -102,7 +102,7 @@ def padAllAround(img,pad_dim):
     return img
 
 #---------------------------------------------------------------
-def placeWordOnMask(word,labeled_img,region_value,mask_ref,ext_reg=False,fill=False,ext=(0,10)):
+def placeWordOnMask(word,labeled_img,region_value,mask_ref,ext_reg=False,fill=False,ext=(0,10),rng=random):
     '''
         @author
         places a specific image on a given background at a specific location
@@ -113,6 +113,7 @@ def placeWordOnMask(word,labeled_img,region_value,mask_ref,ext_reg=False,fill=Fa
             mask               :   placement mask
             ext_reg            :   extend the region to place
             fill
+            rng                :   the random generator
         return:
             mak :   mask image after placing 'img'
     '''
@@ -130,8 +131,8 @@ def placeWordOnMask(word,labeled_img,region_value,mask_ref,ext_reg=False,fill=Fa
             w_ext=int((ext*w_reg)/100)
         else:        
             # ext
-            h_ext=int((random.randint(ext[0],ext[1])*h_reg)/100)
-            w_ext=int((random.randint(ext[0],ext[1])*w_reg)/100)
+            h_ext=int((rng.randint(ext[0],ext[1])*h_reg)/100)
+            w_ext=int((rng.randint(ext[0],ext[1])*w_reg)/100)
         # region ext
         if y_min-h_ext>0:y_min-=h_ext # extend min height
         if y_max+h_ext<=h_li:y_max+=h_ext # extend max height
@@ -157,11 +158,11 @@ def placeWordOnMask(word,labeled_img,region_value,mask_ref,ext_reg=False,fill=Fa
     mask[y_min:y_max,x_min:x_max]=word
     return mask
 #---------------------------------------------------------------
-def randColor():
+def randColor(rng=random):
     '''
         generates random color
     '''
-    return (random.randint(0,255),random.randint(0,255),random.randint(0,255))
+    return (rng.randint(0,255),rng.randint(0,255),rng.randint(0,255))
 #---------------------------------------------------------------
 def gaussian_heatmap(size=512, distanceRatio=2):
     '''
@@ -280,7 +281,7 @@ def rotate_image(mat, angle):
     return rotated_mat
 
 #---------------------------------------------------------------
-def draw_random_noise(bin_img,bin_val,img):
+def draw_random_noise(bin_img,bin_val,img,rng=random):
     '''
         draws random poly
     '''
@@ -288,14 +289,14 @@ def draw_random_noise(bin_img,bin_val,img):
     h,w,d=img.shape
     min_dim=min(h,w)
 
-    num_points=random.randint(min_dim//10,min_dim//5)
-    rand_idx1 = random.choice(y_idx)   #randomly choose any element in the x_idx list
+    num_points=rng.randint(min_dim//10,min_dim//5)
+    rand_idx1 = rng.choice(y_idx)   #randomly choose any element in the x_idx list
     x1 = x_idx[rand_idx1]
     y1 = y_idx[rand_idx1] 
     for i in range(0,num_points):
-        x2 = x1+random.randint(-10,10)
-        y2 = y1+random.randint(5,30)
-        cv2.line(img,(x1,y1),(x2,y2),(0,0,0),random.randint(2,10))
+        x2 = x1+rng.randint(-10,10)
+        y2 = y1+rng.randint(5,30)
+        cv2.line(img,(x1,y1),(x2,y2),(0,0,0),rng.randint(2,10))
         x1=x2
         y1=y2 
             
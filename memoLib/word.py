@@ -16,6 +16,8 @@ import random
 import pandas as pd 
 
 from .utils import stripPads,GraphemeParser,gaussian_heatmap
+from coreLib.fonts import textMetrics
+from coreLib.atlas import getAtlas,blitComps
 GP=GraphemeParser()
 heatmap=gaussian_heatmap(size=512,distanceRatio=1.5)
 #-----------------------------------
@@ -25,10 +27,11 @@ def handleExtensions(ext,font,max_width):
     '''
         creates/ adds extensions to lines
     '''
-    width = font.getsize(ext)[0]
+    size = textMetrics(font,ext).size
+    width = size[0]
     
     # draw
-    image = PIL.Image.new(mode='L', size=font.getsize(ext))
+    image = PIL.Image.new(mode='L', size=size)
     draw = PIL.ImageDraw.Draw(image)
     draw.text(xy=(0, 0), text=ext, fill=1, font=font)
     num_ext=max_width//width
@@ -51,11 +54,26 @@ def createPrintedLine(text,font):
             char_map:       c-heatmap
             word_map:       w-heatmap
     '''
+    size=textMetrics(font,text).size
+    img=None
+    # atlas: blit the graphemes of the line
+    atlas=getAtlas(font)
+    if atlas is not None:
+        comps=[]
+        for idx,word in enumerate(text.split(' ')):
+            if idx>0:
+                comps.append(' ')
+            comps+=GP.word2grapheme(word)
+        if "".join(comps)==text:
+            marked=blitComps(atlas,font,comps,size)
+            if marked is not None:
+                img=(marked>0).astype(np.uint8)
     # draw
-    image = PIL.Image.new(mode='L', size=font.getsize(text))
-    draw = PIL.ImageDraw.Draw(image)
-    draw.text(xy=(0, 0), text=text, fill=1, font=font)
-    img= np.array(image)
+    if img is None:
+        image = PIL.Image.new(mode='L', size=size)
+        draw = PIL.ImageDraw.Draw(image)
+        draw.text(xy=(0, 0), text=text, fill=1, font=font)
+        img= np.array(image)
     img_h,img_w=img.shape
     # heatmap per component
     words=text.split()
@@ -63,11 +81,11 @@ def createPrintedLine(text,font):
     char_maps=[]
     word_maps=[]
     for idx,word in enumerate(words):
-        width,_=font.getsize(word)
+        width,_=textMetrics(font,word).size
         if idx==0:
             curr_width+=width
         else:
-            space_width,_=font.getsize(word+' ')
+            space_width,_=textMetrics(font,word+' ').size
             curr_width+=space_width
             
         comps=GP.word2grapheme(word)
@@ -117,14 +135,16 @@ def createPrintedLine(text,font):
 #-----------------------------------
 # hw image
 #----------------------------------
-def createHandwritenWords(df,
+def createHandwritenWords(comp_set,
                          comps,
                          pad,
-                         comp_dim):
+                         comp_dim,
+                         glyphs,
+                         rng=random):
     '''
         creates handwriten word image
         args:
-            df      :       the dataframe that holds the file name and label
+            comp_set:       the component set (labels and image paths) to draw from
             comps   :       the list of components 
             pad     :       pad class:
                                 no_pad_dim
@@ -133,6 +153,8 @@ def createHandwritenWords(df,
                                 top
                                 botimg
             comp_dim:       component dimension 
+            glyphs  :       the glyph store of the dataset
+            rng     :       the random generator
         returns:
             img     :       image
             char_map:       c-heatmap
@@ -164,12 +186,12 @@ def createHandwritenWords(df,
     imgs=[]
     char_maps=[]
     for cidx,comp in enumerate(comps):
-        c_df=df.loc[df.label==comp]
+        c_paths=comp_set.label_paths[comp]
         # select a image file
-        idx=random.randint(0,len(c_df)-1)
-        img_path=c_df.iloc[idx,2] 
-        # read image
-        img=cv2.imread(img_path,0)
+        idx=rng.randint(0,len(c_paths)-1)
+        img_path=c_paths[idx] 
+        # binary glyph
+        img=glyphs.get(img_path)
         h,w=img.shape
         char_map=cv2.resize(heatmap,(w,h),fx=0,fy=0, interpolation = cv2.INTER_NEAREST)
         
@@ -181,13 +203,13 @@ def createHandwritenWords(df,
             
             if tp:
                 h,w=img.shape
-                top=np.ones((pad.height,w))*255
+                top=np.zeros((pad.height,w))
                 img=np.concatenate([top,img],axis=0)
                 char_map=np.concatenate([np.zeros_like(top),char_map],axis=0)
                 
             if bp:
                 h,w=img.shape
-                bot=np.ones((pad.height,w))*255
+                bot=np.zeros((pad.height,w))
                 img=np.concatenate([img,bot],axis=0)
                 char_map=np.concatenate([char_map,np.zeros_like(bot)],axis=0)
                 
@@ -197,7 +219,7 @@ def createHandwritenWords(df,
             
             if bp:
                 h,w=img.shape
-                bot=np.ones((pad.height,w))*255
+                bot=np.zeros((pad.height,w))
                 img=np.concatenate([img,bot],axis=0)
                 char_map=np.concatenate([char_map,np.zeros_like(bot)],axis=0)
             
@@ -206,7 +228,7 @@ def createHandwritenWords(df,
             char_map=cv2.resize(char_map,pad.single_pad_dim,fx=0,fy=0, interpolation = cv2.INTER_NEAREST)
             if tp:
                 h,w=img.shape
-                top=np.ones((pad.height,w))*255
+                top=np.zeros((pad.height,w))
                 img=np.concatenate([top,img],axis=0)
                 char_map=np.concatenate([np.zeros_like(top),char_map],axis=0)
                 
@@ -219,9 +241,6 @@ def createHandwritenWords(df,
         
         
         
-        # mark image
-        img=255-img
-        img[img>0]=1
         imgs.append(img)
         char_maps.append(char_map)
         
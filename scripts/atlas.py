@@ -0,0 +1,39 @@
+# -*-coding: utf-8 -
+'''
+    @author:  MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import sys
+sys.path.append('../')
+
+import argparse
+import os
+
+from coreLib.dataset import DataSet
+from coreLib.atlas import createAtlases
+from coreLib.utils import LOG_INFO
+#--------------------
+# main
+#--------------------
+def main(args):
+    data_dir=args.data_dir
+    save_dir=args.save_dir if args.save_dir is not None else os.path.join(data_dir,"atlas")
+    os.makedirs(save_dir,exist_ok=True)
+    ds=DataSet(data_dir)
+    createAtlases(ds,save_dir,[int(size) for size in args.sizes])
+    LOG_INFO(f"Atlas:{save_dir}")
+
+#-----------------------------------------------------------------------------------
+
+if __name__=="__main__":
+    '''
+        parsing and execution
+    '''
+    parser = argparse.ArgumentParser("Printed Component Atlas Creation Script")
+    parser.add_argument("data_dir", help="Path of the base folder under source data folder ")
+    parser.add_argument("--save_dir",required=False,default=None,help ="folder to save the atlases in : default=None (data_dir/atlas)")
+    parser.add_argument("--sizes",nargs='+',required=False,default=[64],help ="font sizes to render [synthetic/craft: --cfg_comp_dim, memo: 64 80 96 112 128] : default=64")
+    args = parser.parse_args()
+    main(args)
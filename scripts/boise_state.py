@@ -17,6 +17,7 @@ import cv2
 import matplotlib.pyplot as plt
 from coreLib.utils import *
 from coreLib.craft import gaussian_heatmap,get_maps
+from coreLib.writer import AsyncWriter
 from glob import glob
 from tqdm.auto import tqdm
 tqdm.pandas()
@@ -137,6 +138,7 @@ def main(args):
     dim=(args.height,args.width)
 
     gheatmap=gaussian_heatmap(size=512,distanceRatio=1.5)
+    writer=AsyncWriter(num_threads=int(args.write_threads),compression=args.png_compression)
     for img_path in tqdm(df.image.unique()):
         idf=df.loc[df.image==img_path]
         #-------------
@@ -177,12 +179,14 @@ def main(args):
         link_map,_=padDetectionImage(link_map,gray=True,pad_value=0)
             
         img=cv2.resize(img,dim)
-        cv2.imwrite(os.path.join(img_dir,f"{iden}.png"),img)
         heat_map=cv2.resize(heat_map,dim,fx=0,fy=0,interpolation = cv2.INTER_NEAREST)
-        cv2.imwrite(os.path.join(hmap_dir,f"{iden}.png"),heat_map)
         link_map=cv2.resize(link_map,dim,fx=0,fy=0,interpolation = cv2.INTER_NEAREST)
-        cv2.imwrite(os.path.join(lmap_dir,f"{iden}.png"),link_map)
+        writer.writeGroup([(os.path.join(img_dir,f"{iden}.png"),img),
+                           (os.path.join(hmap_dir,f"{iden}.png"),heat_map),
+                           (os.path.join(lmap_dir,f"{iden}.png"),link_map)])
         iden+=1
+    # write errors are raised here
+    writer.close()
 
 if __name__=="__main__":
     '''
@@ -193,6 +197,8 @@ if __name__=="__main__":
     parser.add_argument("save_path", help="Path to save the processed data")
     parser.add_argument("--height",required=False,default=786,help ="height dimension of the image : default=786")
     parser.add_argument("--width",required=False,default=786,help ="width dimension of the image : default=786")
+    parser.add_argument("--write_threads",required=False,default=2,help ="number of threads to encode and write the images with : default=2")
+    parser.add_argument("--png_compression",required=False,default=None,help ="png compression level [0-9] : default=None (opencv default)")
     args = parser.parse_args()
     main(args)
     
\ No newline at end of file
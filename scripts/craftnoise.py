@@ -11,13 +11,17 @@ sys.path.append('../')
 import argparse
 import os
 import cv2
+import random
 
 from coreLib.dataset import DataSet
 from coreLib.config import config
 
 from coreLib.rendermaps import createNoisyMaps
 from coreLib.craft  import gaussian_heatmap
-from coreLib.utils import create_dir,LOG_INFO 
+from coreLib.utils import create_dir,sampleRandom,LOG_INFO 
+from coreLib.writer import AsyncWriter
+from coreLib.shards import ShardWriter,SHARD_FORMATS
+from coreLib.atlas import useAtlas
 from tqdm import tqdm
 
 #--------------------
@@ -55,14 +59,16 @@ def set_config(args):
     
 
 
-def saveModeData(ds,nb,mode,img_dim):
+def saveModeData(ds,writer,nb,mode,img_dim,seed):
     '''
         saves data based on format and mode
         args:
             ds      : datset resource
+            writer  : image writer (AsyncWriter) or shard writer (ShardWriter)
             nb      : number of data to generate
             mode    : save dirs
             img_dim : final data size
+            seed    : base seed, sample i is drawn from sampleRandom(seed,i)
     '''
     skipped=[]
     gheatmap=gaussian_heatmap(size=512,distanceRatio=config.heatmap_ratio)
@@ -70,19 +76,30 @@ def saveModeData(ds,nb,mode,img_dim):
     for i in tqdm(range(nb)):
         try:
             # data execution
-            img,hmap,lmap=createNoisyMaps(ds,gheatmap)
+            img,hmap,lmap=createNoisyMaps(ds,gheatmap,rng=sampleRandom(seed,i))
+            img =cv2.resize(img,(img_dim,img_dim))
+            lmap=cv2.resize(lmap,(img_dim,img_dim),fx=0,fy=0,interpolation=cv2.INTER_NEAREST)
+            hmap=cv2.resize(hmap,(img_dim,img_dim),fx=0,fy=0,interpolation=cv2.INTER_NEAREST)
+        except Exception as e:
+            skipped.append(i)
+            continue
+        # save (outside the try: write errors are not skipped samples)
+        if isinstance(writer,ShardWriter):
+            writer.add(i,{"image":img,"heatmap":hmap,"linkmap":lmap})
+        else:
             # data formation
             img_path =os.path.join(mode.imgs,f"img{i}.png")
             link_path=os.path.join(mode.linkmaps,f"img{i}.png")
             heat_path=os.path.join(mode.heatmaps,f"img{i}.png")
-            # save
-            cv2.imwrite(img_path,cv2.resize(img,(img_dim,img_dim)))
-            cv2.imwrite(link_path,cv2.resize(lmap,(img_dim,img_dim),fx=0,fy=0,interpolation=cv2.INTER_NEAREST))
-            cv2.imwrite(heat_path,cv2.resize(hmap,(img_dim,img_dim),fx=0,fy=0,interpolation=cv2.INTER_NEAREST))
-            
-        except Exception as e:
-            skipped.append(i)
-
+            writer.writeGroup([(img_path,img),
+                               (link_path,lmap),
+                               (heat_path,hmap)])
+    # write errors are raised here
+    if isinstance(writer,ShardWriter):
+        manifest=writer.close(img_dim=img_dim,seed=seed,skipped=skipped)
+        LOG_INFO(f"Manifest:{manifest}")
+    else:
+        writer.flush()
     LOG_INFO(f"Skipped Images:{len(skipped)}")
 
 #--------------------
@@ -96,6 +113,7 @@ def main(args):
     # dimension of the image
     img_dim    =   int(args.cfg_data_dim)
     nb_train   =   int(args.train_samples)
+    assert args.output in ["png"]+SHARD_FORMATS,"Wrong output type"
     
     #-------------------------
     # set config
@@ -112,19 +130,31 @@ def main(args):
     #-------------------------
     # resources
     # ------------------------    
-    ds=DataSet(data_dir)
+    ds=DataSet(data_dir,preload_glyphs=args.preload_glyphs,glyph_cache_size=int(args.glyph_cache_size))
+    useAtlas(args.atlas_dir)
+    # every sample is addressed by (seed,index)
+    seed=int(args.seed) if args.seed is not None else random.SystemRandom().randrange(2**32)
+    LOG_INFO(f"seed:{seed}")
     #-------------------------
     # saving
     #------------------------
     
     class save:
         dir=create_dir(save_dir,f"{ds_iden}")
-        imgs=create_dir(dir,"images")
-        heatmaps=create_dir(dir,"heatmaps")
-        linkmaps=create_dir(dir,"linkmaps")
+        # shards are saved in dir
+        if args.output=="png":
+            imgs=create_dir(dir,"images")
+            heatmaps=create_dir(dir,"heatmaps")
+            linkmaps=create_dir(dir,"linkmaps")
 
     
-    saveModeData(ds,nb_train,save,img_dim)
+    if args.output=="png":
+        writer=AsyncWriter(num_threads=int(args.write_threads),compression=args.png_compression)
+        saveModeData(ds,writer,nb_train,save,img_dim,seed)
+        writer.close()
+    else:
+        writer=ShardWriter(save.dir,fmt=args.output,shard_size=args.shard_size)
+        saveModeData(ds,writer,nb_train,save,img_dim,seed)
     
 #-----------------------------------------------------------------------------------
 
@@ -138,6 +168,15 @@ if __name__=="__main__":
     parser.add_argument("dataset_iden", help="The desired name for  the dataset.Use something that can help you remember the generation details.Example: (bangla_synth) may indicate only bangla data")
     
     parser.add_argument("--train_samples",required=False,default=10000,help ="number of train samples to create : default=10000")
+    parser.add_argument("--seed",required=False,default=None,help ="base random seed, sample i is drawn from (seed:i) : default=None (random, logged)")
+    
+    parser.add_argument("--output",required=False,default="png",help ="how to save the samples. Available:png,npz,raw,tfrecord (tfrecord needs tensorflow) : default=png")
+    parser.add_argument("--shard_size",required=False,default=128,help ="number of samples per shard (npz/raw/tfrecord outputs) : default=128")
+    parser.add_argument("--write_threads",required=False,default=2,help ="number of threads to encode and write the images with : default=2")
+    parser.add_argument("--png_compression",required=False,default=None,help ="png compression level [0-9] : default=None (opencv default)")
+    parser.add_argument("--preload_glyphs",action="store_true",help ="decode all the component bitmaps into memory at load time")
+    parser.add_argument("--atlas_dir",required=False,default=None,help ="folder of the printed component atlases to draw printed words from (see scripts/atlas.py) : default=None (drawn live)")
+    parser.add_argument("--glyph_cache_size",required=False,default=4096,help ="max number of component bitmaps to cache when not preloading : default=4096")
     
     parser.add_argument("--cfg_data_dim",required=False,default=512,help ="dimension of the image [Since only squre images are produced, providing one value is enough] : default=786")
     parser.add_argument("--cfg_comp_dim",required=False,default=64,help ="height dimension for any kind of component : default=64")
@@ -12,6 +12,9 @@ import argparse
 from memoLib.dataset import DataSet
 from memoLib.utils import create_dir,LOG_INFO
 from memoLib.joiner import create_memo_data
+from coreLib.writer import AsyncWriter
+from coreLib.utils import sampleRandom
+from coreLib.atlas import useAtlas
 from tqdm.auto import tqdm
 import os
 import cv2
@@ -25,22 +28,30 @@ def main(args):
     img_dir =create_dir(save_dir,"images")
     wmap_dir =create_dir(save_dir,"linkmaps")
     cmap_dir =create_dir(save_dir,"heatmaps")
-    n_data=args.n_data
-    ds=DataSet(data_dir)
+    n_data=int(args.n_data)
+    ds=DataSet(data_dir,preload_glyphs=args.preload_glyphs,glyph_cache_size=int(args.glyph_cache_size))
+    useAtlas(args.atlas_dir)
+    writer=AsyncWriter(num_threads=int(args.write_threads),compression=args.png_compression)
     LOG_INFO(save_dir)
+    # every sample is addressed by (seed,index)
+    seed=int(args.seed) if args.seed is not None else random.SystemRandom().randrange(2**32)
+    LOG_INFO(f"seed:{seed}")
 
 
 
     for i in tqdm(range(n_data)):
         try:
-            lang=random.choice(["bangla","english"])
-            img,cmap,wmap=create_memo_data(ds,lang,img_height=args.height)
+            rng=sampleRandom(seed,i)
+            lang=rng.choice(["bangla","english"])
+            img,cmap,wmap=create_memo_data(ds,lang,img_height=int(args.height),rng=rng)
             # save
-            cv2.imwrite(os.path.join(cmap_dir,f"{i}.png"),cmap)
-            cv2.imwrite(os.path.join(wmap_dir,f"{i}.png"),wmap)
-            cv2.imwrite(os.path.join(img_dir,f"{i}.png"),img)
+            writer.writeGroup([(os.path.join(cmap_dir,f"{i}.png"),cmap),
+                               (os.path.join(wmap_dir,f"{i}.png"),wmap),
+                               (os.path.join(img_dir,f"{i}.png"),img)])
         except Exception as e:
             pass
+    # write errors are raised here
+    writer.close()
 
 
 if __name__=="__main__":
@@ -52,6 +63,12 @@ if __name__=="__main__":
     parser.add_argument("save_dir", help="Path to save the processed data")
     parser.add_argument("--height",required=False,default=1024,help ="height dimension of the image : default=1024")
     parser.add_argument("--n_data",required=False,default=1024,help ="number of data to create : default=1024")
+    parser.add_argument("--seed",required=False,default=None,help ="base random seed, sample i is drawn from (seed:i) : default=None (random, logged)")
+    parser.add_argument("--write_threads",required=False,default=2,help ="number of threads to encode and write the images with : default=2")
+    parser.add_argument("--png_compression",required=False,default=None,help ="png compression level [0-9] : default=None (opencv default)")
+    parser.add_argument("--preload_glyphs",action="store_true",help ="decode all the component bitmaps into memory at load time")
+    parser.add_argument("--atlas_dir",required=False,default=None,help ="folder of the printed component atlases to draw printed words from (see scripts/atlas.py) : default=None (drawn live)")
+    parser.add_argument("--glyph_cache_size",required=False,default=4096,help ="max number of component bitmaps to cache when not preloading : default=4096")
     
     args = parser.parse_args()
     main(args)
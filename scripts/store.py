@@ -7,12 +7,16 @@ from __future__ import print_function
 # imports
 # ---------------------------------------------------------
 
+import sys
+sys.path.append('../')
 import os
 import tensorflow as tf 
 from tqdm import tqdm
 from glob import glob 
 import cv2 
 import argparse
+import multiprocessing as mp
+from coreLib.shards import fileHash,ShardWriter
 # ---------------------------------------------------------
 # globals
 # ---------------------------------------------------------
@@ -33,19 +37,23 @@ def create_dir(base,ext):
 def _bytes_feature(value):
     return tf.train.Feature(bytes_list=tf.train.BytesList(value=[value]))
 
-def to_tfrecord(image_paths,save_dir,r_num):
+def to_tfrecord(image_paths,save_dir,r_num,compression=None):
     '''	            
       Creates tfrecords from Provided Image Paths	        
       args:	        
         image_paths     :   specific number of image paths	       
         save_dir        :   location to save the tfrecords	           
         r_num           :   record number	
+        compression     :   None/GZIP/ZLIB
+      returns:
+        shard info for the manifest
     '''
     # record name
-    tfrecord_name='{}.tfrecord'.format(r_num)
+    tfrecord_name=f"{r_num:05d}.tfrecord"
     # path
     tfrecord_path=os.path.join(save_dir,tfrecord_name)
-    with tf.io.TFRecordWriter(tfrecord_path) as writer:    
+    options=tf.io.TFRecordOptions(compression_type=compression or "")
+    with tf.io.TFRecordWriter(tfrecord_path,options=options) as writer:    
         for image_path in image_paths:
             
             char_path=str(image_path).replace('images','heatmaps')
@@ -75,30 +83,54 @@ def to_tfrecord(image_paths,save_dir,r_num):
             example= tf.train.Example(features=features)
             serialized=example.SerializeToString()
             writer.write(serialized)
+    
+    return {"name":f"{r_num:05d}",
+            "num_samples":len(image_paths),
+            "images":[os.path.basename(image_path) for image_path in image_paths],
+            "files":{tfrecord_name:fileHash(tfrecord_path)}}
 
+def recordTask(task):
+    '''
+        writes a tfrecord within a worker process
+    '''
+    return to_tfrecord(*task)
 
-def genTFRecords(_paths,mode_dir):
+def genTFRecords(_paths,mode_dir,data_num=DATA_NUM,compression=None,workers=1):
     '''	        
         tf record wrapper
         args:	        
-            _paths    :   all image paths for a mode	        
-            mode_dir  :   location to save the tfrecords	    
-    '''
-    for i in tqdm(range(0,len(_paths),DATA_NUM)):
-        # paths
-        image_paths= _paths[i:i+DATA_NUM]
-        # record num
-        r_num=i // DATA_NUM
-        # create tfrecord
-        to_tfrecord(image_paths,mode_dir,r_num)    
+            _paths      :   all image paths for a mode	        
+            mode_dir    :   location to save the tfrecords	    
+            data_num    :   number of images to store in a tfrecord
+            compression :   None/GZIP/ZLIB
+            workers     :   number of worker processes
+        returns:
+            shard infos in record order
 
+        * a record only depends on its own slice of _paths: the output does not depend on the number of workers
+    '''
+    tasks=[(_paths[i:i+data_num],mode_dir,i//data_num,compression) for i in range(0,len(_paths),data_num)]
+    if workers<=1:
+        return [recordTask(task) for task in tqdm(tasks)]
+    # tensorflow is not fork safe: spawn the workers
+    with mp.get_context("spawn").Pool(workers) as pool:
+        return list(tqdm(pool.imap(recordTask,tasks),total=len(tasks)))
 
 
 def main(args):
+    compression=args.compression
+    assert compression in [None,"GZIP","ZLIB"],"Wrong compression type"
+    data_num=int(args.shard_size)
     save_path =create_dir(args.save_dir,"tfrecords")
     save_path =create_dir(save_path,args.ds_iden)
-    _paths=[img_path for img_path in tqdm(glob(os.path.join(args.data_dir,"*.*")))]
-    genTFRecords(_paths,save_path)
+    # sorted: the records are the same for the same input
+    _paths=sorted([img_path for img_path in tqdm(glob(os.path.join(args.data_dir,"*.*")))])
+    shards=genTFRecords(_paths,save_path,data_num=data_num,compression=compression,workers=int(args.workers))
+    # the records are written by to_tfrecord: the writer only keeps the manifest
+    writer=ShardWriter(save_path,"tfrecord",shard_size=data_num)
+    writer.merge(shards)
+    manifest=writer.close(compression=compression,shard_size=data_num)
+    print(f"Manifest:{manifest}")
 
 if __name__=="__main__":
     '''
@@ -108,5 +140,8 @@ if __name__=="__main__":
     parser.add_argument("data_dir", help="Path to the images folder")
     parser.add_argument("save_dir", help="Path to save the tfrecords")
     parser.add_argument("ds_iden", help="dataset Identifier")
+    parser.add_argument("--shard_size",required=False,default=DATA_NUM,help =f"number of images to store in a tfrecord : default={DATA_NUM}")
+    parser.add_argument("--compression",required=False,default=None,help ="tfrecord compression. Available:GZIP,ZLIB : default=None")
+    parser.add_argument("--workers",required=False,default=1,help ="number of worker processes to write the tfrecords with : default=1")
     args = parser.parse_args()
     main(args)
@@ -11,14 +11,21 @@ sys.path.append('../')
 import argparse
 import os
 import cv2
+import random
+import multiprocessing as mp
 
 from coreLib.dataset import DataSet
 from coreLib.config import config
 
-from coreLib.render import createSceneImage,backgroundGenerator,createImageData
+from coreLib.render import createSceneImage,backgroundPool,sampleBackgrounds,createImageData
 from coreLib.format import lineText,TotalText
 from coreLib.craft  import gaussian_heatmap
-from coreLib.utils import create_dir,LOG_INFO 
+from coreLib.utils import create_dir,sampleRandom,LOG_INFO 
+from coreLib.prefetch import Prefetcher
+from coreLib.writer import AsyncWriter
+from coreLib.shards import ShardWriter,importTF,SHARD_FORMATS
+from coreLib import profiling
+from coreLib.atlas import useAtlas
 from tqdm import tqdm
 
 #--------------------
@@ -56,56 +63,218 @@ def set_config(args):
     
 
 
-def saveModeData(ds,backGen,nb,mode,fmt,img_dim):
+def createSample(ds,back,gheatmap,fmt,img_dim,rng):
+    '''
+        creates a single sample
+        args:
+            ds      : datset resource
+            back    : the background of the sample
+            gheatmap: gaussian heatmap (linetext only)
+            fmt     : totaltext/linetext
+            img_dim : final data size
+            rng     : the random generator of the sample
+        returns:
+            totaltext: {"image","charmap","wordmap","annotation"}
+            linetext : {"image","heatmap","linkmap"}
+    '''
+    # data execution
+    page,labels=createSceneImage(ds,rng=rng)
+    back=createImageData(back,page,labels,rng=rng)
+    
+    if fmt=="totaltext":
+        char_mask,word_mask,text_lines=TotalText(page,labels)
+        return {"image":cv2.resize(back,(img_dim,img_dim)),
+                "charmap":cv2.resize(char_mask,(img_dim,img_dim)),
+                "wordmap":cv2.resize(word_mask,(img_dim,img_dim)),
+                "annotation":"".join(f"{line}\n" for line in text_lines)}
+    elif fmt=="linetext":
+        heat_mask,link_mask=lineText(page,labels,gheatmap)    
+        return {"image":cv2.resize(back,(img_dim,img_dim)),
+                "heatmap":cv2.resize(heat_mask,(img_dim,img_dim),fx=0,fy=0,interpolation=cv2.INTER_NEAREST),
+                "linkmap":cv2.resize(link_mask,(img_dim,img_dim),fx=0,fy=0,interpolation=cv2.INTER_NEAREST)}
+
+def saveSample(data,writer,i,mode,fmt):
+    '''
+        saves a single sample as png files
+        args:
+            data    : the sample (see createSample)
+            writer  : image writer (AsyncWriter)
+            i       : index of the sample (used for naming)
+            mode    : train/test
+            fmt     : totaltext/linetext
+    '''
+    img_path =os.path.join(mode.imgs,f"img{i}.png")
+    if fmt=="totaltext":
+        # data formation
+        char_path=os.path.join(mode.charmaps,f"img{i}.png")
+        word_path=os.path.join(mode.wordmaps,f"img{i}.png")
+        anno_path=os.path.join(mode.annotations,f"poly_gt_img{i}.txt")
+        # save
+        writer.writeGroup([(img_path,data["image"]),
+                           (char_path,data["charmap"]),
+                           (word_path,data["wordmap"])])
+        with open(anno_path,"w") as f:
+            f.write(data["annotation"])
+    elif fmt=="linetext":
+        # data formation
+        link_path=os.path.join(mode.linkmaps,f"img{i}.png")
+        heat_path=os.path.join(mode.heatmaps,f"img{i}.png")
+        # save
+        writer.writeGroup([(img_path,data["image"]),
+                           (link_path,data["linkmap"]),
+                           (heat_path,data["heatmap"])])
+
+def saveChunk(ds,pool,gheatmap,writer,idxs,mode,fmt,img_dim,seed,prefetch=0,output="png",shard=0):
+    '''
+        saves a chunk of samples
+        args:
+            pool    : decoded backgrounds (see backgroundPool)
+            seed    : base seed of the samples
+            prefetch: number of backgrounds to prepare ahead in a thread (0: disabled)
+            output  : png or a shard format (npz/raw/tfrecord)
+            shard   : number of the shard of the chunk (shard outputs: a chunk is a shard)
+        returns:
+            skipped indices, shard infos (None for png), background prefetch (hits,misses) (None without prefetch)
+        * sample i is drawn from sampleRandom(seed,i) (and its background from sampleRandom(seed,i,"back")),
+          so a sample does not depend on the chunking or the worker that creates it
+        * the png writer is flushed at the end of the chunk (write errors are raised)
+    '''
+    skipped=[]
+    shards=ShardWriter(mode.dir,output,shard_size=len(idxs),start=shard) if output!="png" else None
+    backs=sampleBackgrounds(pool,(config.back_dim,config.back_dim),seed,idxs)
+    if prefetch>0:
+        backs=Prefetcher(backs,depth=prefetch)
+    try:
+        for i,back in zip(idxs,backs):
+            try:
+                with profiling.timer("sample"):
+                    data=createSample(ds,back,gheatmap,fmt,img_dim,sampleRandom(seed,i))
+                if output=="png":
+                    saveSample(data,writer,i,mode,fmt)
+                else:
+                    shards.add(i,data)
+            except Exception as e:
+                #print(e)
+                #LOG_INFO(f"Charecter Size too Short To extract: image number:{i}. Skipping Image",mcolor="red")
+                skipped.append(i)
+                profiling.count("skipped")
+    finally:
+        if isinstance(backs,Prefetcher):
+            backs.close()
+    prefetched=(backs.hits,backs.misses) if isinstance(backs,Prefetcher) else None
+    if output=="png":
+        writer.flush()
+        return skipped,None,prefetched
+    shards.flush()
+    return skipped,shards.shards,prefetched
+
+#--------------------
+# workers
+#--------------------
+# resources of a worker process (loaded once by initWorker)
+_worker={}
+
+def initWorker(args):
+    '''
+        loads the resources of a worker process
+        args:
+            args    : parsed script arguments
+    '''
+    # the pool already provides the parallelism
+    cv2.setNumThreads(1)
+    if args.profile or args.profile_trace:
+        profiling.enable(trace=args.profile_trace is not None)
+    set_config(args)
+    _worker["ds"]=DataSet(args.data_dir,preload_glyphs=args.preload_glyphs,glyph_cache_size=int(args.glyph_cache_size))
+    useAtlas(args.atlas_dir)
+    _worker["pool"]=backgroundPool(_worker["ds"],dim=(config.back_dim,config.back_dim),cache_dir=args.background_cache)
+    _worker["gheatmap"]=gaussian_heatmap(size=512,distanceRatio=config.heatmap_ratio)
+    _worker["writer"]=AsyncWriter(num_threads=int(args.write_threads),compression=args.png_compression)
+    _worker["prefetch"]=int(args.prefetch)
+
+def workerChunk(task):
+    '''
+        saves a chunk of samples within a worker process
+        returns:
+            skipped indices, shard info, background prefetch, profile records of the chunk (see profiling.collect)
+    '''
+    idxs,shard,mode,fmt,img_dim,seed,output=task
+    skipped,shard,prefetched=saveChunk(_worker["ds"],_worker["pool"],_worker["gheatmap"],_worker["writer"],idxs,mode,fmt,img_dim,seed,_worker["prefetch"],output,shard)
+    return skipped,shard,prefetched,profiling.collect() if profiling.state.enabled else None
+
+
+def saveModeData(ds,pool,nb,mode,fmt,img_dim,seed,args,workers=1):
     '''
         saves data based on format and mode
         args:
             ds      : datset resource
-            backGen : background generator
+            pool    : decoded backgrounds (see backgroundPool)
             nb      : number of data to generate
             mode    : train/test
             fmt     : totaltext/linetext
             img_dim : final data size
+            seed    : base seed of the samples
+            args    : parsed script arguments (needed by the worker processes)
+            workers : number of worker processes
+
+        * with a shard output every chunk is a shard of args.shard_size samples and a manifest is written
     '''
     skipped=[]
-    if fmt=="linetext":
-        gheatmap=gaussian_heatmap(size=512,distanceRatio=config.heatmap_ratio)
-
-    for i in tqdm(range(nb)):
-        try:
-            # data execution
-            page,labels=createSceneImage(ds)
-            back=createImageData(backGen,page,labels)
-            
-            if fmt=="totaltext":
-                char_mask,word_mask,text_lines=TotalText(page,labels)
-                # data formation
-                img_path =os.path.join(mode.imgs,f"img{i}.png")
-                char_path=os.path.join(mode.charmaps,f"img{i}.png")
-                word_path=os.path.join(mode.wordmaps,f"img{i}.png")
-                anno_path=os.path.join(mode.annotations,f"poly_gt_img{i}.txt")
-                # save
-                cv2.imwrite(img_path,cv2.resize(back,(img_dim,img_dim)))
-                cv2.imwrite(char_path,cv2.resize(char_mask,(img_dim,img_dim)))
-                cv2.imwrite(word_path,cv2.resize(word_mask,(img_dim,img_dim)))
-                with open(anno_path,"w") as f:
-                    for line in text_lines:
-                        f.write(f"{line}\n")
-            elif fmt=="linetext":
-                heat_mask,link_mask=lineText(page,labels,gheatmap)    
-                # data formation
-                img_path =os.path.join(mode.imgs,f"img{i}.png")
-                link_path=os.path.join(mode.linkmaps,f"img{i}.png")
-                heat_path=os.path.join(mode.heatmaps,f"img{i}.png")
-                # save
-                cv2.imwrite(img_path,cv2.resize(back,(img_dim,img_dim)))
-                cv2.imwrite(link_path,cv2.resize(link_mask,(img_dim,img_dim),fx=0,fy=0,interpolation=cv2.INTER_NEAREST))
-                cv2.imwrite(heat_path,cv2.resize(heat_mask,(img_dim,img_dim),fx=0,fy=0,interpolation=cv2.INTER_NEAREST))
-                
-        except Exception as e:
-            #print(e)
-            #LOG_INFO(f"Charecter Size too Short To extract: image number:{i}. Skipping Image",mcolor="red")
-            skipped.append(i)
+    # background prefetch hits/misses of all the chunks
+    prefetch_hits,prefetch_misses=0,0
+    gheatmap=gaussian_heatmap(size=512,distanceRatio=config.heatmap_ratio)
+    output=args.output
+    # the chunks write the shards, this writer keeps the manifest
+    shards=ShardWriter(mode.dir,output,shard_size=int(args.shard_size)) if output!="png" else None
+
+    if workers<=1:
+        writer=AsyncWriter(num_threads=int(args.write_threads),compression=args.png_compression)
+        # flushing every sample would serialize the writes: flush per chunk
+        chunk_size=32 if output=="png" else int(args.shard_size)
+        with tqdm(total=nb) as pbar:
+            for i in range(0,nb,chunk_size):
+                idxs=list(range(i,min(i+chunk_size,nb)))
+                chunk_skipped,chunk_shards,prefetched=saveChunk(ds,pool,gheatmap,writer,idxs,mode,fmt,img_dim,seed,int(args.prefetch),output,i//chunk_size)
+                skipped+=chunk_skipped
+                if shards is not None:
+                    shards.merge(chunk_shards)
+                if prefetched is not None:
+                    prefetch_hits+=prefetched[0]
+                    prefetch_misses+=prefetched[1]
+                pbar.update(len(idxs))
+        writer.close()
+    else:
+        # the save dirs as a picklable object
+        mode=argparse.Namespace(**{key:val for key,val in vars(mode).items() if "__" not in key})
+        if output=="png":
+            # small chunks keep the workers balanced
+            chunk_size=max(1,min(32,nb//(workers*4)))
+        else:
+            chunk_size=int(args.shard_size)
+        tasks=[(list(range(i,min(i+chunk_size,nb))),i//chunk_size,mode,fmt,img_dim,seed,output) for i in range(0,nb,chunk_size)]
+        with mp.Pool(workers,initializer=initWorker,initargs=(args,)) as workers_pool:
+            with tqdm(total=nb) as pbar:
+                for task,(chunk_skipped,chunk_shards,prefetched,records) in zip(tasks,workers_pool.imap(workerChunk,tasks)):
+                    skipped+=chunk_skipped
+                    if shards is not None:
+                        shards.merge(chunk_shards)
+                    if prefetched is not None:
+                        prefetch_hits+=prefetched[0]
+                        prefetch_misses+=prefetched[1]
+                    profiling.merge(records)
+                    pbar.update(len(task[0]))
+    if output!="png":
+        manifest=shards.close(task=fmt,img_dim=img_dim,seed=seed,skipped=sorted(skipped))
+        LOG_INFO(f"Manifest:{manifest}")
+    if int(args.prefetch)>0:
+        total=prefetch_hits+prefetch_misses
+        stats={"depth":int(args.prefetch),
+               "hits":prefetch_hits,
+               "misses":prefetch_misses,
+               "hit_rate":prefetch_hits/total if total>0 else 0.0}
+        LOG_INFO(f"Background prefetch:{stats}")
+        profiling.count("prefetch_hit",prefetch_hits)
+        profiling.count("prefetch_miss",prefetch_misses)
     LOG_INFO(f"Skipped Images:{len(skipped)}")
 
 #--------------------
@@ -123,7 +292,13 @@ def main(args):
     
     nb_train   =   int(args.train_samples)
     nb_test    =   int(args.test_samples)
+    nb_workers =   int(args.workers)
+    output     =   args.output
     assert save_fmt in ["totaltext","linetext"],"Wrong output format"
+    assert output in ["png"]+SHARD_FORMATS,"Wrong output type"
+    if output=="tfrecord":
+        # fail before generating anything
+        importTF()
 
     #-------------------------
     # set config
@@ -140,38 +315,51 @@ def main(args):
     #-------------------------
     # resources
     # ------------------------    
-    ds=DataSet(data_dir)
-    backGen=backgroundGenerator(ds,dim=(config.back_dim,config.back_dim))
-    #dummy back
-    back=next(backGen)
+    ds=DataSet(data_dir,preload_glyphs=args.preload_glyphs,glyph_cache_size=int(args.glyph_cache_size))
+    useAtlas(args.atlas_dir)
+    # decode the backgrounds once (the workers map the cache)
+    pool=backgroundPool(ds,dim=(config.back_dim,config.back_dim),cache_dir=args.background_cache)
+    # every sample is addressed by (seed,index)
+    seed=int(args.seed) if args.seed is not None else random.SystemRandom().randrange(2**32)
+    LOG_INFO(f"seed:{seed}")
+    if args.profile or args.profile_trace:
+        profiling.enable(trace=args.profile_trace is not None)
     #-------------------------
     # saving
     #------------------------
     
     class train:
         dir=create_dir(save_dir,f"{ds_iden}.train")
-        imgs=create_dir(dir,"images")
-        if save_fmt=="totaltext":
-            charmaps=create_dir(dir,"charmaps")
-            wordmaps=create_dir(dir,"wordmaps")
-            annotations=create_dir(dir,"annotations")
-        elif save_fmt=="linetext":
-            heatmaps=create_dir(dir,"heatmaps")
-            linkmaps=create_dir(dir,"linkmaps")
+        # shards are saved in dir
+        if output=="png":
+            imgs=create_dir(dir,"images")
+            if save_fmt=="totaltext":
+                charmaps=create_dir(dir,"charmaps")
+                wordmaps=create_dir(dir,"wordmaps")
+                annotations=create_dir(dir,"annotations")
+            elif save_fmt=="linetext":
+                heatmaps=create_dir(dir,"heatmaps")
+                linkmaps=create_dir(dir,"linkmaps")
 
     class test:
         dir=create_dir(save_dir,f"{ds_iden}.test")
-        imgs=create_dir(dir,"images")
-        if save_fmt=="totaltext":
-            charmaps=create_dir(dir,"charmaps")
-            wordmaps=create_dir(dir,"wordmaps")
-            annotations=create_dir(dir,"annotations")
-        elif save_fmt=="linetext":
-            heatmaps=create_dir(dir,"heatmaps")
-            linkmaps=create_dir(dir,"linkmaps")
-
-    saveModeData(ds,backGen,nb_train,train,save_fmt,img_dim)
-    saveModeData(ds,backGen,nb_test,test,save_fmt,img_dim)
+        # shards are saved in dir
+        if output=="png":
+            imgs=create_dir(dir,"images")
+            if save_fmt=="totaltext":
+                charmaps=create_dir(dir,"charmaps")
+                wordmaps=create_dir(dir,"wordmaps")
+                annotations=create_dir(dir,"annotations")
+            elif save_fmt=="linetext":
+                heatmaps=create_dir(dir,"heatmaps")
+                linkmaps=create_dir(dir,"linkmaps")
+
+    saveModeData(ds,pool,nb_train,train,save_fmt,img_dim,f"{seed}:train",args,workers=nb_workers)
+    saveModeData(ds,pool,nb_test,test,save_fmt,img_dim,f"{seed}:test",args,workers=nb_workers)
+    if profiling.state.enabled:
+        profiling.report()
+        if args.profile_trace:
+            LOG_INFO(f"Profile trace:{profiling.dumpTrace(args.profile_trace)}")
     
 #-----------------------------------------------------------------------------------
 
@@ -188,6 +376,21 @@ if __name__=="__main__":
     parser.add_argument("--train_samples",required=False,default=1500,help ="number of train samples to create : default=1500")
     parser.add_argument("--test_samples",required=False,default=128,help ="number of test samples to create    : default=128")
     
+    parser.add_argument("--workers",required=False,default=1,help ="number of worker processes to generate data with : default=1")
+    parser.add_argument("--seed",required=False,default=None,help ="base random seed, sample i of train/test is drawn from (seed:train/test:i) : default=None (random, logged)")
+    
+    parser.add_argument("--output",required=False,default="png",help ="how to save the samples. Available:png,npz,raw,tfrecord (tfrecord needs tensorflow) : default=png")
+    parser.add_argument("--shard_size",required=False,default=128,help ="number of samples per shard (npz/raw/tfrecord outputs) : default=128")
+    parser.add_argument("--write_threads",required=False,default=2,help ="number of threads to encode and write the images with : default=2")
+    parser.add_argument("--png_compression",required=False,default=None,help ="png compression level [0-9] : default=None (opencv default)")
+    parser.add_argument("--prefetch",required=False,default=0,help ="number of backgrounds to prepare ahead in a background thread : default=0 (disabled)")
+    parser.add_argument("--background_cache",required=False,default=None,help ="folder to cache the decoded backgrounds in : default=None (data_dir/common/background_cache or a user/temporary cache folder if the data is not writable)")
+    parser.add_argument("--profile",action="store_true",help ="time the generation stages and print a p50/p95/total report at the end (all workers)")
+    parser.add_argument("--profile_trace",required=False,default=None,help ="json file to save the profile and the timed calls in (chrome trace format, implies --profile) : default=None")
+    parser.add_argument("--preload_glyphs",action="store_true",help ="decode all the component bitmaps into memory at load time")
+    parser.add_argument("--atlas_dir",required=False,default=None,help ="folder of the printed component atlases to draw printed words from (see scripts/atlas.py) : default=None (drawn live)")
+    parser.add_argument("--glyph_cache_size",required=False,default=4096,help ="max number of component bitmaps to cache when not preloading : default=4096")
+    
     parser.add_argument("--cfg_data_dim",required=False,default=786,help ="dimension of the image [Since only squre images are produced, providing one value is enough] : default=786")
     parser.add_argument("--cfg_comp_dim",required=False,default=64,help ="height dimension for any kind of component : default=64")
     
@@ -0,0 +1,100 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","benchmarks"))
+
+import shutil
+import numpy as np
+import pytest
+
+from coreLib import atlas
+from coreLib.dataset import DataSet
+from coreLib.fonts import listFonts,getFont,markPrintedComps,textInk
+from coreLib.utils import GraphemeParser,stripPads
+from fixture import createFixture,freeFonts
+#--------------------
+# fixtures
+#--------------------
+SIZE=64
+
+@pytest.fixture(scope="module")
+def ds(tmp_path_factory):
+    return DataSet(createFixture(str(tmp_path_factory.mktemp("data"))))
+
+@pytest.fixture(scope="module")
+def atlas_dir(ds,tmp_path_factory):
+    return atlas.createAtlases(ds,str(tmp_path_factory.mktemp("atlas")),[SIZE])
+
+@pytest.fixture
+def use_atlas():
+    def use(atlas_dir):
+        atlas.useAtlas(atlas_dir)
+    yield use
+    atlas.useAtlas(None)
+
+def dictionaryWords(ds):
+    '''
+        (font,components) of every dictionary word (and a few overlapping words) with every font of its language
+    '''
+    GP=GraphemeParser()
+    for lang in [ds.bangla,ds.english]:
+        for font_path in listFonts(lang.fonts):
+            font=getFont(font_path,SIZE)
+            for word in lang.dictionary.word:
+                comps=GP.word2grapheme(str(word))
+                if len(comps)>0:
+                    yield font,comps
+            # overhanging and kerned glyphs
+            for comps in [list("ij"),list("ffj"),list("AVAWAY"),list("fifty"),list("fTfly"),list("AAX")]:
+                yield font,comps
+#--------------------
+# equivalence
+#--------------------
+def test_atlas_matches_live(ds,atlas_dir,use_atlas):
+    use_atlas(atlas_dir)
+    for font,comps in dictionaryWords(ds):
+        marked=atlas.markComps(comps,font)
+        assert np.array_equal(marked,markPrintedComps(comps,font))
+        assert np.array_equal(marked>0,stripPads(textInk(font,"".join(comps)),0)>0)
+    # the words were composed from the atlases
+    assert all(len(glyphs.pairs)>0 and all(glyphs.pairs.values()) for glyphs in atlas.state.atlases.values())
+
+def test_atlas_mismatch_falls_back(ds,atlas_dir,use_atlas,tmp_path):
+    font,comps=next((font,comps) for font,comps in dictionaryWords(ds)
+                    if len(comps)>1 and comps[0]!=comps[1] and all(atlas.atlasable(comp) for comp in comps))
+    # an atlas whose second cell is blank
+    name=atlas.atlasName(font.path,SIZE)
+    for ext in [".json",".npy"]:
+        shutil.copy(os.path.join(atlas_dir,f"{name}{ext}"),tmp_path)
+    buffer=np.load(tmp_path/f"{name}.npy")
+    offset,h,w,_=atlas.GlyphAtlas(str(tmp_path/f"{name}.json")).cells[comps[1]]
+    buffer[offset:offset+h*w]=0
+    np.save(tmp_path/f"{name}.npy",buffer)
+    use_atlas(str(tmp_path))
+    assert np.array_equal(atlas.markComps(comps,font),markPrintedComps(comps,font))
+    assert atlas.getAtlas(font).pairs[(comps[0],comps[1])] is False
+#--------------------
+# names
+#--------------------
+def test_same_file_name_fonts(tmp_path,use_atlas):
+    # two different fonts saved under the same file name (i.e- bangla/fonts and english/fonts)
+    font_paths=[]
+    for lang,font_path in zip(["bangla","english"],freeFonts()):
+        os.makedirs(tmp_path/lang)
+        font_paths.append(shutil.copy(font_path,str(tmp_path/lang/"font.ttf")))
+    assert atlas.atlasName(font_paths[0],SIZE)!=atlas.atlasName(font_paths[1],SIZE)
+    index_paths=[atlas.buildAtlas(font_path,SIZE,list("AVij"),str(tmp_path)) for font_path in font_paths]
+    use_atlas(str(tmp_path))
+    for font_path,index_path in zip(font_paths,index_paths):
+        assert atlas.getAtlas(getFont(font_path,SIZE)).sha256==atlas.fontHash(font_path)
+    with pytest.raises(ValueError,match="built for"):
+        atlas.GlyphAtlas(index_paths[0],font_paths[1],SIZE)
+    with pytest.raises(ValueError,match="built for size"):
+        atlas.GlyphAtlas(index_paths[0],font_paths[0],SIZE+1)
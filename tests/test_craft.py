@@ -0,0 +1,63 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+
+import random
+import cv2
+import numpy as np
+import pytest
+
+from coreLib.craft import gaussian_heatmap,warpGaussian
+#--------------------
+# helpers
+#--------------------
+GMAP=gaussian_heatmap(size=512,distanceRatio=1.5)
+SRC=np.array([[0,0],[512,0],[512,512],[0,512]],dtype="float32")
+
+def fullWarp(M,target):
+    '''
+        the gaussian warped into the whole target
+    '''
+    h,w=target.shape
+    return target+cv2.warpPerspective(GMAP,M,dsize=(w,h),flags=cv2.INTER_NEAREST).astype("float32")
+
+def charBox(rng,h,w):
+    '''
+        an axis aligned character box (see get_maps) that may leave the map
+    '''
+    x0,y0=rng.randint(-10,w-1),rng.randint(-10,h-1)
+    x1,y1=rng.randint(x0+1,w+10),rng.randint(y0+1,h+10)
+    return np.array([[x0,y1],[x1,y1],[x1,y0],[x0,y0]],dtype="float32")
+
+def linkQuad(rng,h,w):
+    '''
+        a skewed link quadrilateral (see get_maps)
+    '''
+    lx1,lx2=sorted(rng.uniform(-5,w+5) for _ in range(2))
+    ys=[rng.uniform(-5,h+5) for _ in range(4)]
+    return np.array([[lx1,ys[0]],[lx2,ys[1]],[lx2,ys[2]],[lx1,ys[3]]],dtype="float32")
+#--------------------
+# warp
+#--------------------
+@pytest.mark.parametrize("shape",[charBox,linkQuad])
+def test_warpGaussian_equals_full_warp(shape):
+    rng=random.Random(0)
+    for _ in range(300):
+        h,w=rng.randint(8,96),rng.randint(8,256)
+        M=cv2.getPerspectiveTransform(src=SRC,dst=shape(rng,h,w))
+        target=np.random.RandomState(rng.randint(0,1000)).rand(h,w).astype("float32")
+        expected=fullWarp(M,target)
+        assert np.array_equal(warpGaussian(GMAP,M,target),expected)
+
+def test_warpGaussian_singular():
+    # all the corners on a line: the transform is singular
+    target=np.zeros((32,64),dtype="float32")
+    M=np.array([[0.1,0,4],[0,0,8],[0,0,1]],dtype=np.float64)
+    assert np.array_equal(warpGaussian(GMAP,M,target.copy()),fullWarp(M,target))
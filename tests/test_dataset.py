@@ -0,0 +1,47 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","benchmarks"))
+
+import random
+import pandas as pd
+import pytest
+
+from coreLib.dataset import DataSet
+from fixture import createFixture
+#--------------------
+# fixtures
+#--------------------
+@pytest.fixture(scope="module")
+def ds(tmp_path_factory):
+    return DataSet(createFixture(str(tmp_path_factory.mktemp("data"))))
+#--------------------
+# component index
+#--------------------
+def test_label_paths_match_dataframe_scan(ds):
+    for data in [ds.bangla.graphemes,ds.bangla.numbers,ds.english.graphemes,ds.english.numbers,ds.common.symbols]:
+        df=data.df
+        assert set(data.comps.label_paths.keys())==set(df.label)
+        for label,paths in data.comps.label_paths.items():
+            # same paths in the same order as df.loc[df.label==comp]
+            assert list(paths)==list(df.loc[df.label==label].img_path)
+            assert not paths.flags.writeable
+#--------------------
+# mixed components
+#--------------------
+def test_mixed_sample_matches_concat(ds):
+    for lang in [ds.bangla,ds.english]:
+        df=pd.concat([lang.graphemes.df,lang.numbers.df,ds.common.symbols.df],ignore_index=True)
+        assert len(lang.mixed)==len(df)
+        assert list(lang.mixed.labels)==list(df.label)
+        # the same draws as the per word pd.concat + df.iloc[randint]
+        rng,ref_rng=random.Random(3),random.Random(3)
+        for _ in range(200):
+            assert lang.mixed.sample(rng=rng)==df.label.iloc[ref_rng.randint(0,len(df)-1)]
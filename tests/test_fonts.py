@@ -0,0 +1,79 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","benchmarks"))
+
+import warnings
+import numpy as np
+import PIL.Image,PIL.ImageDraw
+import pytest
+
+from coreLib.fonts import getFont,markPrintedComps,textMetrics
+from coreLib.utils import stripPads
+from fixture import freeFonts
+#--------------------
+# reference
+#--------------------
+def prefixSumMarks(comps,font):
+    '''
+        the original labeling: every prefix is drawn on its own canvas, the canvases are summed
+        and the n-th highest sum is the n-th component
+    '''
+    max_dim=len(comps)*font.size+100
+    imgs=[]
+    comp_str=''
+    for comp in comps:
+        comp_str+=comp
+        image = PIL.Image.new(mode='L', size=(max_dim,max_dim))
+        draw = PIL.ImageDraw.Draw(image)
+        draw.text(xy=(0, 0), text=comp_str, fill=1, font=font)
+        imgs.append(np.array(image))
+    img=stripPads(sum(imgs),0)
+    vals=sorted(np.unique(img),reverse=True)[:-1]
+    marked=np.zeros(img.shape,dtype=np.int64)
+    for v,l in zip(vals,range(1,len(comps)+1)):
+        marked[img==v]=l
+    return marked
+#--------------------
+# metrics
+#--------------------
+TEXTS=["ij","AVAWAY","jff","(fifty)","ক্ষম"]
+
+@pytest.mark.parametrize("font_path",freeFonts(),ids=os.path.basename)
+def test_textMetrics_no_deprecation(font_path):
+    font=getFont(font_path,64)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error",DeprecationWarning)
+        for text in TEXTS:
+            textMetrics(font,f"{text}-{font_path}")
+
+@pytest.mark.parametrize("font_path",freeFonts(),ids=os.path.basename)
+def test_textMetrics_size(font_path):
+    font=getFont(font_path,64)
+    if not hasattr(font,"getsize"):
+        pytest.skip("font.getsize is removed in Pillow 10")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore",DeprecationWarning)
+        for text in TEXTS:
+            assert textMetrics(font,text).size==font.getsize(text)
+#--------------------
+# labels
+#--------------------
+# overhanging and kerned glyphs, a bangla conjunct
+WORDS=[list("ij"),list("ffj"),list("AVAWAY"),list("fifty"),list("jff"),["ক্ষ","ম"],["স্ত্র","ী"]]
+
+@pytest.mark.parametrize("font_path",freeFonts(),ids=os.path.basename)
+@pytest.mark.parametrize("comps",WORDS,ids=["".join(comps) for comps in WORDS])
+def test_markPrintedComps_prefix_labels(font_path,comps):
+    font=getFont(font_path,64)
+    expected=prefixSumMarks(comps,font)
+    marked=markPrintedComps(comps,font)
+    assert marked.shape==expected.shape
+    assert np.array_equal(marked,expected)
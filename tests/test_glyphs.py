@@ -0,0 +1,56 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","benchmarks"))
+
+import numpy as np
+import pytest
+
+from coreLib import profiling
+from coreLib.dataset import DataSet
+from coreLib.glyphs import GlyphStore,readGlyph
+from fixture import createFixture
+#--------------------
+# fixtures
+#--------------------
+HEIGHT=32
+
+@pytest.fixture(scope="module")
+def img_paths(tmp_path_factory):
+    ds=DataSet(createFixture(str(tmp_path_factory.mktemp("data"))))
+    return list(ds.bangla.graphemes.df.img_path)+list(ds.common.symbols.df.img_path)
+
+@pytest.fixture
+def counts():
+    profiling.enable()
+    yield profiling.state.counts
+    profiling.disable()
+    profiling.reset()
+#--------------------
+# glyphs
+#--------------------
+@pytest.mark.parametrize("preload",[False,True])
+def test_glyphs_match_disk(img_paths,preload):
+    store=GlyphStore(img_paths,height=HEIGHT,preload=preload)
+    for img_path in img_paths:
+        glyph=store.get(img_path)
+        assert glyph.shape[0]==HEIGHT
+        assert np.array_equal(glyph,readGlyph(img_path,HEIGHT))
+        assert not glyph.flags.writeable
+
+def test_cache_is_bounded(img_paths,counts):
+    store=GlyphStore(img_paths,height=HEIGHT,cache_size=4)
+    for img_path in img_paths[:4]+img_paths[:4]:
+        store.get(img_path)
+    assert counts=={"glyph_cache_miss":4,"glyph_cache_hit":4}
+    # the first glyph is evicted by the fifth
+    store.get(img_paths[4])
+    store.get(img_paths[0])
+    assert counts["glyph_cache_miss"]==6
@@ -0,0 +1,49 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","benchmarks"))
+
+from glob import glob
+import cv2
+import numpy as np
+import pytest
+
+from coreLib import render
+from coreLib.dataset import DataSet
+from fixture import createFixture
+#--------------------
+# fixtures
+#--------------------
+@pytest.fixture
+def ds(tmp_path):
+    return DataSet(createFixture(str(tmp_path/"data")))
+#--------------------
+# background cache
+#--------------------
+def test_stale_cache_removed(ds):
+    cache_dir=render.cacheDirs(ds)[0]
+    pool=render.backgroundPool(ds,dim=(64,64))
+    assert len(glob(os.path.join(cache_dir,"backgrounds_64x64_*.npy")))==1
+    # a new background changes the folder: the old cache is replaced
+    cv2.imwrite(os.path.join(ds.common.background,"new.jpg"),np.zeros((32,32,3),np.uint8))
+    os.utime(ds.common.background,ns=(0,os.stat(ds.common.background).st_mtime_ns+10**9))
+    new_pool=render.backgroundPool(ds,dim=(64,64))
+    assert len(new_pool)==len(pool)+1
+    assert len(glob(os.path.join(cache_dir,"backgrounds_64x64_*.npy")))==1
+
+def test_read_only_data_falls_back(ds,tmp_path,monkeypatch):
+    data_cache=render.cacheDirs(ds)[0]
+    monkeypatch.setenv("XDG_CACHE_HOME",str(tmp_path/"user_cache"))
+    writable=render.writableDir
+    monkeypatch.setattr(render,"writableDir",lambda path:path!=data_cache and writable(path))
+    pool=render.backgroundPool(ds,dim=(64,64))
+    assert not os.path.exists(data_cache)
+    assert len(glob(os.path.join(str(tmp_path/"user_cache"),"synthdata","backgrounds","*","backgrounds_64x64_*.npy")))==1
+    assert pool.shape[1:]==(64,64,3)
@@ -0,0 +1,95 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+
+import json
+import hashlib
+import numpy as np
+import pytest
+
+from coreLib.shards import ShardWriter,MANIFEST_NAME
+#--------------------
+# helpers
+#--------------------
+def samples(idens,seed=0):
+    rs=np.random.RandomState(seed)
+    return [(iden,{"image":rs.randint(0,255,(16,24,3),dtype=np.uint8),
+                   "heatmap":rs.randint(0,255,(16,24),dtype=np.uint8),
+                   "label":f"word {iden}"}) for iden in idens]
+
+def readRaw(save_dir,name):
+    '''
+        the samples of a raw shard from its index
+    '''
+    with open(os.path.join(save_dir,f"{name}.index.json"),"r") as f:
+        index=json.load(f)
+    with open(os.path.join(save_dir,f"{name}.bin"),"rb") as f:
+        buf=f.read()
+    data=[]
+    for sample in index["samples"]:
+        values={}
+        for key,entry in sample["entries"].items():
+            value=buf[entry["offset"]:entry["offset"]+entry["size"]]
+            if entry["dtype"]=="str":
+                values[key]=value.decode("utf-8")
+            else:
+                values[key]=np.frombuffer(value,dtype=entry["dtype"]).reshape(entry["shape"])
+        data.append((sample["iden"],values))
+    return data
+
+def readNPZ(save_dir,name):
+    '''
+        the samples of a npz shard
+    '''
+    with np.load(os.path.join(save_dir,f"{name}.npz")) as arrays:
+        keys=[key for key in arrays.files if key!="iden"]
+        return [(int(iden),{key:(str(arrays[key][idx]) if arrays[key].dtype.kind=="U" else arrays[key][idx]) for key in keys})
+                for idx,iden in enumerate(arrays["iden"])]
+
+def sha256(path):
+    with open(path,"rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+#--------------------
+# round trip
+#--------------------
+@pytest.mark.parametrize("fmt,read",[("npz",readNPZ),("raw",readRaw)])
+def test_round_trip(tmp_path,fmt,read):
+    save_dir=str(tmp_path)
+    data=samples(range(10))
+    # a worker writes the shards 00002.. and the main writer merges them
+    worker=ShardWriter(save_dir,fmt,shard_size=3,start=2)
+    for iden,values in data[4:]:
+        worker.add(iden,values)
+    worker.flush()
+    writer=ShardWriter(save_dir,fmt,shard_size=2)
+    for iden,values in data[:4]:
+        writer.add(iden,values)
+    writer.merge(worker.shards)
+    with open(writer.close(dim=16),"r") as f:
+        manifest=json.load(f)
+    assert manifest["format"]==fmt
+    assert manifest["meta"]=={"dim":16}
+    assert manifest["num_samples"]==len(data)
+    assert [shard["name"] for shard in manifest["shards"]]==["00000","00001","00002","00003"]
+    read_back=[]
+    for shard in manifest["shards"]:
+        for file_name,digest in shard["files"].items():
+            assert sha256(os.path.join(save_dir,file_name))==digest
+        shard_data=read(save_dir,shard["name"])
+        assert [iden for iden,_ in shard_data]==shard["idens"]
+        read_back+=shard_data
+    assert len(read_back)==len(data)
+    for (iden,values),(read_iden,read_values) in zip(data,read_back):
+        assert iden==read_iden
+        assert read_values["label"]==values["label"]
+        assert np.array_equal(read_values["image"],values["image"])
+        assert np.array_equal(read_values["heatmap"],values["heatmap"])
+    # no temporary files are left
+    assert sorted(os.listdir(save_dir))==sorted([MANIFEST_NAME]+[name for shard in manifest["shards"] for name in shard["files"]])
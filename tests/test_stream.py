@@ -0,0 +1,87 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","benchmarks"))
+
+import threading
+import numpy as np
+import pytest
+
+from coreLib import stream
+from coreLib.stream import SceneMapStream
+from fixture import createFixture
+#--------------------
+# fixtures
+#--------------------
+NUM_SAMPLES=4
+
+@pytest.fixture(scope="module")
+def data_dir(tmp_path_factory):
+    return createFixture(str(tmp_path_factory.mktemp("data")))
+
+def samples(data_stream,worker_id=0,num_workers=1):
+    '''
+        the samples a DataLoader worker of a stream would yield
+    '''
+    saved=stream.workerInfo
+    stream.workerInfo=lambda:(worker_id,num_workers)
+    try:
+        return list(data_stream)
+    finally:
+        stream.workerInfo=saved
+
+def assertSameSamples(samples_a,samples_b):
+    assert len(samples_a)==len(samples_b)
+    for sample_a,sample_b in zip(samples_a,samples_b):
+        for arr_a,arr_b in zip(sample_a,sample_b):
+            assert np.array_equal(arr_a,arr_b)
+#--------------------
+# determinism
+#--------------------
+@pytest.mark.parametrize("mode",["scene","noisy"])
+def test_samples_do_not_depend_on_workers(data_dir,mode):
+    data_stream=SceneMapStream(data_dir,mode=mode,seed=7,img_dim=128,num_samples=NUM_SAMPLES,buffer_size=2)
+    single=samples(data_stream)
+    assert len(single)==NUM_SAMPLES
+    assert all(arr.dtype==np.uint8 and arr.shape[:2]==(128,128) for sample in single for arr in sample)
+    # worker w of 2 yields w,w+2..
+    workers=[samples(data_stream,worker_id,2) for worker_id in range(2)]
+    interleaved=[sample for pair in zip(*workers) for sample in pair]
+    assertSameSamples(single,interleaved)
+    # the same epoch repeats, the next one does not
+    assertSameSamples(single,samples(data_stream))
+    data_stream.setEpoch(1)
+    assert not np.array_equal(samples(data_stream)[0][0],single[0][0])
+#--------------------
+# failures
+#--------------------
+def test_failed_sample_raises_after_retries(data_dir,monkeypatch):
+    def failing(ds,gmap,rng):
+        raise ValueError("no words")
+    monkeypatch.setattr(stream,"createNoisyMaps",failing)
+    data_stream=SceneMapStream(data_dir,mode="noisy",seed=7,num_samples=NUM_SAMPLES,buffer_size=2,max_retries=2)
+    with pytest.raises(RuntimeError,match="sample 0 failed 3 times:ValueError:no words"):
+        next(iter(data_stream))
+    assert data_stream.failed_attempts==3
+
+def test_closed_iteration_stops_prefetch(data_dir):
+    data_stream=SceneMapStream(data_dir,mode="noisy",seed=7,img_dim=128,num_samples=1,buffer_size=2)
+    # the resources are loaded by the first iteration
+    samples(data_stream)
+    threads=set(threading.enumerate())
+    data_stream.num_samples=None
+    samples_iter=iter(data_stream)
+    next(samples_iter)
+    prefetch_threads=set(threading.enumerate())-threads
+    assert len(prefetch_threads)==1
+    samples_iter.close()
+    for thread in prefetch_threads:
+        thread.join(timeout=30)
+        assert not thread.is_alive()
@@ -0,0 +1,44 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","benchmarks"))
+
+import filecmp
+import subprocess
+
+from fixture import createFixture
+#--------------------
+# helpers
+#--------------------
+SCRIPTS_DIR=os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","scripts")
+
+def synthetic(data_dir,save_dir,*args):
+    '''
+        runs scripts/synthetic.py from its folder
+    '''
+    os.makedirs(save_dir)
+    subprocess.run([sys.executable,"synthetic.py",data_dir,save_dir,"linetext","synth",*args],
+                   cwd=SCRIPTS_DIR,check=True,capture_output=True)
+
+def files(save_dir):
+    return sorted(os.path.relpath(os.path.join(root,name),save_dir) for root,_,names in os.walk(save_dir) for name in names)
+#--------------------
+# workers
+#--------------------
+def test_workers_write_the_same_samples(tmp_path):
+    data_dir=createFixture(str(tmp_path/"data"))
+    args=["--train_samples","6","--test_samples","2","--seed","3","--cfg_data_dim","256","--cfg_max_num_lines","3"]
+    synthetic(data_dir,str(tmp_path/"single"),*args,"--workers","1")
+    synthetic(data_dir,str(tmp_path/"multi"),*args,"--workers","3")
+    single,multi=files(tmp_path/"single"),files(tmp_path/"multi")
+    assert len(single)>0
+    assert single==multi
+    _,mismatch,errors=filecmp.cmpfiles(tmp_path/"single",tmp_path/"multi",single,shallow=False)
+    assert mismatch==[] and errors==[]
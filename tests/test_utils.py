@@ -0,0 +1,43 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+
+import numpy as np
+
+from coreLib.utils import labelBoxes
+#--------------------
+# boxes
+#--------------------
+def scanBoxes(img):
+    '''
+        the per label np.where scan labelBoxes replaces
+    '''
+    boxes={}
+    for k in np.unique(img):
+        if k==0:
+            continue
+        idx=np.where(img==k)
+        boxes[int(k)]=(np.min(idx[0]),np.max(idx[0]),np.min(idx[1]),np.max(idx[1]))
+    return boxes
+
+def test_labelBoxes_matches_scan():
+    rs=np.random.RandomState(0)
+    for dtype in [np.uint16,np.float64]:
+        for _ in range(20):
+            img=np.zeros((64,96),dtype=dtype)
+            # sparse labels with gaps in the numbering, overlapping and single pixel boxes
+            for k in rs.choice(np.arange(1,200),size=rs.randint(1,30),replace=False):
+                y,x=rs.randint(0,64),rs.randint(0,96)
+                h,w=rs.randint(1,20),rs.randint(1,30)
+                img[y:y+h,x:x+w][rs.rand(*img[y:y+h,x:x+w].shape)<0.7]=k
+            assert labelBoxes(img)==scanBoxes(img)
+
+def test_labelBoxes_empty():
+    assert labelBoxes(np.zeros((8,8),dtype=np.uint16))=={}
@@ -0,0 +1,58 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","benchmarks"))
+
+import random
+import numpy as np
+import pytest
+
+from coreLib.config import config
+from coreLib.dataset import DataSet
+from coreLib.render import createSceneImage
+from coreLib.word import addSpace
+from fixture import createFixture
+#--------------------
+# fixtures
+#--------------------
+@pytest.fixture(scope="module")
+def ds(tmp_path_factory):
+    return DataSet(createFixture(str(tmp_path_factory.mktemp("data"))))
+
+@pytest.fixture
+def long_lines():
+    '''
+        one line of 10 words per page (at least 20 identifiers)
+    '''
+    saved=(config.min_num_lines,config.max_num_lines,config.min_num_words,config.max_num_words)
+    config.min_num_lines,config.max_num_lines,config.min_num_words,config.max_num_words=1,1,10,10
+    yield
+    config.min_num_lines,config.max_num_lines,config.min_num_words,config.max_num_words=saved
+#--------------------
+# identifiers
+#--------------------
+def test_addSpace_range():
+    max_iden=int(np.iinfo(config.label_dtype).max)
+    img=np.zeros((4,4),dtype=config.label_dtype)
+    assert addSpace(img,max_iden,rng=random.Random(0)).max()==max_iden
+    with pytest.raises(ValueError,match="out of"):
+        addSpace(img,max_iden+1,rng=random.Random(0))
+
+def test_page_identifiers_in_range(ds,long_lines):
+    page,labels=createSceneImage(ds,rng=random.Random(0))
+    assert page.dtype==np.dtype(config.label_dtype)
+    idens=[iden for line in labels for word in line for iden in word]
+    assert max(idens)<=np.iinfo(config.label_dtype).max
+    assert page.max()<=max(idens)
+
+def test_page_past_identifier_range(ds,long_lines):
+    start=int(np.iinfo(config.label_dtype).max)-5
+    with pytest.raises(ValueError,match="out of"):
+        createSceneImage(ds,iden=start,rng=random.Random(0))
@@ -0,0 +1,47 @@
+# -*-coding: utf-8 -
+'''
+    @author: MD. Nazmuddoha Ansary
+'''
+#--------------------
+# imports
+#--------------------
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+
+import cv2
+import numpy as np
+import pytest
+
+from coreLib.writer import AsyncWriter
+#--------------------
+# writer
+#--------------------
+def images(n,seed=0):
+    rs=np.random.RandomState(seed)
+    return [rs.randint(0,255,(32,48,3),dtype=np.uint8) for _ in range(n)]
+
+def test_written_images(tmp_path):
+    imgs=images(10)
+    with AsyncWriter(num_threads=3,max_pending=2) as writer:
+        for idx,img in enumerate(imgs):
+            writer.writeGroup([(str(tmp_path/f"{idx}.png"),img),(str(tmp_path/f"{idx}_gray.png"),img[:,:,0])])
+        assert writer.flush()==2*len(imgs)
+    for idx,img in enumerate(imgs):
+        assert np.array_equal(cv2.imread(str(tmp_path/f"{idx}.png")),img)
+        assert np.array_equal(cv2.imread(str(tmp_path/f"{idx}_gray.png"),cv2.IMREAD_GRAYSCALE),img[:,:,0])
+
+def test_flush_raises_failed_writes(tmp_path):
+    imgs=images(4)
+    writer=AsyncWriter(num_threads=2)
+    missing=str(tmp_path/"missing"/"0.png")
+    writer.write(missing,imgs[0])
+    for idx,img in enumerate(imgs[1:]):
+        writer.write(str(tmp_path/f"{idx}.png"),img)
+    with pytest.raises(IOError,match="failed to write 1 image") as error:
+        writer.flush()
+    assert missing in str(error.value)
+    # the errors are reported once, the other images are written
+    assert sorted(os.listdir(tmp_path))==[f"{idx}.png" for idx in range(len(imgs)-1)]
+    writer.write(str(tmp_path/"next.png"),imgs[0])
+    assert writer.close()==1